@@ -16,6 +16,8 @@ import core_lib
 from core_lib.app_config import AppConfig
 from core_lib.application_data import Repositories, repositories
 from core_lib.feed_utils import upsert_gemeente_groningen_feed
+from core_lib.parse_executor import shutdown_parse_executor
+from core_lib.repositories import NewsItemStorage
 
 logging.root.setLevel(logging.DEBUG)
 
@@ -51,7 +53,16 @@ async def startup_event() -> None:
     timeout = ClientTimeout(total=290)
     client_session = ClientSession(timeout=timeout)
     core_lib.application_data._repositories = Repositories(
-        AsyncIOMotorClient(AppConfig.mongodb_url()), AppConfig.mongo_db(), client_session
+        AsyncIOMotorClient(AppConfig.mongodb_url()),
+        AppConfig.mongo_db(),
+        client_session,
+        NewsItemStorage(AppConfig.news_item_storage()),
     )
+    await repositories().reconcile_indexes()
     api.api_application_data._security = Security(user_repository=repositories().user_repository)
     await upsert_gemeente_groningen_feed()
+
+
+@app.on_event("shutdown")
+def shutdown_event() -> None:
+    shutdown_parse_executor()
@@ -1,13 +1,22 @@
+import hashlib
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Union
 
 from bson import ObjectId
 from fastapi import APIRouter, Header, HTTPException, Response
 from pydantic.main import BaseModel
-from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from starlette.responses import StreamingResponse
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_201_CREATED,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+)
 
 from api.api_application_data import security
 from api.api_utils import EmptyResult, ErrorMessage, ok_result
+from api.streaming import DocumentEncoder, DocumentStream, encode_json, json_array_stream
 from core_lib.application_data import repositories
 from core_lib.feed import (
     NetworkingException,
@@ -15,10 +24,17 @@ from core_lib.feed import (
     subscribe_user_to_feed,
     unsubscribe_user_from_feed,
 )
-from core_lib.repositories import Feed
+from core_lib.repositories import (
+    CataloguePageVersion,
+    Feed,
+    FeedCatalogueEntry,
+    FeedSourceType,
+    InvalidTokenException,
+)
 
 feed_router = APIRouter()
 logger = logging.getLogger(__name__)
+feed_encoder = DocumentEncoder(Feed)
 
 
 class FeedWithSubscriptionInformationResponse(BaseModel):
@@ -32,6 +48,48 @@ class FeedWithSubscriptionInformationResponse(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+class FeedCatalogueItem(BaseModel):
+    feed: FeedCatalogueEntry
+    user_is_subscribed: bool
+
+    class Config:
+        allow_population_by_field_name = True
+        arbitrary_types_allowed = True
+        by_alias = False
+        json_encoders = {ObjectId: str}
+
+
+class FeedCatalogueResponse(BaseModel):
+    feeds: List[FeedCatalogueItem]
+    token: Optional[str] = None
+
+    class Config:
+        allow_population_by_field_name = True
+        arbitrary_types_allowed = True
+        by_alias = False
+        json_encoders = {ObjectId: str}
+
+
+def catalogue_etag(version: CataloguePageVersion, subscribed_feed_ids: Set[ObjectId]) -> str:
+    """The ETag of a catalogue page: its feeds, whether the user is subscribed to them and when one last changed."""
+    updated_on = version.updated_on.isoformat() if version.updated_on is not None else ""
+    feeds = ",".join(f"{feed_id}:{int(feed_id in subscribed_feed_ids)}" for feed_id in version.feed_ids)
+    return f'"{hashlib.sha256(f"{feeds}|{updated_on}".encode("utf-8")).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If the If-None-Match header lists the etag, weak or not."""
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in (etag, "*"):
+            return True
+    return False
+
+
 @feed_router.post(
     "/feeds/for_url",
     tags=["feed"],
@@ -74,12 +132,22 @@ async def fetch_feed_information_for_url(
         ) from networking_exception
 
 
-@feed_router.get("/feeds", tags=["feed"])
+@feed_router.get("/feeds", tags=["feed"], response_model=None)
 async def get_all_feeds(
+    stream: bool = False,
     authorization: Optional[str] = Header(None),
-) -> List[FeedWithSubscriptionInformationResponse]:
+) -> Union[List[FeedWithSubscriptionInformationResponse], StreamingResponse]:
+    """All the feeds, with stream they are encoded from the cursor while the response is sent."""
     user = await security().get_approved_user(authorization)
-    subscribed_feed_ids = user.subscribed_to
+    subscribed_feed_ids = set(user.subscribed_to)
+    if stream:
+        documents = DocumentStream(
+            repositories().feed_repository.all_feeds_cursor(),
+            lambda feed: encode_json(
+                {"feed": feed_encoder.values(feed), "user_is_subscribed": feed["_id"] in subscribed_feed_ids}
+            ),
+        )
+        return StreamingResponse(json_array_stream(documents), media_type="application/json")
     feeds = await repositories().feed_repository.all_feeds()
     return [
         FeedWithSubscriptionInformationResponse(feed=feed, user_is_subscribed=feed.feed_id in subscribed_feed_ids)
@@ -87,6 +155,58 @@ async def get_all_feeds(
     ]
 
 
+@feed_router.get(
+    "/feeds/catalogue",
+    tags=["feed"],
+    response_model=FeedCatalogueResponse,
+    responses={HTTP_304_NOT_MODIFIED: {"description": "The page equals the one of the ETag in If-None-Match"}},
+)
+async def get_feed_catalogue(
+    category: Optional[str] = None,
+    source_type: Optional[FeedSourceType] = None,
+    subscribed_only: bool = False,
+    fetch_limit: int = 50,
+    fetch_token: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+) -> Response:
+    """
+    A page of the feed catalogue, optionally only the feeds of a category, of a source type or the ones the user is
+    subscribed to. The token of the response fetches the next page. The response has an ETag, a request with that
+    ETag in If-None-Match is answered with 304 Not Modified as long as the page is the same.
+    """
+    fetch_limit = max(1, min(fetch_limit, 200))
+    user = await security().get_approved_user(authorization)
+    subscribed_feed_ids = set(user.subscribed_to)
+    page_filter: Dict[str, Any] = {
+        "token": fetch_token,
+        "limit": fetch_limit,
+        "category": category,
+        "feed_source_type": source_type,
+        "feed_ids": user.subscribed_to if subscribed_only else None,
+    }
+    try:
+        # The ETag is derived from the version of the page, a page that is not modified is not read at all.
+        version = await repositories().feed_repository.fetch_catalogue_page_version(**page_filter)
+        etag = catalogue_etag(version, subscribed_feed_ids)
+        # no-cache makes the browser revalidate with the ETag, it gets a 304 as long as the page is the same.
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+        page = await repositories().feed_repository.fetch_catalogue_page(**page_filter)
+    except InvalidTokenException as invalid_token_exception:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid token") from invalid_token_exception
+
+    catalogue = FeedCatalogueResponse(
+        feeds=[
+            FeedCatalogueItem(feed=feed, user_is_subscribed=feed.feed_id in subscribed_feed_ids) for feed in page.items
+        ],
+        token=page.token,
+    )
+    body = catalogue.json(by_alias=True).encode("utf-8")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @feed_router.post("/feeds/{feed_id}/subscribe", tags=["feed"])
 async def subscribe_to_feed(feed_id: str, authorization: Optional[str] = Header(None)) -> EmptyResult:
     """
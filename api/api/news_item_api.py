@@ -1,18 +1,21 @@
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from bson import ObjectId
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException
 from pydantic.main import BaseModel
-from starlette.status import HTTP_200_OK
+from starlette.responses import StreamingResponse
+from starlette.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
 
 from api.api_application_data import security
 from api.api_utils import EmptyResult, ok_result
+from api.streaming import DocumentEncoder, DocumentStream, json_object_stream
 from core_lib.application_data import repositories
-from core_lib.repositories import NewsItem
+from core_lib.repositories import encode_token, InvalidTokenException, NewsItem, User
 
 news_router = APIRouter()
 log = logging.getLogger(__name__)
+news_item_encoder = DocumentEncoder(NewsItem)
 
 
 class NewsItemListResponse(BaseModel):
@@ -28,6 +31,7 @@ class NewsItemListResponse(BaseModel):
 
 class ReadNewsItemListResponse(BaseModel):
     news_items: List[NewsItem]
+    token: Optional[str] = None
 
     class Config:
         allow_population_by_field_name = True
@@ -42,13 +46,29 @@ class ReadNewsItemListResponse(BaseModel):
     response_model=NewsItemListResponse,
     responses={HTTP_200_OK: {"model": NewsItemListResponse, "description": "List is complete"}},
 )
-async def news_items(fetch_limit: int = 30, authorization: Optional[str] = Header(None)) -> NewsItemListResponse:
-    """Fetch the next set of news items."""
+async def news_items(
+    fetch_limit: int = 30, stream: bool = False, authorization: Optional[str] = Header(None)
+) -> Union[NewsItemListResponse, StreamingResponse]:
+    """
+    Fetch the next set of news items. With stream the news items are encoded from the cursor while the response is
+    sent, instead of building the whole list first.
+    """
     fetch_limit = min(fetch_limit, 80)
     user = await security().get_approved_user(authorization)
+    # The user may come from the user cache, the refresh of the feeds changes the counter without invalidating it.
+    number_of_unread_items = await repositories().user_repository.fetch_number_of_unread_items(user.user_id)
+    if stream:
+        documents = DocumentStream(
+            repositories().news_item_repository.items_cursor(user=user, limit=fetch_limit), news_item_encoder
+        )
+        return StreamingResponse(
+            json_object_stream("news_items", documents, lambda: {"number_of_unread_items": number_of_unread_items}),
+            media_type="application/json",
+        )
+
     result = await repositories().news_item_repository.fetch_items(user=user, limit=fetch_limit)
 
-    return NewsItemListResponse(news_items=result, number_of_unread_items=user.number_of_unread_items)
+    return NewsItemListResponse(news_items=result, number_of_unread_items=number_of_unread_items)
 
 
 @news_router.get(
@@ -58,17 +78,59 @@ async def news_items(fetch_limit: int = 30, authorization: Optional[str] = Heade
     responses={HTTP_200_OK: {"model": ReadNewsItemListResponse, "description": "List is complete"}},
 )
 async def read_news_items(
-    fetch_offset: int, fetch_limit: int = 30, authorization: Optional[str] = Header(None)
-) -> ReadNewsItemListResponse:
-    """Fetch the next set of news items."""
+    fetch_offset: int = 0,
+    fetch_limit: int = 30,
+    fetch_token: Optional[str] = None,
+    stream: bool = False,
+    authorization: Optional[str] = Header(None),
+) -> Union[ReadNewsItemListResponse, StreamingResponse]:
+    """
+    Fetch the next set of read news items. The token of the response fetches the page after it, fetch_offset is
+    only used without a token. With stream the news items are encoded from the cursor while the response is sent.
+    """
     fetch_limit = min(fetch_limit, 80)
     user = await security().get_approved_user(authorization)
-    result = await repositories().news_item_repository.fetch_read_items(
-        user=user, offset=fetch_offset, limit=fetch_limit
+    if stream:
+        return _stream_read_news_items(user, fetch_offset, fetch_limit, fetch_token)
+    if fetch_token is None and fetch_offset > 0:
+        result = await repositories().news_item_repository.fetch_read_items(
+            user=user, offset=fetch_offset, limit=fetch_limit
+        )
+        return ReadNewsItemListResponse(news_items=result)
+
+    try:
+        page = await repositories().news_item_repository.fetch_read_page(
+            user=user, token=fetch_token, limit=fetch_limit
+        )
+    except InvalidTokenException as invalid_token_exception:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid token") from invalid_token_exception
+    return ReadNewsItemListResponse(news_items=page.items, token=page.token)
+
+
+def _stream_read_news_items(user: User, offset: int, limit: int, token: Optional[str]) -> StreamingResponse:
+    repository = repositories().news_item_repository
+    if token is None and offset > 0:
+        cursor = repository.read_items_cursor(user=user, offset=offset, limit=limit)
+        documents = DocumentStream(cursor, news_item_encoder)
+        return StreamingResponse(
+            json_object_stream("news_items", documents, lambda: {"token": None}), media_type="application/json"
+        )
+
+    try:
+        cursor = repository.read_page_cursor(user=user, token=token, limit=limit)
+    except InvalidTokenException as invalid_token_exception:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid token") from invalid_token_exception
+    documents = DocumentStream(cursor, news_item_encoder)
+
+    def next_token() -> Optional[str]:
+        if documents.number_of_documents < limit or documents.last_document is None:
+            return None
+        return encode_token(documents.last_document["published"], documents.last_document["_id"])
+
+    return StreamingResponse(
+        json_object_stream("news_items", documents, lambda: {"token": next_token()}), media_type="application/json"
     )
 
-    return ReadNewsItemListResponse(news_items=result)
-
 
 class MarkAsReadRequest(BaseModel):
     news_item_ids: List[str]
@@ -79,9 +141,8 @@ async def mark_as_read(
     mark_as_read_request: MarkAsReadRequest, authorization: Optional[str] = Header("")
 ) -> EmptyResult:
     user = await security().get_approved_user(authorization)
-    await repositories().news_item_repository.mark_items_as_read(
+    number_of_read_items = await repositories().news_item_repository.mark_items_as_read(
         user=user, news_item_ids=mark_as_read_request.news_item_ids
     )
-    user.number_of_unread_items = max(0, user.number_of_unread_items - len(mark_as_read_request.news_item_ids))
-    await repositories().user_repository.upsert(user)
+    await repositories().user_repository.add_new_items_count(user.user_id, -number_of_read_items)
     return ok_result()
@@ -1,15 +1,16 @@
 from typing import List, Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException
 from pydantic.main import BaseModel
-from starlette.status import HTTP_200_OK
+from starlette.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
 
 from api.api_application_data import security
-from core_lib.repositories import SavedNewsItem
+from core_lib.repositories import InvalidTokenException, SavedNewsItem
 from core_lib.saved_news_items import (
     delete_saved_news_item_with_id,
     fetch_saved_news_item_for_user,
+    fetch_saved_news_item_page_for_user,
     save_news_item_from_news_item,
 )
 
@@ -36,6 +37,7 @@ class SaveNewsItemResponse(BaseModel):
 
 class ScrollableResult(BaseModel):
     items: List
+    token: Optional[str] = None
 
     class Config:
         allow_population_by_field_name = True
@@ -53,14 +55,24 @@ class ScrollableResult(BaseModel):
     },
 )
 async def get_saved_news_items(
-    fetch_offset: int, fetch_limit: int, authorization: Optional[str] = Header(None)
+    fetch_offset: int = 0,
+    fetch_limit: int = 30,
+    fetch_token: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
 ) -> ScrollableResult:
+    """The token of the response fetches the page after it, fetch_offset is only used without a token."""
     user = await security().get_approved_user(authorization)
     limit = min(fetch_limit, 30)
 
-    result = await fetch_saved_news_item_for_user(user=user, offset=fetch_offset, limit=limit)
+    if fetch_token is None and fetch_offset > 0:
+        result = await fetch_saved_news_item_for_user(user=user, offset=fetch_offset, limit=limit)
+        return ScrollableResult(items=result)
 
-    return ScrollableResult(items=result)
+    try:
+        page = await fetch_saved_news_item_page_for_user(user=user, token=fetch_token, limit=limit)
+    except InvalidTokenException as invalid_token_exception:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid token") from invalid_token_exception
+    return ScrollableResult(items=page.items, token=page.token)
 
 
 @saved_news_router.post(
@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
 import logging
-from typing import Dict, Optional
+import time
+from typing import Any, Dict, Optional
 
 from fastapi import HTTPException
 import jwt
@@ -13,11 +16,49 @@ from core_lib.repositories import User, UserRepository
 log = logging.getLogger(__file__)
 
 
+class VerifiedTokenCache:
+    """
+    LRU of the claims of tokens that were verified before, by the digest of the token. Claims are only returned until
+    the exp of the token.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._claims: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = self._digest(token)
+        claims = self._claims.get(digest)
+        if claims is None:
+            return None
+        if claims["exp"] <= time.time():
+            del self._claims[digest]
+            return None
+        self._claims.move_to_end(digest)
+        return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if "exp" not in claims:
+            return
+        self._claims[self._digest(token)] = claims
+        if len(self._claims) > self.maxsize:
+            self._claims.popitem(last=False)
+
+    def clear(self) -> None:
+        self._claims.clear()
+
+
 class TokenVerifier:
+    verified_tokens = VerifiedTokenCache(maxsize=1024)
+
     @staticmethod
     async def verify(bearer_token: Optional[str]) -> Dict[str, str]:
         """
-        Verifies the bearer token.
+        Verifies the bearer token. Tokens that were verified before are not decoded again until they expire.
 
         :param bearer_token: The content of the authorization header.
         :return: A User object constructed from the token with is_approved set to False.
@@ -33,8 +74,13 @@ class TokenVerifier:
         if not bearer_token.startswith("Bearer"):
             raise HTTPException(status_code=401, detail="Unauthorized")
         token = bearer_token[7:]
+        claims = TokenVerifier.verified_tokens.get(token)
+        if claims is not None:
+            return dict(claims)
         try:
-            return jwt.decode(jwt=token, key=core_lib.app_config.AppConfig.token_secret_key(), algorithms=["HS256"])
+            claims = jwt.decode(jwt=token, key=core_lib.app_config.AppConfig.token_secret_key(), algorithms=["HS256"])
+            TokenVerifier.verified_tokens.put(token, claims)
+            return dict(claims)
         except ValueError as value_error:
             raise HTTPException(status_code=401, detail="Unauthorized") from value_error
         except PyJWTError as jwt_error:
@@ -60,13 +106,17 @@ class Security:
 
     async def get_approved_user(self, authorization_header: Optional[str], check_totp: bool = True) -> User:
         """
-        Does the token verification and retrieves the user object from the repository. If the user is not approved a
-        403 FORBIDDEN is returned.
+        Does the token verification and retrieves the user object from the repository, or from the user cache of the
+        repository for a token that was seen in the last seconds. If the user is not approved a 403 FORBIDDEN is
+        returned.
         """
         user_from_token = await TokenVerifier.verify(authorization_header)
-        user_from_repo = await self.user_repository.fetch_user_by_email(user_from_token["name"])
+        user_from_repo = self.user_repository.user_cache.get(user_from_token["user_id"], str(authorization_header))
         if user_from_repo is None:
-            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+            user_from_repo = await self.user_repository.fetch_user_by_email(user_from_token["name"])
+            if user_from_repo is None:
+                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+            self.user_repository.user_cache.put(user_from_token["user_id"], str(authorization_header), user_from_repo)
         if check_totp and user_from_repo.otp_hash is not None and not user_from_token["otp_verified"]:
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
         if not user_from_repo.is_approved:
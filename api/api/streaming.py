@@ -0,0 +1,82 @@
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+from bson import ObjectId
+import orjson
+from pydantic.main import BaseModel
+
+_required = object()
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type {type(value)} is not JSON serializable")
+
+
+def encode_json(value: Any) -> bytes:
+    return orjson.dumps(value, default=_encode_default)
+
+
+class DocumentEncoder:
+    """
+    The values of a Mongo document as FastAPI would encode its model: the fields of the model by alias, in the order of
+    the model, with the defaults of the fields the document does not have.
+    """
+
+    def __init__(self, model_class: Type[BaseModel]) -> None:
+        self._fields: List[Tuple[str, Any]] = [
+            (field.alias, _required if field.required else field.get_default())
+            for field in model_class.__fields__.values()
+        ]
+
+    def values(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        values = {}
+        for alias, default in self._fields:
+            if alias in document:
+                values[alias] = document[alias]
+            elif default is not _required:
+                values[alias] = default
+        return values
+
+    def __call__(self, document: Dict[str, Any]) -> bytes:
+        return encode_json(self.values(document))
+
+
+class DocumentStream:
+    """
+    Encodes the documents of a cursor one at a time, while the response is sent. Counts the documents and keeps the
+    last one, for the fields that follow the documents in the response.
+    """
+
+    def __init__(self, cursor: Any, encode: Callable[[Dict[str, Any]], bytes]) -> None:
+        self.cursor = cursor
+        self.encode = encode
+        self.number_of_documents = 0
+        self.last_document: Optional[Dict[str, Any]] = None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for document in self.cursor:
+            self.number_of_documents += 1
+            self.last_document = document
+            yield self.encode(document)
+
+
+async def json_array_stream(items: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    yield b"["
+    separator = b""
+    async for item in items:
+        yield separator + item
+        separator = b","
+    yield b"]"
+
+
+async def json_object_stream(
+    array_name: str, items: AsyncIterable[bytes], trailing_fields: Callable[[], Dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    """A JSON object with the items in the array array_name, followed by trailing_fields, evaluated after the items."""
+    yield b"{" + encode_json(array_name) + b":"
+    async for chunk in json_array_stream(items):
+        yield chunk
+    for name, value in trailing_fields().items():
+        yield b"," + encode_json(name) + b":" + encode_json(value)
+    yield b"}"
@@ -1,5 +1,5 @@
 from enum import Enum
-from os import getenv
+from os import cpu_count, getenv
 from typing import Optional
 from urllib.parse import quote_plus
 
@@ -53,3 +53,39 @@ class AppConfig:
     @staticmethod
     def mongo_db() -> str:
         return AppConfig._required_env("MONGO_DB")
+
+    @staticmethod
+    def refresh_max_concurrency() -> int:
+        return int(getenv("REFRESH_MAX_CONCURRENCY", "10"))
+
+    @staticmethod
+    def refresh_max_concurrency_per_host() -> int:
+        return int(getenv("REFRESH_MAX_CONCURRENCY_PER_HOST", "2"))
+
+    @staticmethod
+    def news_item_storage() -> str:
+        return getenv("NEWS_ITEM_STORAGE", "document")
+
+    @staticmethod
+    def user_cache_ttl_seconds() -> float:
+        return float(getenv("USER_CACHE_TTL_SECONDS", "10"))
+
+    @staticmethod
+    def user_cache_max_entries() -> int:
+        return int(getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+
+    @staticmethod
+    def feed_max_items() -> int:
+        return int(getenv("FEED_MAX_ITEMS", "1000"))
+
+    @staticmethod
+    def feed_max_bytes() -> int:
+        return int(getenv("FEED_MAX_BYTES", str(16 * 1024 * 1024)))
+
+    @staticmethod
+    def parse_executor() -> str:
+        return getenv("PARSE_EXECUTOR", "inline")
+
+    @staticmethod
+    def parse_executor_workers() -> int:
+        return int(getenv("PARSE_EXECUTOR_WORKERS", str(cpu_count() or 1)))
@@ -1,14 +1,19 @@
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 
 from aiohttp import ClientSession
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
 
+from core_lib.app_config import AppConfig
+from core_lib.indexes import IndexReconciliation, reconcile_indexes
 from core_lib.repositories import (
     FeedItemRepository,
     FeedRepository,
     NewsItemRepository,
+    NewsItemStorage,
     SavedNewsItemRepository,
+    UserCache,
     UserRepository,
 )
 
@@ -17,17 +22,38 @@ log = logging.getLogger(__file__)
 
 
 class Repositories:
-    def __init__(self, client: AsyncIOMotorClient, mongodb_db: str, client_session: ClientSession) -> None:
+    def __init__(
+        self,
+        client: AsyncIOMotorClient,
+        mongodb_db: str,
+        client_session: ClientSession,
+        news_item_storage: NewsItemStorage = NewsItemStorage.DOCUMENT,
+    ) -> None:
         log.info("Initializing repositories.")
         self.mongo_client = client
         self.database = self.mongo_client.get_database(mongodb_db)
-        self.user_repository = UserRepository(self.database)
-        self.news_item_repository = NewsItemRepository(self.database)
+        self.user_repository = UserRepository(
+            self.database, UserCache(AppConfig.user_cache_ttl_seconds(), AppConfig.user_cache_max_entries())
+        )
+        self.news_item_repository = NewsItemRepository(self.database, news_item_storage)
         self.saved_news_item_repository = SavedNewsItemRepository(self.database)
         self.feed_item_repository = FeedItemRepository(self.database)
         self.feed_repository = FeedRepository(self.database)
         self.client_session = client_session
 
+    def declared_indexes(self) -> Dict[str, List[IndexModel]]:
+        """The indexes per collection the repositories need for their queries."""
+        return {
+            self.user_repository.users_collection.name: self.user_repository.indexes,
+            self.news_item_repository.news_item_collection.name: self.news_item_repository.indexes,
+            self.saved_news_item_repository.saved_items_collection.name: self.saved_news_item_repository.indexes,
+            self.feed_item_repository.feed_items_collection.name: self.feed_item_repository.indexes,
+            self.feed_repository.feeds_collection.name: self.feed_repository.indexes,
+        }
+
+    async def reconcile_indexes(self, drop_undeclared: bool = False) -> List[IndexReconciliation]:
+        return await reconcile_indexes(self.database, self.declared_indexes(), drop_undeclared)
+
 
 _repositories: Optional[Repositories] = None
 
@@ -4,22 +4,23 @@ from typing import List, Optional
 
 import aiohttp
 from aiohttp import ClientSession
-import dateparser
-from lxml.etree import ElementBase, fromstring
-import pytz
+from lxml.etree import ElementBase
 
 from core_lib.application_data import repositories
-from core_lib.feed_utils import UpdateResult, upsert_new_items_for_feed
+from core_lib.date_parsing import parse_optional_datetime
+from core_lib.feed_utils import (
+    UpdateResult,
+    mark_feed_as_not_modified,
+    parse_feed_document,
+    upsert_new_items_for_feed,
+)
+from core_lib.incremental_parser import FeedFormat
 from core_lib.repositories import Feed, FeedItem, FeedSourceType
 from core_lib.utils import now_in_utc
 
 log = logging.getLogger(__file__)
 
 
-def is_atom_file(text: bytes) -> bool:
-    return b"http://www.w3.org/2005/Atom" in text
-
-
 def atom_document_to_feed(atom_url: str, tree: ElementBase) -> Feed:
     title = tree.findtext("{http://www.w3.org/2005/Atom}title")
 
@@ -37,13 +38,10 @@ def atom_document_to_feed(atom_url: str, tree: ElementBase) -> Feed:
     )
 
 
-def _parse_optional_datetime(freely_formatted_datetime: Optional[str]) -> Optional[datetime]:
-    if freely_formatted_datetime is None:
-        return None
-    in_this_tz = dateparser.parse(freely_formatted_datetime, languages=["en"])
-    if in_this_tz is None:
-        return None
-    return in_this_tz.astimezone(tz=pytz.UTC)
+def _parse_optional_datetime(
+    freely_formatted_datetime: Optional[str], feed_key: Optional[str] = None
+) -> Optional[datetime]:
+    return parse_optional_datetime(freely_formatted_datetime, feed_key)
 
 
 def _parse_optional_link_for_href(element: Optional[ElementBase]) -> Optional[str]:
@@ -52,34 +50,36 @@ def _parse_optional_link_for_href(element: Optional[ElementBase]) -> Optional[st
     return element.get("href")
 
 
+def atom_entry_to_feed_item(feed: Feed, item_element: ElementBase) -> FeedItem:
+    return FeedItem(
+        feed_id=feed.feed_id,
+        title=item_element.findtext("{http://www.w3.org/2005/Atom}title"),
+        link=_parse_optional_link_for_href(item_element.find("{http://www.w3.org/2005/Atom}link")),
+        description=item_element.findtext("{http://www.w3.org/2005/Atom}content") or "",
+        last_seen=now_in_utc(),
+        published=_parse_optional_datetime(item_element.findtext("{http://www.w3.org/2005/Atom}published"), feed.url),
+        created_on=now_in_utc(),
+    )
+
+
 def atom_document_to_feed_items(feed: Feed, tree: ElementBase) -> List[FeedItem]:
     item_elements = tree.findall("{http://www.w3.org/2005/Atom}entry")
-    return [
-        FeedItem(
-            feed_id=feed.feed_id,
-            title=item_element.findtext("{http://www.w3.org/2005/Atom}title"),
-            link=_parse_optional_link_for_href(item_element.find("{http://www.w3.org/2005/Atom}link")),
-            description=item_element.findtext("{http://www.w3.org/2005/Atom}content") or "",
-            last_seen=now_in_utc(),
-            published=_parse_optional_datetime(item_element.findtext("{http://www.w3.org/2005/Atom}published")),
-            created_on=now_in_utc(),
-        )
-        for item_element in item_elements
-    ]
+    return [atom_entry_to_feed_item(feed, item_element) for item_element in item_elements]
+
+
+atom_format = FeedFormat("{http://www.w3.org/2005/Atom}entry", atom_entry_to_feed_item, atom_document_to_feed)
 
 
 async def refresh_atom_feed(session: ClientSession, feed: Feed) -> UpdateResult:
     log.info("Refreshing feed %s", feed)
     try:
-        async with session.get(feed.url) as xml_response:
-            atom_document = fromstring(await xml_response.read())
-            feed_from_rss = atom_document_to_feed(feed.url, atom_document)
-            feed_items_from_rss = atom_document_to_feed_items(feed, atom_document)
-
-            async with await repositories().mongo_client.start_session() as mongo_session:
-                async with mongo_session.start_transaction():
-                    update_result = await upsert_new_items_for_feed(feed, feed_from_rss, feed_items_from_rss)
-            return update_result
+        parsed_feed = await parse_feed_document(session, feed, atom_format)
+        if parsed_feed is None:
+            return await mark_feed_as_not_modified(feed)
+        async with await repositories().mongo_client.start_session() as mongo_session:
+            async with mongo_session.start_transaction():
+                update_result = await upsert_new_items_for_feed(feed, parsed_feed.feed, parsed_feed.feed_items)
+        return update_result
     except (aiohttp.ClientError, TimeoutError):
         log.exception("Error while refreshing feed %s", feed)
         return UpdateResult()
@@ -0,0 +1,123 @@
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Hashable, Optional
+
+import dateparser
+import pytz
+
+from core_lib import metrics
+
+DateParser = Callable[[str], datetime]
+
+
+_rfc_822_zone_names = {"GMT", "UT", "UTC", "Z"}
+
+
+def _parse_rfc_822(text: str) -> datetime:
+    """
+    Sun, 19 May 2002 15:21:36 GMT, the dates of rss. parsedate_to_datetime takes zone names such as CET and CEST as
+    UTC, only numeric offsets and the names of UTC are parsed here.
+    """
+    zone = text.rsplit(" ", 1)[-1]
+    if zone.isalpha() and zone.upper() not in _rfc_822_zone_names:
+        raise ValueError(f"Zone {zone} is not parsed as rfc 822")
+    return parsedate_to_datetime(text)
+
+
+def _parse_iso_8601(text: str) -> datetime:
+    """2020-09-24T16:10:40Z, the dates of atom and rdf. fromisoformat does not know the Z before python 3.11."""
+    if text.endswith(("Z", "z")):
+        text = f"{text[:-1]}+00:00"
+    return datetime.fromisoformat(text)
+
+
+def _strptime_parser(date_format: str) -> DateParser:
+    return lambda text: datetime.strptime(text, date_format)
+
+
+# Only numeric formats, strptime parses month and day names in the locale of the process. Formats that dateparser
+# reads in another order, such as day first, are left to dateparser.
+_strptime_formats = [
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S %z",
+    "%Y/%m/%d %H:%M:%S",
+]
+
+fast_parsers: Dict[str, DateParser] = {
+    "rfc822": _parse_rfc_822,
+    "iso8601": _parse_iso_8601,
+    **{date_format: _strptime_parser(date_format) for date_format in _strptime_formats},
+}
+
+
+def _try_parse(parser: DateParser, text: str) -> Optional[datetime]:
+    try:
+        return parser(text)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class DateParsing:
+    """
+    Parses the freely formatted dates of feeds. The strict parsers in fast_parsers are tried first, dateparser is
+    only used when none of them parses the date. The fast parser that parsed the previous date of a feed is tried
+    first for the next date of that feed. The counters date_parsing_learned_format, date_parsing_fast_path and
+    date_parsing_slow_path in metrics show how often each is used.
+    """
+
+    def __init__(self, max_learned_formats: int = 4096) -> None:
+        self.max_learned_formats = max_learned_formats
+        self._learned_formats: Dict[Hashable, str] = {}
+
+    def _learn(self, feed_key: Optional[Hashable], parser_name: str) -> None:
+        if feed_key is None:
+            return
+        if feed_key not in self._learned_formats and len(self._learned_formats) >= self.max_learned_formats:
+            self._learned_formats.clear()
+        self._learned_formats[feed_key] = parser_name
+
+    def learned_format(self, feed_key: Hashable) -> Optional[str]:
+        return self._learned_formats.get(feed_key)
+
+    def parse(self, text: str, feed_key: Optional[Hashable] = None) -> Optional[datetime]:
+        """The date in text, as it is stated: naive if the text has no timezone. None if no parser understands it."""
+        text = text.strip()
+        learned_format = self._learned_formats.get(feed_key) if feed_key is not None else None
+        if learned_format is not None:
+            moment = _try_parse(fast_parsers[learned_format], text)
+            if moment is not None:
+                metrics.increment("date_parsing_learned_format")
+                return moment
+
+        for parser_name, parser in fast_parsers.items():
+            if parser_name == learned_format:
+                continue
+            moment = _try_parse(parser, text)
+            if moment is not None:
+                metrics.increment("date_parsing_fast_path")
+                self._learn(feed_key, parser_name)
+                return moment
+
+        metrics.increment("date_parsing_slow_path")
+        return dateparser.parse(text, languages=["en"])
+
+
+_date_parsing = DateParsing()
+
+
+def date_parsing() -> DateParsing:
+    """The date parsing shared by all the feed refreshes in this process."""
+    return _date_parsing
+
+
+def parse_optional_datetime(
+    freely_formatted_datetime: Optional[str], feed_key: Optional[Hashable] = None
+) -> Optional[datetime]:
+    """The date in utc, a date without timezone is taken as local time. See DateParsing."""
+    if freely_formatted_datetime is None:
+        return None
+    in_this_tz = date_parsing().parse(freely_formatted_datetime, feed_key)
+    if in_this_tz is None:
+        return None
+    return in_this_tz.astimezone(tz=pytz.UTC)
@@ -1,24 +1,24 @@
-import asyncio
 from datetime import datetime, timedelta
 import logging
-from typing import List, Optional
+from typing import Optional
 
 from aiohttp import ClientConnectorError, ClientSession
-from lxml.etree import fromstring
 
+from core_lib import metrics
+from core_lib.app_config import AppConfig
 from core_lib.application_data import repositories
-from core_lib.atom_feed import atom_document_to_feed, atom_document_to_feed_items, is_atom_file, refresh_atom_feed
-from core_lib.feed_utils import UpdateResult, news_items_from_feed_items, upsert_new_feed_items_for_feed
-from core_lib.html_feed import refresh_html_feed
-from core_lib.rdf_feed import is_rdf_document, rdf_document_to_feed, rdf_document_to_feed_items, refresh_rdf_feed
-from core_lib.repositories import Feed, FeedItem, FeedSourceType, User
-from core_lib.rss_feed import (
-    is_html_with_rss_ref,
-    is_rss_document,
-    refresh_rss_feed,
-    rss_document_to_feed,
-    rss_document_to_feed_items,
+from core_lib.feed_parsers import FeedParser, HtmlPage, feed_parsers
+from core_lib.feed_utils import (
+    UpdateResult,
+    news_items_from_feed_items,
+    refresh_title_index,
+    upsert_new_feed_items_for_feed,
 )
+from core_lib.parse_executor import parse_executor
+from core_lib.refresh_scheduler import RefreshScheduler
+from core_lib.repositories import Feed, User
+from core_lib.rss_feed import rss_ref_of_html_page
+from core_lib.subscriptions import subscription_cache
 
 log = logging.getLogger(__file__)
 
@@ -42,31 +42,22 @@ async def fetch_feed_information_for(
     :return: A feed object or None if no feed found.
     """
     try:
-        feed: Optional[Feed] = None
-        feed_items: List[FeedItem] = []
         async with session.get(url, headers={"accept-encoding": "gzip"}) as response:
             text = await response.read()
-            rss_ref = is_html_with_rss_ref(text)
-            if rss_ref is not None:
-                async with session.get(rss_ref) as xml_response:
-                    text = await xml_response.read()
-
-            if is_rss_document(text):
-                rss_document = fromstring(text)
-                feed = rss_document_to_feed(rss_ref if rss_ref is not None else url, rss_document)
-                feed_items = rss_document_to_feed_items(feed, rss_document)
-            elif is_rdf_document(text):
-                rdf_document = fromstring(text)
-                feed = rdf_document_to_feed(url, rdf_document)
-                feed_items = rdf_document_to_feed_items(feed, rdf_document)
-            elif is_atom_file(text):
-                atom_document = fromstring(text)
-                feed = atom_document_to_feed(url, atom_document)
-                feed_items = atom_document_to_feed_items(feed, atom_document)
-        if feed is not None:
-            feed.number_of_items = await upsert_new_feed_items_for_feed(feed, feed_items)
-            feed = await repositories().feed_repository.upsert(feed)
-        return feed
+            sniffed = feed_parsers().sniff(text)
+            if isinstance(sniffed, HtmlPage):
+                rss_ref = await parse_executor().run(rss_ref_of_html_page, text)
+                if rss_ref is not None:
+                    async with session.get(rss_ref) as xml_response:
+                        text = await xml_response.read()
+                    url = rss_ref
+                    sniffed = feed_parsers().sniff(text)
+
+        if not isinstance(sniffed, FeedParser) or sniffed.feed_format is None:
+            return None
+        feed, feed_items = await parse_executor().run(sniffed.feed_format.parse_whole_document, url, text)
+        feed.number_of_items = await upsert_new_feed_items_for_feed(feed, feed_items)
+        return await repositories().feed_repository.upsert(feed)
     except ClientConnectorError as cce:
         raise NetworkingException(f"Url {url} not reachable. Details: {cce.__str__()}") from cce
 
@@ -75,76 +66,84 @@ async def subscribe_user_to_feed(
     user: User,
     feed: Feed,
 ) -> User:
-
+    """Subscribes the user to the feed, nothing is done if the user is subscribed already."""
     async with await repositories().mongo_client.start_session() as session:
         async with session.start_transaction():
-            feed.number_of_subscriptions = feed.number_of_subscriptions + 1
             feed_items = await repositories().feed_item_repository.fetch_all_for_feed(feed)
             news_items = news_items_from_feed_items(feed_items, feed, user)
 
-            user = await repositories().user_repository.add_new_items_count(user.user_id, len(news_items))
-            user.subscribed_to.append(feed.feed_id)
-
-            await repositories().user_repository.upsert(user)
-            await repositories().feed_repository.upsert(feed)
+            subscribed_user = await repositories().user_repository.add_subscription(
+                user.user_id, feed.feed_id, len(news_items)
+            )
+            if subscribed_user is None:
+                return user
+            await repositories().feed_repository.add_subscriptions(feed.feed_id, 1)
             await repositories().news_item_repository.upsert_many(news_items)
-    return user
+    subscription_cache().invalidate(feed.feed_id)
+    return subscribed_user
 
 
 async def unsubscribe_user_from_feed(user: User, feed: Feed) -> User:
     async with await repositories().mongo_client.start_session() as session:
         async with session.start_transaction():
-            if feed.feed_id in user.subscribed_to:
-                user.subscribed_to.remove(feed.feed_id)
-
-                news_items_deleted = await repositories().news_item_repository.delete_user_feed(user=user, feed=feed)
-                feed.number_of_subscriptions = max(0, feed.number_of_subscriptions - 1)
-                user.number_of_unread_items = max(0, user.number_of_unread_items - news_items_deleted)
-
-                await repositories().feed_repository.upsert(feed)
-                await repositories().user_repository.upsert(user)
+            if await repositories().user_repository.remove_subscription(user.user_id, feed.feed_id):
+                unread_news_items = await repositories().news_item_repository.count(
+                    {"user_id": user.user_id, "feed_id": feed.feed_id, "is_read": False}
+                )
+                await repositories().news_item_repository.delete_user_feed(user=user, feed=feed)
+                await repositories().feed_repository.add_subscriptions(feed.feed_id, -1)
+                user = await repositories().user_repository.add_new_items_count(user.user_id, -unread_news_items)
+    subscription_cache().invalidate(feed.feed_id)
     return user
 
 
 async def delete_read_items() -> int:
-    items_deleted_count = 0
-    # delete feed_items, but keep at least 20 per feed.
-    all_feeds = await repositories().feed_repository.all_feeds()
+    # delete read news_items older than 3 days.
+    items_deleted_count = await repositories().news_item_repository.delete_read_items_older_than(
+        datetime.utcnow() - timedelta(days=3)
+    )
+
+    # delete feed_items, but keep at least 20 per feed and the ones news items still refer to.
+    keep_referenced = repositories().news_item_repository.refers_to_feed_items
+    all_feeds = await repositories().feed_repository.all_feed_item_counts()
     for feed in all_feeds:
         if feed.number_of_items > 20:
             items_deleted_count += await repositories().feed_item_repository.delete_older_than(
-                datetime.utcnow() - timedelta(days=3)
+                feed, datetime.utcnow() - timedelta(days=3), keep_referenced=keep_referenced
             )
         feed.number_of_items = await repositories().feed_item_repository.count_all_for_feed(feed)
-    await repositories().feed_repository.upsert_many(all_feeds)
-
-    # delete read news_items older than 3 days.
-    items_deleted_count += await repositories().news_item_repository.delete_read_items_older_than(
-        datetime.utcnow() - timedelta(days=3)
-    )
+    await repositories().feed_repository.update_changed_many(all_feeds)
     return items_deleted_count
 
 
-async def refresh_all_feeds() -> int:
-    """Refreshes all active feeds and returns the number of refreshed feeds."""
+async def refresh_feed(session: ClientSession, feed: Feed) -> UpdateResult:
+    """Refresh the feed with the parser registered for its source type."""
+    return await feed_parsers().for_source_type(feed.feed_source_type).refresh(session, feed)
+
+
+async def refresh_all_feeds(force: bool = False) -> int:
+    """
+    Refreshes the active feeds that are due and returns the number of refreshed feeds.
+
+    :param force: Refresh all active feeds, also the ones that are not due yet.
+    """
     client_session = repositories().client_session
-    feeds = await repositories().feed_repository.get_active_feeds()
-    tasks = [refresh_rss_feed(client_session, feed) for feed in feeds if feed.feed_source_type == FeedSourceType.RSS]
-    tasks.extend(
-        [refresh_atom_feed(client_session, feed) for feed in feeds if feed.feed_source_type == FeedSourceType.ATOM]
-    )
-    tasks.extend(
-        [refresh_rdf_feed(client_session, feed) for feed in feeds if feed.feed_source_type == FeedSourceType.RDF]
-    )
-    tasks.extend(
-        [
-            refresh_html_feed(client_session, feed)
-            for feed in feeds
-            if feed.feed_source_type == FeedSourceType.GEMEENTE_GRONINGEN
-        ]
+    if force:
+        feeds = await repositories().feed_repository.get_active_feeds()
+    else:
+        feeds = await repositories().feed_repository.get_due_feeds(datetime.utcnow())
+
+    await refresh_title_index()
+    await subscription_cache().prefetch(feeds)
+    scheduler = RefreshScheduler(
+        refresh=lambda feed: refresh_feed(client_session, feed),
+        max_concurrent=AppConfig.refresh_max_concurrency(),
+        max_concurrent_per_host=AppConfig.refresh_max_concurrency_per_host(),
     )
-
-    results = await asyncio.gather(*tasks)
+    try:
+        results = await scheduler.run(feeds)
+    finally:
+        subscription_cache().invalidate()
 
     # Aggregate results
     update_results = UpdateResult()
@@ -156,5 +155,8 @@ async def refresh_all_feeds() -> int:
     for user_id, new_items_count in update_results.user_to_number_new_items_map.items():
         await repositories().user_repository.add_new_items_count(user_id, new_items_count)
 
+    slowest = sorted(scheduler.timings, key=lambda timing: timing.seconds_refreshing, reverse=True)[:5]
+    log.info("Slowest feeds %s", ", ".join(f"{timing.url} ({timing.seconds_refreshing:.3f}s)" for timing in slowest))
     log.info("New items %s", str(update_results))
-    return len(tasks)
+    log.info("Refresh metrics %s", metrics.counters())
+    return len(feeds)
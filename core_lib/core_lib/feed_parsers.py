@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from aiohttp import ClientSession
+
+from core_lib.atom_feed import atom_format, refresh_atom_feed
+from core_lib.feed_utils import UpdateResult
+from core_lib.html_feed import refresh_html_feed
+from core_lib.incremental_parser import FeedFormat
+from core_lib.rdf_feed import rdf_format, refresh_rdf_feed
+from core_lib.repositories import Feed, FeedSourceType
+from core_lib.rss_feed import refresh_rss_feed, rss_format
+
+
+@dataclass(frozen=True)
+class FeedParser:
+    """
+    How feeds of a source type are refreshed. A feed document format has a signature, the bytes that identify a
+    document of the format near its start, and the FeedFormat to parse it with. Scraped sources have neither.
+    """
+
+    source_type: FeedSourceType
+    refresh: Callable[[ClientSession, Feed], Awaitable[UpdateResult]]
+    feed_format: Optional[FeedFormat] = None
+    signature: Optional[bytes] = None
+
+
+class HtmlPage:  # pylint: disable=too-few-public-methods
+    """A sniffed html page, it may refer to its feed with a link."""
+
+
+HTML_PAGE = HtmlPage()
+HTML_PAGE_SIGNATURES = [b"<!DOCTYPE html>", b"<html"]
+
+
+class FeedParserRegistry:
+    """
+    The feed parsers by source type. The sniffer looks for the signatures of all the registered formats and of html
+    pages at once, in the first sniff_size bytes of a document. The signature found first in the document decides.
+    """
+
+    def __init__(self, sniff_size: int = 16 * 1024) -> None:
+        self.sniff_size = sniff_size
+        self._by_source_type: Dict[FeedSourceType, FeedParser] = {}
+        self._sniffed: List[Union[FeedParser, HtmlPage]] = []
+        self._signatures: Optional["re.Pattern[bytes]"] = None
+
+    def register(self, feed_parser: FeedParser) -> None:
+        self._by_source_type[feed_parser.source_type] = feed_parser
+        self._signatures = None
+
+    def for_source_type(self, source_type: FeedSourceType) -> FeedParser:
+        feed_parser = self._by_source_type.get(source_type)
+        if feed_parser is None:
+            raise Exception(f"No parser registered for feed source type {source_type}")
+        return feed_parser
+
+    def _compile_signatures(self) -> "re.Pattern[bytes]":
+        signatures = [(HTML_PAGE, signature) for signature in HTML_PAGE_SIGNATURES] + [
+            (feed_parser, feed_parser.signature)
+            for feed_parser in self._by_source_type.values()
+            if feed_parser.signature is not None
+        ]
+        self._sniffed = [sniffed for sniffed, _ in signatures]
+        return re.compile(b"|".join(b"(" + re.escape(signature) + b")" for _, signature in signatures))
+
+    def sniff(self, document: bytes) -> Optional[Union[FeedParser, HtmlPage]]:
+        """The parser for the document, HTML_PAGE for an html page or None if the document is not recognized."""
+        if self._signatures is None:
+            self._signatures = self._compile_signatures()
+        match = self._signatures.search(document, 0, self.sniff_size)
+        if match is None:
+            return None
+        return self._sniffed[match.lastindex - 1] if match.lastindex is not None else None
+
+
+_feed_parsers = FeedParserRegistry()
+_feed_parsers.register(FeedParser(FeedSourceType.RSS, refresh_rss_feed, rss_format, b"<rss"))
+_feed_parsers.register(FeedParser(FeedSourceType.RDF, refresh_rdf_feed, rdf_format, b"<rdf:RDF xmlns:rdf="))
+_feed_parsers.register(FeedParser(FeedSourceType.ATOM, refresh_atom_feed, atom_format, b"http://www.w3.org/2005/Atom"))
+_feed_parsers.register(FeedParser(FeedSourceType.GEMEENTE_GRONINGEN, refresh_html_feed))
+
+
+def feed_parsers() -> FeedParserRegistry:
+    return _feed_parsers
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core_lib.repositories import Feed
+from core_lib.utils import as_naive_utc
+
+MINIMUM_REFRESH_INTERVAL = timedelta(minutes=5)
+MAXIMUM_REFRESH_INTERVAL = timedelta(hours=24)
+
+
+def latest_published(current: Optional[datetime], published: Optional[datetime]) -> Optional[datetime]:
+    if published is None:
+        return current
+    if current is None:
+        return as_naive_utc(published)
+    return max(as_naive_utc(current), as_naive_utc(published))
+
+
+def schedule_next_refresh(feed: Feed, number_of_new_items: int, now: Optional[datetime] = None) -> None:
+    """
+    Determine when the feed should be refreshed again.
+
+    - A refresh with new items halves the interval, a refresh without new items doubles it.
+    - A feed that has not published for a while is not refreshed more often than a quarter of that quiet period.
+    - The interval stays between MINIMUM_REFRESH_INTERVAL and MAXIMUM_REFRESH_INTERVAL.
+    """
+    now = now or datetime.utcnow()
+    interval = timedelta(seconds=feed.refresh_interval_seconds)
+    interval = interval / 2 if number_of_new_items > 0 else interval * 2
+
+    if feed.last_published is not None:
+        quiet_period = now - as_naive_utc(feed.last_published)
+        interval = max(interval, quiet_period / 4)
+
+    interval = min(MAXIMUM_REFRESH_INTERVAL, max(MINIMUM_REFRESH_INTERVAL, interval))
+    feed.refresh_interval_seconds = int(interval.total_seconds())
+    feed.next_refresh_on = now + interval
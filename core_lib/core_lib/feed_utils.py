@@ -1,20 +1,78 @@
 from datetime import datetime, timedelta
 import difflib
+from functools import lru_cache
+import hashlib
+from http import HTTPStatus
+import logging
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Union
 from urllib.parse import urlparse
 
+from aiohttp import ClientSession
+from bson import ObjectId
 import pytz
 
+from core_lib import metrics
+from core_lib.app_config import AppConfig
 from core_lib.application_data import repositories
-from core_lib.repositories import Feed, FeedItem, FeedSourceType, NewsItem, User
+from core_lib.feed_polling import latest_published, schedule_next_refresh
+from core_lib.incremental_parser import FeedFormat, ParsedFeed, parse_document
+from core_lib.parse_executor import parse_executor
+from core_lib.repositories import (
+    Feed,
+    FeedItem,
+    FeedItemLink,
+    FeedSourceType,
+    NewsItem,
+    NewsItemAlternates,
+    User,
+    UserReference,
+)
+from core_lib.subscriptions import subscription_cache
+from core_lib.title_index import title_index
 from core_lib.utils import now_in_utc
 
+log = logging.getLogger(__file__)
+
+
+TITLE_SIMILARITY_THRESHOLD = 0.516
+TITLE_INDEX_RETENTION = timedelta(hours=18)
+FEED_CHUNK_SIZE = 64 * 1024
+brackets_re = re.compile(r"\[.*?]")
+
+
+@lru_cache(maxsize=4096)
+def _strip_brackets(title: str) -> str:
+    return brackets_re.sub("", title)
+
+
+class TitleMatcher:
+    """
+    Matches one title against many candidate titles.
+
+    The title is the second sequence of the SequenceMatcher, so its analysis is done once. Candidates are pruned with
+    the cheap upper bounds real_quick_ratio (lengths only) and quick_ratio (character counts) before the exact ratio
+    is computed.
+    """
+
+    def __init__(self, title: str) -> None:
+        self._sequence_matcher = difflib.SequenceMatcher(None)
+        self._sequence_matcher.set_seq2(_strip_brackets(title))
+
+    def is_similar_to(self, candidate_title: str) -> bool:
+        candidate = _strip_brackets(candidate_title)
+        if len(candidate) <= 10:
+            return False
+        self._sequence_matcher.set_seq1(candidate)
+        return (
+            self._sequence_matcher.real_quick_ratio() > TITLE_SIMILARITY_THRESHOLD
+            and self._sequence_matcher.quick_ratio() > TITLE_SIMILARITY_THRESHOLD
+            and self._sequence_matcher.ratio() > TITLE_SIMILARITY_THRESHOLD
+        )
+
 
 def are_titles_similar(title_1: str, title_2: str) -> bool:
-    title_1 = re.sub(r"\[.*?]", "", title_1)
-    title_2 = re.sub(r"\[.*?]", "", title_2)
-    return len(title_1) > 10 and difflib.SequenceMatcher(None, title_1, title_2).ratio() > 0.516
+    return TitleMatcher(title_2).is_similar_to(title_1)
 
 
 def item_is_still_relevant(item: FeedItem) -> bool:
@@ -25,9 +83,9 @@ def item_is_still_relevant(item: FeedItem) -> bool:
 
 
 async def upsert_new_feed_items_for_feed(feed: Feed, feed_items: List[FeedItem]) -> int:
-    current_feed_item_links = [
-        feed_item.link for feed_item in await repositories().feed_item_repository.fetch_all_for_feed(feed)
-    ]
+    current_feed_item_links = {
+        feed_item.link for feed_item in await repositories().feed_item_repository.fetch_links_for_feed(feed)
+    }
     new_feed_items = [
         new_feed_item for new_feed_item in feed_items if new_feed_item.link not in current_feed_item_links
     ]
@@ -48,79 +106,222 @@ class UpdateResult:
         self.user_to_number_new_items_map[user_id] = self.user_to_number_new_items_map[user_id] + new_items
 
 
+def conditional_request_headers(feed: Feed) -> Dict[str, str]:
+    """Headers for a conditional request with the validators from the previous fetch of the feed."""
+    headers = {}
+    if feed.etag is not None:
+        headers["If-None-Match"] = feed.etag
+    if feed.last_modified is not None:
+        headers["If-Modified-Since"] = feed.last_modified
+    return headers
+
+
+async def fetch_feed_document(session: ClientSession, feed: Feed) -> Optional[bytes]:
+    """
+    Fetch the document of the feed with a conditional request. The validators of the response and the digest of the
+    document are stored on the feed.
+
+    returns: The fetched document, None if the document is not modified since the previous fetch.
+    """
+    async with session.get(feed.url, headers=conditional_request_headers(feed)) as response:
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            metrics.increment("feed_not_modified")
+            return None
+        document = await response.read()
+        feed.etag = response.headers.get("ETag")
+        feed.last_modified = response.headers.get("Last-Modified")
+
+    if not _content_is_changed(feed, hashlib.sha256(document).hexdigest()):
+        return None
+    return document
+
+
+def _content_is_changed(feed: Feed, content_digest: str) -> bool:
+    if content_digest == feed.content_digest:
+        metrics.increment("feed_content_unchanged")
+        return False
+    feed.content_digest = content_digest
+    metrics.increment("feed_content_changed")
+    return True
+
+
+async def parse_feed_document(session: ClientSession, feed: Feed, feed_format: FeedFormat) -> Optional[ParsedFeed]:
+    """
+    Fetch the document of the feed with a conditional request and parse it. The validators of the response and the
+    digest of the document are stored on the feed.
+
+    With the inline parse executor the document is parsed chunk by chunk while it is downloaded, so at most one chunk
+    and the item being parsed are in memory. The digest is only known once the document is read, the items of a
+    document with the digest of the previous fetch are thrown away. Otherwise the document is downloaded first, at
+    most max_bytes of it, and only parsed by the parse executor if its digest changed, while the event loop fetches
+    the next feeds.
+
+    returns: The feed and the items parsed from the document, None if the document is not modified since the
+    previous fetch.
+    """
+    executor = parse_executor()
+    max_items = AppConfig.feed_max_items()
+    max_bytes = AppConfig.feed_max_bytes()
+    feed_parser = feed_format.parser_for(feed, max_items=max_items, max_bytes=max_bytes) if executor.is_inline else None
+    chunks: List[bytes] = []
+    number_of_bytes = 0
+    digest = hashlib.sha256()
+    async with session.get(feed.url, headers=conditional_request_headers(feed)) as response:
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            metrics.increment("feed_not_modified")
+            return None
+        async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+            digest.update(chunk)
+            if feed_parser is not None:
+                if not feed_parser.feed(chunk):
+                    break
+            else:
+                chunks.append(chunk)
+                number_of_bytes += len(chunk)
+                if number_of_bytes >= max_bytes:
+                    break
+        feed.etag = response.headers.get("ETag")
+        feed.last_modified = response.headers.get("Last-Modified")
+
+    if not _content_is_changed(feed, digest.hexdigest()):
+        return None
+    if feed_parser is not None:
+        parsed_feed = feed_format.parsed_feed(feed, feed_parser)
+    else:
+        parsed_feed = await executor.run(parse_document, feed_format, feed, chunks, max_items, max_bytes)
+
+    if parsed_feed.is_capped:
+        log.warning("Feed %s is capped at %d items, %d bytes", feed.url, max_items, max_bytes)
+        metrics.increment("feed_capped")
+    return parsed_feed
+
+
+async def mark_feed_as_not_modified(feed: Feed) -> UpdateResult:
+    """Only tick the last_fetched of the feed, there is nothing new to process."""
+    log.info("Feed %s is not modified", feed.url)
+    feed.last_fetched = datetime.utcnow()
+    schedule_next_refresh(feed, number_of_new_items=0)
+    await repositories().feed_repository.update_changed(feed)
+    return UpdateResult()
+
+
+async def refresh_title_index() -> None:
+    """Drop the expired titles from the shared title index, seed it from the repository when the process starts."""
+    index = title_index()
+    index.prune(before=datetime.utcnow() - TITLE_INDEX_RETENTION)
+    if not index.is_seeded:
+        since = datetime.utcnow() - TITLE_INDEX_RETENTION
+        index.add_feed_items(await repositories().feed_item_repository.fetch_titles_created_since(since))
+        index.is_seeded = True
+
+
 async def upsert_new_items_for_feed(
     feed: Feed, updated_feed: Feed, feed_items_from_rss: List[FeedItem]
 ) -> UpdateResult:
     """
     Upload new items as feed item and news item for users.
 
+    - Split the fetched items by link, once for the feed, in new feed items and already seen feed items.
     - Upload all the feed-items if feed item did not exist yet.
-    - If feed-item exists, tick the last_seen timestamp.
-    - For all subscribed users, make news items and upsert new feed items.
+    - If feed-item exists, tick the last_seen timestamp, for all of them in one update.
+    - For all subscribed users, make news items for the new feed items. A new feed item with a title similar to an
+      unread news item of the user, of this feed or another feed, is added as alternate to that news item.
     - Set number_of_items, last_fetched and mutable details for the feed itself.
 
     returns: Number of new NewsItems created.
     """
-    current_feed_items = await repositories().feed_item_repository.fetch_all_for_feed(feed)
-    subscribed_users = await repositories().user_repository.fetch_subscribed_to(feed)
+    current_feed_items = await repositories().feed_item_repository.fetch_links_for_feed(feed)
+    subscribed_users = await subscription_cache().subscribed_to(feed)
 
-    updated_feed_items: List[FeedItem] = []  # updated feed_items that will be updated.
-    new_feed_items: List[FeedItem] = []  # new feed_items that will be inserted.
+    feed_items_by_link: Dict[str, FeedItemLink] = {feed_item.link: feed_item for feed_item in current_feed_items}
+    seen_feed_item_ids: Set[ObjectId] = set()  # feed_items of which last_seen will be ticked.
+    new_feed_items_by_link: Dict[str, FeedItem] = {}  # new feed_items that will be inserted.
     new_news_items: List[NewsItem] = []  # news items that will be inserted.
-    updated_news_items: List[NewsItem] = []  # news items that are updated.
+    updated_news_items: Dict[ObjectId, Union[NewsItem, NewsItemAlternates]] = {}  # news items that are updated.
     update_result = UpdateResult()
 
+    # Feed level: split the fetched items in new items and items that have been seen already.
+    for feed_item_from_rss in feed_items_from_rss:
+        seen_feed_item = feed_items_by_link.get(feed_item_from_rss.link)
+        if seen_feed_item is not None:  # We have seen this item already, update last seen.
+            seen_feed_item_ids.add(seen_feed_item.feed_item_id)
+        elif feed_item_from_rss.link not in new_feed_items_by_link:
+            new_feed_items_by_link[feed_item_from_rss.link] = feed_item_from_rss
+    new_feed_items = list(new_feed_items_by_link.values())
+
+    # Feed items of other feeds that likely carry the same story as a new feed item.
+    other_feed_candidates = {
+        new_feed_item.feed_item_id: title_index().candidates(new_feed_item.title, exclude_feed_id=feed.feed_id)
+        for new_feed_item in new_feed_items
+    }
+    other_feed_candidate_ids = list(set().union(*other_feed_candidates.values()))
+
+    # User level: fan out the new items to the news items of every subscribed user.
     for user in subscribed_users:
         number_of_new_items = 0
-        current_news_items = await repositories().news_item_repository.fetch_all_non_read_for_feed(feed, user)
-        for new_feed_item in feed_items_from_rss:
-            feed_items_with_same_link = [item for item in current_feed_items if item.link == new_feed_item.link]
-            if len(feed_items_with_same_link) > 0:  # We have seen this item already, update last seen.
-                for feed_item in feed_items_with_same_link:
-                    feed_item.last_seen = now_in_utc()
-                updated_feed_items.extend(feed_items_with_same_link)
+        current_news_items: List[Union[NewsItem, NewsItemAlternates]] = list(
+            await repositories().news_item_repository.fetch_non_read_alternates_for_feed(feed, user)
+        )
+        other_feed_news_items: Dict[ObjectId, NewsItemAlternates] = {}
+        if len(other_feed_candidate_ids) > 0:
+            other_feed_news_items = {
+                news_item.feed_item_id: news_item
+                for news_item in await repositories().news_item_repository.fetch_non_read_alternates_for_feed_items(
+                    user, other_feed_candidate_ids
+                )
+            }
+        for new_feed_item in new_feed_items:
+            # Check if there is already a similar news item, in this feed or another feed, to flag alternates.
+            title_matcher = TitleMatcher(new_feed_item.title)
+            news_items_similar_titles = [
+                news_item for news_item in current_news_items if title_matcher.is_similar_to(news_item.title)
+            ]
+            news_items_similar_titles.extend(
+                other_feed_news_items[feed_item_id]
+                for feed_item_id in other_feed_candidates[new_feed_item.feed_item_id]
+                if feed_item_id in other_feed_news_items
+                and title_matcher.is_similar_to(other_feed_news_items[feed_item_id].title)
+            )
+            # If no similar news items, just insert new news item and feed item, else update existing news item.
+            if len(news_items_similar_titles) == 0:
+                new_news_item = news_item_from_feed_item(new_feed_item, feed, user)
+                new_news_items.append(new_news_item)
+                number_of_new_items += 1
+                current_news_items.append(new_news_item)
             else:
-                # New feed item.
-                new_feed_items.append(new_feed_item)
-                current_feed_items.append(new_feed_item)
-
-                # Check if there is already a similar news item to flag alternates.
-                news_items_similar_titles = [
-                    news_item
-                    for news_item in current_news_items
-                    if are_titles_similar(title_1=news_item.title, title_2=new_feed_item.title)
-                ]
-                # If no similar news items, just insert new news item and feed item, else update existing news item.
-                if len(news_items_similar_titles) == 0:
-                    new_news_item = news_item_from_feed_item(new_feed_item, feed, user)
-                    new_news_items.append(new_news_item)
-                    number_of_new_items += 1
-                    current_news_items.append(new_news_item)
-                else:
-                    for existing_news_item in news_items_similar_titles:
-                        existing_news_item.append_alternate(
-                            new_feed_item.link, new_feed_item.title, determine_favicon_link(new_feed_item)
-                        )
-                        existing_news_item.published = new_feed_item.published or now_in_utc()
-                        updated_news_items.append(existing_news_item)
+                for existing_news_item in news_items_similar_titles:
+                    existing_news_item.append_alternate(
+                        new_feed_item.link, new_feed_item.title, determine_favicon_link(new_feed_item)
+                    )
+                    existing_news_item.published = new_feed_item.published or now_in_utc()
+                    updated_news_items[existing_news_item.news_item_id] = existing_news_item
         update_result.add(user.user_id, number_of_new_items)
 
     # Upsert the new and updated feed_items.
+    title_index().add_feed_items(new_feed_items)
     await repositories().feed_item_repository.upsert_many(new_feed_items)
-    await repositories().feed_item_repository.upsert_many(updated_feed_items)
+    await repositories().feed_item_repository.touch_last_seen(list(seen_feed_item_ids), now_in_utc())
     await repositories().news_item_repository.upsert_many(new_news_items)
-    await repositories().news_item_repository.upsert_many(updated_news_items)
+    await repositories().news_item_repository.update_changed_many(list(updated_news_items.values()))
 
     # Update information in feed item with latest information from the url.
     feed.last_fetched = datetime.utcnow()
-    feed.description = updated_feed.description
-    feed.title = updated_feed.title
+    # Only assigned when changed, the catalogue is revalidated when they are.
+    if feed.description != updated_feed.description:
+        feed.description = updated_feed.description
+    if feed.title != updated_feed.title:
+        feed.title = updated_feed.title
     feed.number_of_items = feed.number_of_items + len(new_feed_items)
-    await repositories().feed_repository.upsert(feed)
+    for new_feed_item in new_feed_items:
+        feed.last_published = latest_published(feed.last_published, new_feed_item.published)
+    schedule_next_refresh(feed, number_of_new_items=len(new_feed_items))
+    await repositories().feed_repository.update_changed(feed)
     return update_result
 
 
-def news_items_from_feed_items(feed_items: List[FeedItem], feed: Feed, user: User) -> List[NewsItem]:
+def news_items_from_feed_items(
+    feed_items: List[FeedItem], feed: Feed, user: Union[User, UserReference]
+) -> List[NewsItem]:
     return [news_item_from_feed_item(feed_item, feed, user) for feed_item in feed_items]
 
 
@@ -162,7 +363,7 @@ def determine_favicon_link(feed_item: FeedItem) -> str:
     return "/favicon.ico"
 
 
-def news_item_from_feed_item(feed_item: FeedItem, feed: Feed, user: User) -> NewsItem:
+def news_item_from_feed_item(feed_item: FeedItem, feed: Feed, user: Union[User, UserReference]) -> NewsItem:
     return NewsItem(
         feed_id=feed_item.feed_id,
         user_id=user.user_id,
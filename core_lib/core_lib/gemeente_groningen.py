@@ -1,44 +1,45 @@
 from datetime import datetime
 import re
-from typing import List
-
-from bs4 import BeautifulSoup, Tag
+from typing import List, Optional
 
 from core_lib.repositories import Feed, FeedItem
+from core_lib.scraper import Scraped, Scraper, ScraperRules, has_class
 from core_lib.utils import now_in_utc
 
+_article_link = "(.//div)[1]/descendant::h2[1]/descendant::a[1]"
 
-def _sanitize_text(text: str) -> str:
-    return re.sub(r" {2,}", "", text).replace("\n", " ")
-
+gemeente_groningen_rules = ScraperRules(
+    items="//article",
+    fields={
+        "title": _article_link,
+        "link": f"{_article_link}/@href",
+        "description": (
+            f"descendant::div[{has_class('teaser-body')}][1]"
+            f"/descendant::div[{has_class('field-type-text-with-summary')}][1]"
+        ),
+        "published": "descendant::time[1]/@datetime",
+    },
+)
 
-def _description(article_tag: Tag) -> str:
-    return article_tag.find("div", {"class": "teaser-body"}).find("div", {"class": "field-type-text-with-summary"}).text
+_scraper = Scraper(gemeente_groningen_rules)
 
 
-def _link(article_tag: Tag) -> str:
-    raw_link = article_tag.find("div").find("h2").find("a")["href"]
-    return f"https://gemeente.groningen.nl{raw_link}"
+def _sanitize_text(text: Optional[str]) -> str:
+    return re.sub(r" {2,}", "", text or "").replace("\n", " ")
 
 
-def _title(article_tag: Tag) -> str:
-    return _sanitize_text(article_tag.find("div").find("h2").find("a").text)
+def _feed_item(feed: Feed, article: Scraped) -> FeedItem:
+    published = article["published"]
+    return FeedItem(
+        feed_id=feed.feed_id,
+        title=_sanitize_text(article["title"]),
+        description=_sanitize_text(article["description"]).strip(),
+        link=f"https://gemeente.groningen.nl{article['link'] or ''}",
+        last_seen=now_in_utc(),
+        published=datetime.fromisoformat(published) if published is not None else now_in_utc(),
+        created_on=now_in_utc(),
+    )
 
 
 def gemeente_groningen_parser(feed: Feed, html_source: str) -> List[FeedItem]:
-    soup = BeautifulSoup(html_source, features="html.parser")
-    articles = soup.find_all("article")
-    return [
-        FeedItem(
-            feed_id=feed.feed_id,
-            title=_title(article),
-            description=_description(article),
-            link=_link(article),
-            last_seen=now_in_utc(),
-            published=(
-                datetime.fromisoformat(article.find("time")["datetime"]) if article.find("time") else now_in_utc()
-            ),
-            created_on=now_in_utc(),
-        )
-        for article in articles
-    ]
+    return [_feed_item(feed, article) for article in _scraper.scrape(html_source)]
@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+import functools
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from lxml.etree import ElementBase, XMLPullParser, XMLSyntaxError, fromstring
+
+from core_lib.app_config import AppConfig
+from core_lib.repositories import Feed, FeedItem
+
+
+class IncrementalFeedParser:
+    """
+    Parses a feed document chunk by chunk, while it is downloaded. Every item element is turned into a FeedItem as soon
+    as it is closed and is then removed from the tree, so neither the whole document nor all the item elements are
+    in memory at once. What remains is the root with the channel information.
+
+    At most max_items items and max_bytes bytes of the document are parsed. Once a cap is reached feed returns False
+    and the rest of the document should not be read.
+    """
+
+    def __init__(
+        self,
+        item_tag: str,
+        to_feed_item: Callable[[ElementBase], FeedItem],
+        max_items: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.to_feed_item = to_feed_item
+        self.max_items = max_items if max_items is not None else AppConfig.feed_max_items()
+        self.max_bytes = max_bytes if max_bytes is not None else AppConfig.feed_max_bytes()
+        self.feed_items: List[FeedItem] = []
+        self.number_of_bytes = 0
+        self.is_capped = False
+        self.root: Optional[ElementBase] = None
+        self._parsed_item: Optional[ElementBase] = None
+        self._parser = XMLPullParser(events=("end",), tag=item_tag)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse the next chunk of the document. Returns False if the cap is reached, the chunk may be cut off."""
+        if self.is_capped:
+            return False
+        remaining_bytes = self.max_bytes - self.number_of_bytes
+        if len(chunk) > remaining_bytes:
+            chunk = chunk[:remaining_bytes]
+            self.is_capped = True
+        self.number_of_bytes += len(chunk)
+        self._parser.feed(chunk)
+        self._read_items()
+        return not self.is_capped
+
+    def _read_items(self) -> None:
+        for _, item_element in self._parser.read_events():
+            if self.root is None:
+                self.root = item_element.getroottree().getroot()
+            if len(self.feed_items) < self.max_items:
+                self.feed_items.append(self.to_feed_item(item_element))
+            else:
+                self.is_capped = True
+            # The parser may still add the tail of this item, so the previous item is the one that is removed.
+            item_element.clear(keep_tail=True)
+            self._remove_parsed_item()
+            self._parsed_item = item_element
+
+    def _remove_parsed_item(self) -> None:
+        if self._parsed_item is not None:
+            parent = self._parsed_item.getparent()
+            if parent is not None:
+                parent.remove(self._parsed_item)
+            self._parsed_item = None
+
+    def close(self) -> ElementBase:
+        """Finish the parse, returns the root of the document without the items."""
+        try:
+            self.root = self._parser.close()
+        except XMLSyntaxError:
+            # A capped document is cut off, the root read so far has the channel information.
+            if not self.is_capped or self.root is None:
+                raise
+        self._read_items()
+        self._remove_parsed_item()
+        return self.root
+
+
+@dataclass
+class ParsedFeed:
+    feed: Feed
+    feed_items: List[FeedItem]
+    is_capped: bool
+
+
+@dataclass(frozen=True)
+class FeedFormat:
+    """How a feed document is parsed: the tag of its items and the functions that read the items and the channel."""
+
+    item_tag: str
+    item_to_feed_item: Callable[[Feed, ElementBase], FeedItem]
+    document_to_feed: Callable[[str, ElementBase], Feed]
+
+    def parser_for(
+        self, feed: Feed, max_items: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> IncrementalFeedParser:
+        return IncrementalFeedParser(
+            self.item_tag, functools.partial(self.item_to_feed_item, feed), max_items=max_items, max_bytes=max_bytes
+        )
+
+    def parse_whole_document(self, url: str, document: bytes) -> Tuple[Feed, List[FeedItem]]:
+        """The feed at url and all of its items, from a document that is parsed at once."""
+        root = fromstring(document)
+        feed = self.document_to_feed(url, root)
+        return feed, [self.item_to_feed_item(feed, item_element) for item_element in root.iter(self.item_tag)]
+
+    def parsed_feed(self, feed: Feed, feed_parser: IncrementalFeedParser) -> ParsedFeed:
+        root = feed_parser.close()
+        return ParsedFeed(self.document_to_feed(feed.url, root), feed_parser.feed_items, feed_parser.is_capped)
+
+
+def parse_document(
+    feed_format: FeedFormat, feed: Feed, chunks: Iterable[bytes], max_items: int, max_bytes: int
+) -> ParsedFeed:
+    """Parse a downloaded document at once, this is what a parse executor runs."""
+    feed_parser = feed_format.parser_for(feed, max_items=max_items, max_bytes=max_bytes)
+    for chunk in chunks:
+        if not feed_parser.feed(chunk):
+            break
+    return feed_format.parsed_feed(feed, feed_parser)
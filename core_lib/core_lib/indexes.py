@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from core_lib.repositories import encode_token, keyset_filter
+from core_lib.utils import now_in_utc
+
+log = logging.getLogger(__file__)
+
+_compared_options = ("unique", "sparse", "expireAfterSeconds")
+
+
+@dataclass
+class IndexReconciliation:
+    collection: str
+    created: List[str] = field(default_factory=list)
+    recreated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    undeclared: List[str] = field(default_factory=list)
+
+
+@dataclass
+class QueryShape:
+    collection: str
+    name: str
+    search_filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+@dataclass
+class QueryPlan:
+    collection: str
+    name: str
+    stages: List[str]
+    index_names: List[str]
+
+    @property
+    def uses_index(self) -> bool:
+        return "COLLSCAN" not in self.stages
+
+
+def _index_spec(index: Dict[str, Any]) -> Tuple[Any, ...]:
+    keys = tuple((key, direction if isinstance(direction, str) else int(direction)) for key, direction in index["key"])
+    return keys, tuple(index.get(option) for option in _compared_options)
+
+
+async def reconcile_collection_indexes(
+    collection: AsyncIOMotorCollection, declared: List[IndexModel], drop_undeclared: bool = False
+) -> IndexReconciliation:
+    """
+    Create the declared indexes that do not exist, recreate the ones that exist with other keys or options. Indexes
+    that are not declared are only dropped with drop_undeclared. Running it again without changes does nothing.
+    """
+    reconciliation = IndexReconciliation(collection=collection.name)
+    existing = await collection.index_information()
+    to_create: List[IndexModel] = []
+    for index_model in declared:
+        document = index_model.document
+        name = document["name"]
+        declared_index = {**document, "key": list(document["key"].items())}
+        if name not in existing:
+            to_create.append(index_model)
+            reconciliation.created.append(name)
+        elif _index_spec(existing[name]) != _index_spec(declared_index):
+            await collection.drop_index(name)
+            to_create.append(index_model)
+            reconciliation.recreated.append(name)
+
+    declared_names = {index_model.document["name"] for index_model in declared}
+    for name in existing:
+        if name == "_id_" or name in declared_names:
+            continue
+        if drop_undeclared:
+            await collection.drop_index(name)
+            reconciliation.dropped.append(name)
+        else:
+            reconciliation.undeclared.append(name)
+
+    if len(to_create) > 0:
+        await collection.create_indexes(to_create)
+    log.info("Indexes of %s reconciled %s", collection.name, reconciliation)
+    return reconciliation
+
+
+async def reconcile_indexes(
+    database: AsyncIOMotorDatabase, declared_indexes: Dict[str, List[IndexModel]], drop_undeclared: bool = False
+) -> List[IndexReconciliation]:
+    return [
+        await reconcile_collection_indexes(database[collection_name], declared, drop_undeclared)
+        for collection_name, declared in declared_indexes.items()
+    ]
+
+
+def repository_query_shapes() -> List[QueryShape]:
+    """The queries of the repositories, with placeholder values, as they are sent to Mongo."""
+    some_id = ObjectId()
+    now = now_in_utc()
+    some_token = encode_token(now, some_id)
+    return [
+        QueryShape("news_items", "unread items", {"user_id": some_id, "is_read": False}, [("published", DESCENDING)]),
+        QueryShape(
+            "news_items",
+            "read items",
+            {"user_id": some_id, "is_read": True},
+            [("published", DESCENDING), ("_id", DESCENDING)],
+        ),
+        QueryShape(
+            "news_items",
+            "page of read items",
+            {"user_id": some_id, "is_read": True, **keyset_filter("published", some_token, DESCENDING)},
+            [("published", DESCENDING), ("_id", DESCENDING)],
+        ),
+        QueryShape("news_items", "unread items of feed", {"feed_id": some_id, "is_read": False, "user_id": some_id}),
+        QueryShape(
+            "news_items",
+            "unread items of feed items",
+            {"feed_item_id": {"$in": [some_id]}, "is_read": False, "user_id": some_id},
+        ),
+        QueryShape("news_items", "items of user feed", {"user_id": some_id, "feed_id": some_id}),
+        QueryShape("news_items", "read items before", {"is_read": True, "is_read_on": {"$lt": now}}),
+        QueryShape("feed_items", "items of feed", {"feed_id": some_id}),
+        QueryShape("feed_items", "items created since", {"created_on": {"$gte": now}}),
+        QueryShape("feed_items", "items last seen before", {"last_seen": {"$lt": now}}),
+        QueryShape("feed_items", "items of feed last seen before", {"feed_id": some_id, "last_seen": {"$lt": now}}),
+        QueryShape("news_items", "items of feed item", {"feed_item_id": some_id}),
+        QueryShape("feeds", "feed by url", {"url": "https://example.com"}),
+        QueryShape("feeds", "active feeds", {"number_of_subscriptions": {"$gt": 0}}),
+        QueryShape(
+            "feeds",
+            "due feeds",
+            {
+                "number_of_subscriptions": {"$gt": 0},
+                "$or": [{"next_refresh_on": None}, {"next_refresh_on": {"$lte": now}}],
+            },
+        ),
+        QueryShape("feeds", "catalogue", {}, [("_id", ASCENDING)]),
+        QueryShape("feeds", "page of catalogue", {"_id": {"$gt": some_id}}, [("_id", ASCENDING)]),
+        QueryShape("feeds", "catalogue of category", {"category": "news"}, [("_id", ASCENDING)]),
+        QueryShape(
+            "feeds",
+            "page of catalogue of category",
+            {"category": "news", "_id": {"$gt": some_id}},
+            [("_id", ASCENDING)],
+        ),
+        QueryShape("feeds", "catalogue of feeds", {"_id": {"$in": [some_id]}}, [("_id", ASCENDING)]),
+        QueryShape("users", "user by email", {"email_address": "someone@example.com"}),
+        QueryShape("users", "subscribed users", {"subscribed_to": some_id}),
+        QueryShape("saved_items", "saved items", {"user_id": some_id}, [("saved_on", DESCENDING), ("_id", ASCENDING)]),
+        QueryShape(
+            "saved_items",
+            "page of saved items",
+            {"user_id": some_id, **keyset_filter("saved_on", some_token, ASCENDING)},
+            [("saved_on", DESCENDING), ("_id", ASCENDING)],
+        ),
+    ]
+
+
+def _plan_stages(plan: Dict[str, Any], stages: List[str], index_names: List[str]) -> None:
+    stages.append(plan["stage"])
+    if "indexName" in plan:
+        index_names.append(plan["indexName"])
+    if "inputStage" in plan:
+        _plan_stages(plan["inputStage"], stages, index_names)
+    for input_stage in plan.get("inputStages", []):
+        _plan_stages(input_stage, stages, index_names)
+
+
+async def explain_queries(database: AsyncIOMotorDatabase, query_shapes: List[QueryShape]) -> List[QueryPlan]:
+    """The winning plan of every query shape, a COLLSCAN stage means the query is not served by an index."""
+    query_plans = []
+    for query_shape in query_shapes:
+        explanation = (
+            await database[query_shape.collection].find(query_shape.search_filter, sort=query_shape.sort).explain()
+        )
+        stages: List[str] = []
+        index_names: List[str] = []
+        winning_plan = explanation["queryPlanner"]["winningPlan"]
+        _plan_stages(winning_plan.get("queryPlan", winning_plan), stages, index_names)
+        query_plan = QueryPlan(query_shape.collection, query_shape.name, stages, index_names)
+        if not query_plan.uses_index:
+            log.warning("Query %s on %s is not served by an index", query_shape.name, query_shape.collection)
+        query_plans.append(query_plan)
+    return query_plans
@@ -0,0 +1,18 @@
+from collections import Counter
+from typing import Dict
+
+_counters: Counter = Counter()
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Increment the in-process counter with name."""
+    _counters[name] += amount
+
+
+def counters() -> Dict[str, int]:
+    """Snapshot of all counters since the start of the process."""
+    return dict(_counters)
+
+
+def reset() -> None:
+    _counters.clear()
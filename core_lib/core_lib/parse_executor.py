@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+import functools
+import multiprocessing
+from typing import Any, Callable, Optional, TypeVar
+
+from core_lib.app_config import AppConfig
+
+Result = TypeVar("Result")
+
+
+class ParseExecutorKind(Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class ParseExecutor:
+    """
+    Runs the parsing of fetched documents. Inline runs it on the event loop, thread and process run it in a pool, so
+    the event loop keeps fetching other feeds while a document is parsed.
+
+    With a process pool the function and its arguments are pickled, the function must be a module level function.
+    The workers are spawned, not forked from a process with a running event loop and Mongo client. The metrics counted
+    in a worker are not counted in this process.
+    """
+
+    def __init__(self, kind: ParseExecutorKind, max_workers: int = 1) -> None:
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[Executor] = None
+
+    @property
+    def is_inline(self) -> bool:
+        return self.kind == ParseExecutorKind.INLINE
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.kind == ParseExecutorKind.PROCESS:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+        return self._executor
+
+    async def run(self, function: Callable[..., Result], *args: Any) -> Result:
+        if self.is_inline:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), functools.partial(function, *args))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_parse_executor: Optional[ParseExecutor] = None
+
+
+def parse_executor() -> ParseExecutor:
+    """The parse executor of this process, configured with PARSE_EXECUTOR and PARSE_EXECUTOR_WORKERS."""
+    global _parse_executor  # pylint: disable=global-statement
+    if _parse_executor is None:
+        _parse_executor = ParseExecutor(
+            ParseExecutorKind(AppConfig.parse_executor()), max_workers=AppConfig.parse_executor_workers()
+        )
+    return _parse_executor
+
+
+def shutdown_parse_executor() -> None:
+    if _parse_executor is not None:
+        _parse_executor.shutdown()
@@ -0,0 +1,113 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from core_lib import metrics
+from core_lib.feed_utils import UpdateResult
+from core_lib.repositories import Feed
+
+log = logging.getLogger(__file__)
+
+
+@dataclass
+class FeedRefreshTiming:
+    feed_id: str
+    url: str
+    seconds_waiting: float
+    seconds_refreshing: float
+
+
+class RefreshScheduler:
+    """
+    Works through a queue of feeds, refreshing at most max_concurrent feeds at once and at most
+    max_concurrent_per_host feeds of the same host at once. A free slot picks the first queued feed
+    whose host is not saturated, so one slow host does not block the feeds of other hosts.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[Feed], Awaitable[UpdateResult]],
+        max_concurrent: int,
+        max_concurrent_per_host: int,
+    ) -> None:
+        self.refresh = refresh
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_concurrent_per_host = max(1, max_concurrent_per_host)
+        self.timings: List[FeedRefreshTiming] = []
+        self._pending: List[Feed] = []
+        self._active_per_host: Dict[str, int] = defaultdict(int)
+        self._results: List[UpdateResult] = []
+        self._condition = asyncio.Condition()
+        self._started_on = 0.0
+
+    @staticmethod
+    def _host_of(feed: Feed) -> str:
+        return urlparse(feed.url).netloc
+
+    def _take_next_feed(self) -> Optional[Feed]:
+        for index, feed in enumerate(self._pending):
+            host = self._host_of(feed)
+            if self._active_per_host[host] < self.max_concurrent_per_host:
+                del self._pending[index]
+                self._active_per_host[host] += 1
+                return feed
+        return None
+
+    async def _next_feed(self) -> Optional[Feed]:
+        """Wait for a feed that may be refreshed now, None if the queue is exhausted."""
+        async with self._condition:
+            while len(self._pending) > 0:
+                feed = self._take_next_feed()
+                if feed is not None:
+                    return feed
+                await self._condition.wait()
+            return None
+
+    async def _release(self, feed: Feed) -> None:
+        async with self._condition:
+            self._active_per_host[self._host_of(feed)] -= 1
+            self._condition.notify_all()
+
+    async def _refresh_timed(self, feed: Feed) -> Tuple[UpdateResult, FeedRefreshTiming]:
+        started_on = time.monotonic()
+        result = await self.refresh(feed)
+        finished_on = time.monotonic()
+        timing = FeedRefreshTiming(
+            feed_id=str(feed.feed_id),
+            url=feed.url,
+            seconds_waiting=started_on - self._started_on,
+            seconds_refreshing=finished_on - started_on,
+        )
+        log.info("Refreshed %s in %.3fs, waited %.3fs", feed.url, timing.seconds_refreshing, timing.seconds_waiting)
+        return result, timing
+
+    async def _worker(self) -> None:
+        while True:
+            feed = await self._next_feed()
+            if feed is None:
+                return
+            try:
+                result, timing = await self._refresh_timed(feed)
+                self._results.append(result)
+                self.timings.append(timing)
+            except Exception:  # pylint: disable=broad-except
+                # One failing feed must not cost the results of the other feeds.
+                log.exception("Refreshing %s failed", feed.url)
+                metrics.increment("feed_refresh_failed")
+                self._results.append(UpdateResult())
+            finally:
+                await self._release(feed)
+
+    async def run(self, feeds: List[Feed]) -> List[UpdateResult]:
+        """Refresh all the feeds and return the update results in order of completion."""
+        self._pending = list(feeds)
+        self._results = []
+        self.timings = []
+        self._started_on = time.monotonic()
+        number_of_workers = min(self.max_concurrent, len(self._pending))
+        await asyncio.gather(*[self._worker() for _ in range(number_of_workers)])
+        return self._results
@@ -1,15 +1,21 @@
 from dataclasses import dataclass
 from datetime import datetime
 import enum
-from typing import Any, Dict, Iterator, List, Optional
+import base64
+from collections import OrderedDict
+import json
+import time
+from typing import AbstractSet, Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import Field
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pydantic import Field, PrivateAttr
 from pydantic.main import BaseModel
-from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, ReturnDocument, UpdateOne
 import pytz
 
+from core_lib.trusted_decoder import TrustedDecoder
 from core_lib.utils import now_in_utc
 
 
@@ -17,10 +23,66 @@ def uuid4_str() -> ObjectId:
     return ObjectId()
 
 
+def projection_of(model_class: Type[BaseModel]) -> Dict[str, int]:
+    """The Mongo projection of the fields of the model, to read a document as a lightweight model."""
+    return {field.alias: 1 for field in model_class.__fields__.values()}
+
+
+def _add_at_least_zero(field_path: str, amount: int) -> Dict[str, Any]:
+    """Update pipeline expression for the value of field_path plus amount, at least 0."""
+    return {"$max": [0, {"$add": [{"$ifNull": [field_path, 0]}, amount]}]}
+
+
 @dataclass
 class QueryResult:
-    items: Iterator
-    token: bytes
+    """A page of items, token is the opaque cursor for the next page or None if there are no more items."""
+
+    items: List[Any]
+    token: Optional[str]
+
+
+class InvalidTokenException(Exception):
+    pass
+
+
+class CounterAssignedException(Exception):
+    pass
+
+
+def encode_token(sort_value: datetime, object_id: ObjectId) -> str:
+    """Opaque cursor token for the position after the document with the sort_value and object_id."""
+    position = json.dumps([sort_value.isoformat(), str(object_id)])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_token(token: str) -> Tuple[datetime, ObjectId]:
+    try:
+        sort_value, object_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return datetime.fromisoformat(sort_value), ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId) as exception:
+        raise InvalidTokenException(f"Invalid token {token}") from exception
+
+
+def encode_id_token(object_id: ObjectId) -> str:
+    """Opaque cursor token for the position after the document with object_id, for pages in _id order."""
+    return base64.urlsafe_b64encode(str(object_id).encode("ascii")).decode("ascii")
+
+
+def decode_id_token(token: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(token.encode("ascii")).decode("ascii"))
+    except (ValueError, TypeError, InvalidId) as exception:
+        raise InvalidTokenException(f"Invalid token {token}") from exception
+
+
+def keyset_filter(field_name: str, token: str, id_direction: int) -> Dict[str, Any]:
+    """
+    Filter for the documents after the token in the order (field_name descending, _id in id_direction), so a page
+    is found with the index instead of skipping over all the documents of the previous pages.
+    """
+    sort_value, object_id = decode_token(token)
+    id_operator = "$lt" if id_direction == DESCENDING else "$gt"
+    return {"$or": [{field_name: {"$lt": sort_value}}, {field_name: sort_value, "_id": {id_operator: object_id}}]}
 
 
 class PyObjectId(ObjectId):
@@ -44,8 +106,99 @@ class Avatar(BaseModel):
     image: str
 
 
-class User(BaseModel):  # pylint: disable=too-few-public-methods
+DocumentModelType = TypeVar("DocumentModelType", bound="DocumentModel")
+_trusted_decoders: Dict[type, TrustedDecoder] = {}
+
+
+class DocumentModel(BaseModel):
+    """
+    Model of a document that tracks which fields were assigned since it was created or loaded, so only those fields
+    have to be written with a $set. In place changes of a field, like appending to a list, are marked with
+    mark_changed.
+    """
+
+    _changed_fields: Set[str] = PrivateAttr(default_factory=set)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self.__fields__:
+            self._changed_fields.add(name)
+
+    def mark_changed(self, *field_names: str) -> None:
+        self._changed_fields.update(field_names)
+
+    def mark_unchanged(self) -> None:
+        self._changed_fields.clear()
+
+    def changed_fields(self, exclude: AbstractSet[str] = frozenset()) -> Dict[str, Any]:
+        """The changed fields by alias, with their current value."""
+        return self.dict(by_alias=True, include=self._changed_fields - exclude)
+
+    @classmethod
+    def from_document(cls: Type[DocumentModelType], document: Mapping[str, Any]) -> DocumentModelType:
+        """The model for a document read from Mongo, without validation. See TrustedDecoder."""
+        decoder = _trusted_decoders.get(cls)
+        if decoder is None:
+            decoder = _trusted_decoders[cls] = TrustedDecoder(cls)
+        return decoder(document)
+
+
+def _set_changed_fields(
+    document_id: ObjectId, model: DocumentModel, exclude: AbstractSet[str] = frozenset()
+) -> Optional[UpdateOne]:
+    changed_fields = model.changed_fields(exclude)
+    if len(changed_fields) == 0:
+        return None
+    return UpdateOne({"_id": document_id}, {"$set": changed_fields})
+
+
+async def _update_changed_fields(
+    collection: AsyncIOMotorCollection,
+    models: List[Tuple[ObjectId, DocumentModel]],
+    exclude: AbstractSet[str] = frozenset(),
+) -> None:
+    """Writes the changed fields of the models with one bulk write."""
+    requests = [
+        request
+        for request in (_set_changed_fields(document_id, model, exclude) for document_id, model in models)
+        if request is not None
+    ]
+    if len(requests) > 0:
+        await collection.bulk_write(requests, ordered=False)
+    for _, model in models:
+        model.mark_unchanged()
+
+
+def _check_counters_unchanged(model: DocumentModel, counters: AbstractSet[str]) -> None:
+    """Counters are only changed with their $inc like updates, an assigned counter would be dropped or undo those."""
+    assigned_counters = sorted(model.changed_fields().keys() & counters)
+    if len(assigned_counters) > 0:
+        raise CounterAssignedException(f"Counters {assigned_counters} are changed with their own updates, not assigned")
+
+
+def _update_keeping_counters(model: DocumentModel, counters: AbstractSet[str]) -> Dict[str, Any]:
+    """
+    Update for an upsert of model that only writes the counters when the document is inserted. Afterwards the
+    counters are only changed with $inc like updates, so an upsert of an older copy does not undo them. A counter that
+    was assigned on the model raises CounterAssignedException instead of being dropped.
+    """
+    _check_counters_unchanged(model, counters)
+    document = model.dict(by_alias=True)
+    return {
+        "$set": {key: value for key, value in document.items() if key not in counters and key != "_id"},
+        "$setOnInsert": {key: value for key, value in document.items() if key in counters},
+    }
+
+
+class _UserReferenceFields(DocumentModel):  # pylint: disable=too-few-public-methods
     user_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
+
+
+class UserReference(_UserReferenceFields):  # pylint: disable=too-few-public-methods
+    """Just the identity of a user, for the queries that do not need the whole user document."""
+
+
+class User(_UserReferenceFields):  # pylint: disable=too-few-public-methods
     email_address: str
     display_name: Optional[str]
     password_hash: str
@@ -66,14 +219,21 @@ class FeedSourceType(str, enum.Enum):
     RDF = "RDF FEED"
 
 
-class Feed(BaseModel):  # pylint: disable=too-few-public-methods
+class _FeedItemCountFields(DocumentModel):  # pylint: disable=too-few-public-methods
     feed_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
+    number_of_items: int = 0
+
+
+class FeedItemCount(_FeedItemCountFields):  # pylint: disable=too-few-public-methods
+    """Just the number of items of a feed, for the maintenance that recounts them."""
+
+
+class Feed(_FeedItemCountFields):  # pylint: disable=too-few-public-methods
     url: str
     title: str
     link: str
     feed_source_type: FeedSourceType = FeedSourceType.RSS
     number_of_subscriptions: int = 0
-    number_of_items: int = 0
 
     description: Optional[str]
     category: Optional[str]
@@ -83,41 +243,74 @@ class Feed(BaseModel):  # pylint: disable=too-few-public-methods
 
     last_fetched: Optional[datetime]
     last_published: Optional[datetime]
+    next_refresh_on: Optional[datetime]
+    refresh_interval_seconds: int = 900
 
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_digest: Optional[str]
+
+    catalogue_updated_on: Optional[datetime]
+
+
+class FeedCatalogueEntry(DocumentModel):  # pylint: disable=too-few-public-methods
+    """The fields of a feed that the catalogue shows."""
+
+    feed_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
+    url: str
+    title: str
+    feed_source_type: FeedSourceType = FeedSourceType.RSS
+    description: Optional[str]
+    category: Optional[str]
+    image_url: Optional[str]
+    image_title: Optional[str]
+    image_link: Optional[str]
+
+
+_catalogue_fields = {field.alias for field in FeedCatalogueEntry.__fields__.values()} - {"_id"}
+
+
+@dataclass
+class CataloguePageVersion:
+    """The feeds of a catalogue page and the last time one of them changed, see fetch_catalogue_page_version."""
+
+    feed_ids: List[ObjectId]
+    updated_on: Optional[datetime]
+
+
+class FeedItemLink(DocumentModel):  # pylint: disable=too-few-public-methods
+    """Just the link of a feed item, for recognizing the items of a feed that were seen before."""
 
-class FeedItem(BaseModel):  # pylint: disable=too-few-public-methods
     feed_item_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
-    feed_id: PyObjectId
+    link: str
+
 
+class _FeedItemTitleFields(DocumentModel):  # pylint: disable=too-few-public-methods
+    feed_item_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
+    feed_id: PyObjectId
     title: str
+    created_on: datetime
+
+
+class FeedItemTitle(_FeedItemTitleFields):  # pylint: disable=too-few-public-methods
+    """The fields of a feed item that the title index needs."""
+
+
+class FeedItem(_FeedItemTitleFields):  # pylint: disable=too-few-public-methods
     link: str
     description: Optional[str]
     last_seen: datetime
     published: Optional[datetime]
-    created_on: datetime
 
 
-class NewsItem(BaseModel):  # pylint: disable=too-few-public-methods
+class _NewsItemAlternatesFields(DocumentModel):  # pylint: disable=too-few-public-methods
     news_item_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
-    feed_id: PyObjectId
-    user_id: PyObjectId
     feed_item_id: PyObjectId
-
-    feed_title: str
     title: str
-    description: str
-    link: str
     published: datetime
     alternate_links: List[str] = Field(default_factory=list)
     alternate_title_links: List[str] = Field(default_factory=list)
     alternate_favicons: List[str] = Field(default_factory=list)
-    favicon: Optional[str]
-
-    created_on: datetime = now_in_utc()
-    is_read: bool = False
-    is_saved: bool = False
-    is_read_on: Optional[datetime] = None
-    saved_news_item_id: Optional[PyObjectId] = None
 
     def append_alternate(self, link: str, title: str, icon_link: str) -> None:
         """Append an alternate source for the news. Only appended if not yet present."""
@@ -126,9 +319,40 @@ class NewsItem(BaseModel):  # pylint: disable=too-few-public-methods
             self.alternate_title_links.append(title)
             self.alternate_links.append(link)
             self.alternate_favicons.append(icon_link)
+            self.mark_changed("alternate_title_links", "alternate_links", "alternate_favicons")
+
+
+class NewsItemAlternates(_NewsItemAlternatesFields):  # pylint: disable=too-few-public-methods
+    """The fields of a news item that a refresh needs to recognize a story and to add alternates to it."""
 
 
-class SavedNewsItem(BaseModel):
+class NewsItem(_NewsItemAlternatesFields):  # pylint: disable=too-few-public-methods
+    feed_id: PyObjectId
+    user_id: PyObjectId
+
+    feed_title: str
+    description: str
+    link: str
+    favicon: Optional[str]
+
+    created_on: datetime = now_in_utc()
+    is_read: bool = False
+    is_saved: bool = False
+    is_read_on: Optional[datetime] = None
+    saved_news_item_id: Optional[PyObjectId] = None
+
+
+class NewsItemStorage(str, enum.Enum):
+    """
+    DOCUMENT stores every news item as a complete document. REFERENCE stores only the per user state of a news item,
+    the description, link and feed title are joined from the feed item and the feed when reading.
+    """
+
+    DOCUMENT = "document"
+    REFERENCE = "reference"
+
+
+class SavedNewsItem(DocumentModel):
     saved_news_item_id: PyObjectId = Field(default_factory=uuid4_str, alias="_id")
 
     feed_id: PyObjectId
@@ -151,6 +375,8 @@ class SavedNewsItem(BaseModel):
 
 
 class SavedNewsItemRepository:
+    indexes = [IndexModel([("user_id", ASCENDING), ("saved_on", DESCENDING), ("_id", ASCENDING)])]
+
     def __init__(self, database: AsyncIOMotorDatabase):
         self.saved_items_collection = database["saved_items"]
 
@@ -166,7 +392,20 @@ class SavedNewsItemRepository:
             .skip(offset)
             .limit(limit)
         )
-        return [SavedNewsItem.parse_obj(item) async for item in result]
+        return [SavedNewsItem.from_document(item) async for item in result]
+
+    async def fetch_page(self, user: User, token: Optional[str], limit: int) -> QueryResult:
+        search_filter: Dict[str, Any] = {"user_id": user.user_id}
+        if token is not None:
+            search_filter.update(keyset_filter("saved_on", token, ASCENDING))
+        result = self.saved_items_collection.find(
+            search_filter, sort=[("saved_on", DESCENDING), ("_id", ASCENDING)]
+        ).limit(limit)
+        items = [SavedNewsItem.from_document(item) async for item in result]
+        next_token = None
+        if len(items) == limit:
+            next_token = encode_token(items[-1].saved_on, items[-1].saved_news_item_id)
+        return QueryResult(items=items, token=next_token)
 
     async def upsert(self, saved_news_item: SavedNewsItem) -> SavedNewsItem:
         await self.saved_items_collection.replace_one(
@@ -181,10 +420,17 @@ class SavedNewsItemRepository:
         result = await self.saved_items_collection.find_one({"_id": ObjectId(saved_news_item_id)})
         if result is None:
             return None
-        return SavedNewsItem.parse_obj(result)
+        return SavedNewsItem.from_document(result)
 
 
 class FeedRepository:
+    indexes = [
+        IndexModel([("url", ASCENDING)]),
+        IndexModel([("number_of_subscriptions", ASCENDING)]),
+        IndexModel([("category", ASCENDING), ("_id", ASCENDING)]),
+    ]
+    counters = frozenset({"number_of_subscriptions"})
+
     def __init__(self, database: AsyncIOMotorDatabase):
         self.feeds_collection = database.get_collection("feeds")
 
@@ -197,38 +443,174 @@ class FeedRepository:
         result = await self.feeds_collection.find_one({"url": url})
         if result is None:
             return None
-        return Feed.parse_obj(result)
+        return Feed.from_document(result)
 
     async def upsert(self, feed: Feed) -> Feed:
-        """Upsert a feed into the repository."""
-        await self.feeds_collection.replace_one({"_id": feed.feed_id}, feed.dict(by_alias=True), True)
+        """
+        Upsert a feed into the repository. number_of_subscriptions is only written for a new feed, it is changed with
+        add_subscriptions. Assigning it on the feed raises CounterAssignedException.
+        """
+        feed.catalogue_updated_on = now_in_utc()
+        await self.feeds_collection.update_one({"_id": feed.feed_id}, self._update_for(feed), upsert=True)
         return feed
 
+    @classmethod
+    def _update_for(cls, feed: Feed) -> Dict[str, Any]:
+        return _update_keeping_counters(feed, cls.counters)
+
+    async def add_subscriptions(self, feed_id: ObjectId, number_of_subscriptions: int) -> None:
+        """Adds number_of_subscriptions, which may be negative, to the subscriptions of the feed. Stays >= 0."""
+        await self.feeds_collection.update_one(
+            {"_id": feed_id},
+            [
+                {
+                    "$set": {
+                        "number_of_subscriptions": _add_at_least_zero(
+                            "$number_of_subscriptions", number_of_subscriptions
+                        )
+                    }
+                }
+            ],
+        )
+
+    @staticmethod
+    def _touch_catalogue(feed: Union[Feed, FeedItemCount]) -> None:
+        """Sets catalogue_updated_on of a feed of which a field that the catalogue shows changed."""
+        if isinstance(feed, Feed) and len(feed.changed_fields().keys() & _catalogue_fields) > 0:
+            feed.catalogue_updated_on = now_in_utc()
+
+    async def update_changed(self, feed: Feed) -> Feed:
+        """Writes only the changed fields of the feed. Assigning a counter raises CounterAssignedException, see upsert."""
+        _check_counters_unchanged(feed, self.counters)
+        self._touch_catalogue(feed)
+        await _update_changed_fields(self.feeds_collection, [(feed.feed_id, feed)])
+        return feed
+
+    async def update_changed_many(self, feeds: Sequence[Union[Feed, FeedItemCount]]) -> None:
+        for feed in feeds:
+            _check_counters_unchanged(feed, self.counters)
+            self._touch_catalogue(feed)
+        await _update_changed_fields(self.feeds_collection, [(feed.feed_id, feed) for feed in feeds])
+
     async def upsert_many(self, feeds: List[Feed]) -> List[Feed]:
-        """Upsert feeds."""
+        """Upsert feeds, like upsert."""
         if len(feeds) > 0:
-            requests = [ReplaceOne({"_id": feed.feed_id}, feed.dict(by_alias=True), True) for feed in feeds]
+            for feed in feeds:
+                feed.catalogue_updated_on = now_in_utc()
+            requests = [UpdateOne({"_id": feed.feed_id}, self._update_for(feed), upsert=True) for feed in feeds]
             await self.feeds_collection.bulk_write(requests)
         return feeds
 
+    def all_feeds_cursor(self) -> Any:
+        """Cursor over all the feed documents in the system, for reading or streaming them."""
+        return self.feeds_collection.find({})
+
     async def all_feeds(self) -> List[Feed]:
         """Retrieve all the feeds in the system."""
-        result = self.feeds_collection.find({})
-        return [Feed.parse_obj(feed) async for feed in result]
+        return [Feed.from_document(feed) async for feed in self.all_feeds_cursor()]
+
+    async def all_feed_item_counts(self) -> List[FeedItemCount]:
+        """The number of items of all the feeds in the system, without the other fields."""
+        result = self.feeds_collection.find({}, projection=projection_of(FeedItemCount))
+        return [FeedItemCount.from_document(feed) async for feed in result]
+
+    @staticmethod
+    def _catalogue_filter(
+        token: Optional[str],
+        category: Optional[str],
+        feed_source_type: Optional[FeedSourceType],
+        feed_ids: Optional[List[ObjectId]],
+    ) -> Dict[str, Any]:
+        search_filter: Dict[str, Any] = {}
+        if category is not None:
+            search_filter["category"] = category
+        if feed_source_type is not None:
+            search_filter["feed_source_type"] = feed_source_type.value
+        id_filter: Dict[str, Any] = {}
+        if feed_ids is not None:
+            id_filter["$in"] = feed_ids
+        if token is not None:
+            id_filter["$gt"] = decode_id_token(token)
+        if len(id_filter) > 0:
+            search_filter["_id"] = id_filter
+        return search_filter
+
+    async def fetch_catalogue_page(
+        self,
+        token: Optional[str],
+        limit: int,
+        category: Optional[str] = None,
+        feed_source_type: Optional[FeedSourceType] = None,
+        feed_ids: Optional[List[ObjectId]] = None,
+    ) -> QueryResult:
+        """A page of catalogue entries in _id order, only of the feeds with the category, source type and ids given."""
+        result = self.feeds_collection.find(
+            self._catalogue_filter(token, category, feed_source_type, feed_ids),
+            projection=projection_of(FeedCatalogueEntry),
+            sort=[("_id", ASCENDING)],
+        ).limit(limit)
+        items = [FeedCatalogueEntry.from_document(feed) async for feed in result]
+        next_token = encode_id_token(items[-1].feed_id) if len(items) == limit else None
+        return QueryResult(items=items, token=next_token)
+
+    async def fetch_catalogue_page_version(
+        self,
+        token: Optional[str],
+        limit: int,
+        category: Optional[str] = None,
+        feed_source_type: Optional[FeedSourceType] = None,
+        feed_ids: Optional[List[ObjectId]] = None,
+    ) -> CataloguePageVersion:
+        """
+        The ids of the feeds of the catalogue page of fetch_catalogue_page and the last time one of them changed,
+        without reading the entries. The page is the same as long as its version is.
+        """
+        result = self.feeds_collection.aggregate(
+            [
+                {"$match": self._catalogue_filter(token, category, feed_source_type, feed_ids)},
+                {"$sort": {"_id": ASCENDING}},
+                {"$limit": limit},
+                {
+                    "$group": {
+                        "_id": None,
+                        "feed_ids": {"$push": "$_id"},
+                        "updated_on": {"$max": "$catalogue_updated_on"},
+                    }
+                },
+            ]
+        )
+        versions = [CataloguePageVersion(version["feed_ids"], version["updated_on"]) async for version in result]
+        return versions[0] if len(versions) > 0 else CataloguePageVersion([], None)
 
     async def get(self, feed_id: str) -> Feed:
         result = await self.feeds_collection.find_one({"_id": ObjectId(feed_id)})
         if result is None:
             raise Exception(f"Feed with id {feed_id} not found.")
-        return Feed.parse_obj(result)
+        return Feed.from_document(result)
 
     async def get_active_feeds(self) -> List[Feed]:
         """Find the Feed entities that are actively used."""
         result = self.feeds_collection.find({"number_of_subscriptions": {"$gt": 0}})
-        return [Feed.parse_obj(feed) async for feed in result]
+        return [Feed.from_document(feed) async for feed in result]
+
+    async def get_due_feeds(self, now: datetime) -> List[Feed]:
+        """Find the Feed entities that are actively used and due for a refresh."""
+        result = self.feeds_collection.find(
+            {
+                "number_of_subscriptions": {"$gt": 0},
+                "$or": [{"next_refresh_on": None}, {"next_refresh_on": {"$lte": now}}],
+            }
+        )
+        return [Feed.from_document(feed) async for feed in result]
 
 
 class FeedItemRepository:
+    indexes = [
+        IndexModel([("feed_id", ASCENDING)]),
+        IndexModel([("last_seen", ASCENDING)]),
+        IndexModel([("created_on", ASCENDING)]),
+    ]
+
     def __init__(self, database: AsyncIOMotorDatabase):
         self.feed_items_collection = database["feed_items"]
 
@@ -238,9 +620,19 @@ class FeedItemRepository:
 
     async def fetch_all_for_feed(self, feed: Feed) -> List[FeedItem]:
         result = self.feed_items_collection.find({"feed_id": feed.feed_id})
-        return [FeedItem.parse_obj(feed_item) async for feed_item in result]
+        return [FeedItem.from_document(feed_item) async for feed_item in result]
 
-    async def count_all_for_feed(self, feed: Feed) -> int:
+    async def fetch_links_for_feed(self, feed: Feed) -> List[FeedItemLink]:
+        result = self.feed_items_collection.find({"feed_id": feed.feed_id}, projection=projection_of(FeedItemLink))
+        return [FeedItemLink.from_document(feed_item) async for feed_item in result]
+
+    async def fetch_titles_created_since(self, since: datetime) -> List[FeedItemTitle]:
+        result = self.feed_items_collection.find(
+            {"created_on": {"$gte": since}}, projection=projection_of(FeedItemTitle)
+        )
+        return [FeedItemTitle.from_document(feed_item) async for feed_item in result]
+
+    async def count_all_for_feed(self, feed: Union[Feed, FeedItemCount]) -> int:
         return await self.feed_items_collection.count_documents({"feed_id": feed.feed_id})
 
     async def upsert_many(self, feed_items: List[FeedItem]) -> List[FeedItem]:
@@ -253,79 +645,317 @@ class FeedItemRepository:
             await self.feed_items_collection.bulk_write(requests)
         return feed_items
 
-    async def delete_older_than(self, before: datetime) -> int:
-        response = await self.feed_items_collection.delete_many({"last_seen": {"$lt": before}})
+    async def touch_last_seen(self, feed_item_ids: List[ObjectId], last_seen: datetime) -> int:
+        """Sets last_seen of the feed items with one update, returns the number of feed items updated."""
+        if len(feed_item_ids) == 0:
+            return 0
+        result = await self.feed_items_collection.update_many(
+            {"_id": {"$in": list(set(feed_item_ids))}}, {"$set": {"last_seen": last_seen}}
+        )
+        return result.modified_count
+
+    async def update_changed_many(self, feed_items: List[FeedItem]) -> List[FeedItem]:
+        """Writes only the changed fields of the feed items."""
+        await _update_changed_fields(
+            self.feed_items_collection, [(feed_item.feed_item_id, feed_item) for feed_item in feed_items]
+        )
+        return feed_items
+
+    async def delete_older_than(self, feed: FeedItemCount, before: datetime, keep_referenced: bool = False) -> int:
+        """
+        Delete the items of the feed that were last seen before before. With keep_referenced the items that news items
+        still refer to are kept, a lookup per item finds them instead of reading all the referenced ids.
+        """
+        search_filter: Dict[str, Any] = {"feed_id": feed.feed_id, "last_seen": {"$lt": before}}
+        if keep_referenced:
+            result = self.feed_items_collection.aggregate(
+                [
+                    {"$match": search_filter},
+                    {
+                        "$lookup": {
+                            "from": "news_items",
+                            "let": {"feed_item_id": "$_id"},
+                            "pipeline": [
+                                {"$match": {"$expr": {"$eq": ["$feed_item_id", "$$feed_item_id"]}}},
+                                {"$limit": 1},
+                                {"$project": {"_id": 1}},
+                            ],
+                            "as": "_news_items",
+                        }
+                    },
+                    {"$match": {"_news_items": []}},
+                    {"$project": {"_id": 1}},
+                ]
+            )
+            search_filter = {"_id": {"$in": [feed_item["_id"] async for feed_item in result]}}
+        response = await self.feed_items_collection.delete_many(search_filter)
         return response.deleted_count
 
 
 class NewsItemRepository:
-    def __init__(self, database: AsyncIOMotorDatabase):
+    shared_fields = {"feed_title", "description", "link"}
+    indexes = [
+        IndexModel([("user_id", ASCENDING), ("is_read", ASCENDING), ("published", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("feed_id", ASCENDING), ("user_id", ASCENDING), ("is_read", ASCENDING)]),
+        IndexModel([("feed_item_id", ASCENDING), ("user_id", ASCENDING)]),
+        IndexModel([("is_read", ASCENDING), ("is_read_on", ASCENDING)]),
+    ]
+
+    def __init__(self, database: AsyncIOMotorDatabase, storage: NewsItemStorage = NewsItemStorage.DOCUMENT):
         self.database = database
         self.news_item_collection = database["news_items"]
+        self.storage = storage
 
     async def count(self, search_filter: Dict[str, Any]) -> int:
         """Count the number of documents in the collection."""
         return await self.news_item_collection.count_documents(search_filter)
 
+    def _to_document(self, news_item: NewsItem) -> Dict[str, Any]:
+        if self.storage == NewsItemStorage.REFERENCE:
+            return news_item.dict(by_alias=True, exclude=self.shared_fields)
+        return news_item.dict(by_alias=True)
+
+    def _find(
+        self,
+        search_filter: Dict[str, Any],
+        sort: Optional[List[Tuple[str, int]]] = None,
+        skip: int = 0,
+        limit: int = 0,
+        projection: Optional[Dict[str, int]] = None,
+    ) -> Any:
+        """
+        Cursor over the news item documents, with the shared fields joined in for the REFERENCE storage. A projection
+        without shared fields needs no join.
+        """
+        if self.storage == NewsItemStorage.DOCUMENT or (
+            projection is not None and self.shared_fields.isdisjoint(projection)
+        ):
+            cursor = self.news_item_collection.find(search_filter, sort=sort, projection=projection)
+            if skip > 0:
+                cursor = cursor.skip(skip)
+            if limit > 0:
+                cursor = cursor.limit(limit)
+            return cursor
+
+        pipeline: List[Dict[str, Any]] = [{"$match": search_filter}]
+        if sort is not None:
+            pipeline.append({"$sort": dict(sort)})
+        if skip > 0:
+            pipeline.append({"$skip": skip})
+        if limit > 0:
+            pipeline.append({"$limit": limit})
+        pipeline.extend(
+            [
+                {
+                    "$lookup": {
+                        "from": "feed_items",
+                        "localField": "feed_item_id",
+                        "foreignField": "_id",
+                        "as": "_feed_item",
+                    }
+                },
+                {"$lookup": {"from": "feeds", "localField": "feed_id", "foreignField": "_id", "as": "_feed"}},
+                {
+                    # Documents stored with the DOCUMENT storage keep their own values.
+                    "$addFields": {
+                        "description": {
+                            "$ifNull": [
+                                "$description",
+                                {"$ifNull": [{"$arrayElemAt": ["$_feed_item.description", 0]}, ""]},
+                            ]
+                        },
+                        "link": {"$ifNull": ["$link", {"$arrayElemAt": ["$_feed_item.link", 0]}]},
+                        "feed_title": {
+                            "$ifNull": ["$feed_title", {"$ifNull": [{"$arrayElemAt": ["$_feed.title", 0]}, ""]}]
+                        },
+                    }
+                },
+                {"$project": projection if projection is not None else {"_feed_item": 0, "_feed": 0}},
+            ]
+        )
+        return self.news_item_collection.aggregate(pipeline)
+
     async def upsert_many(self, news_items: List[NewsItem]) -> List[NewsItem]:
         if len(news_items) > 0:
             replace_requests = [
-                ReplaceOne({"_id": news_item.news_item_id}, news_item.dict(by_alias=True), True)
+                ReplaceOne({"_id": news_item.news_item_id}, self._to_document(news_item), True)
                 for news_item in news_items
             ]
             await self.news_item_collection.bulk_write(replace_requests)
         return news_items
 
     async def upsert(self, news_item: NewsItem) -> NewsItem:
-        await self.news_item_collection.replace_one(
-            {"_id": news_item.news_item_id}, news_item.dict(by_alias=True), True
+        await self.news_item_collection.replace_one({"_id": news_item.news_item_id}, self._to_document(news_item), True)
+        return news_item
+
+    def _excluded_from_update(self) -> AbstractSet[str]:
+        return self.shared_fields if self.storage == NewsItemStorage.REFERENCE else frozenset()
+
+    async def update_changed(self, news_item: NewsItem) -> NewsItem:
+        """Writes only the changed fields of the news item."""
+        await _update_changed_fields(
+            self.news_item_collection, [(news_item.news_item_id, news_item)], self._excluded_from_update()
         )
         return news_item
 
+    async def update_changed_many(self, news_items: Sequence[Union[NewsItem, NewsItemAlternates]]) -> None:
+        await _update_changed_fields(
+            self.news_item_collection,
+            [(news_item.news_item_id, news_item) for news_item in news_items],
+            self._excluded_from_update(),
+        )
+
+    @property
+    def refers_to_feed_items(self) -> bool:
+        """If the news items refer to the feed items for their shared fields, those feed items may not be deleted."""
+        return self.storage == NewsItemStorage.REFERENCE
+
     async def delete_user_feed(self, user: User, feed: Feed) -> int:
         result = await self.news_item_collection.delete_many({"user_id": user.user_id, "feed_id": feed.feed_id})
         return result.deleted_count
 
-    async def fetch_items(self, user: User, limit: int) -> List[NewsItem]:
-        result = self.news_item_collection.find(
-            {"user_id": user.user_id, "is_read": False}, sort=[("published", DESCENDING)]
-        ).limit(limit)
+    def items_cursor(self, user: User, limit: int) -> Any:
+        """Cursor over the unread news item documents of the user, for reading or streaming them."""
+        return self._find({"user_id": user.user_id, "is_read": False}, sort=[("published", DESCENDING)], limit=limit)
 
-        return [NewsItem.parse_obj(item) async for item in result]
+    def read_items_cursor(self, user: User, offset: int, limit: int) -> Any:
+        return self._find(
+            {"user_id": user.user_id, "is_read": True},
+            sort=[("published", DESCENDING), ("_id", DESCENDING)],
+            skip=offset,
+            limit=limit,
+        )
+
+    def read_page_cursor(self, user: User, token: Optional[str], limit: int) -> Any:
+        """Cursor over the read news item documents after the token. An invalid token raises right away."""
+        search_filter: Dict[str, Any] = {"user_id": user.user_id, "is_read": True}
+        if token is not None:
+            search_filter.update(keyset_filter("published", token, DESCENDING))
+        return self._find(search_filter, sort=[("published", DESCENDING), ("_id", DESCENDING)], limit=limit)
+
+    async def fetch_items(self, user: User, limit: int) -> List[NewsItem]:
+        return [NewsItem.from_document(item) async for item in self.items_cursor(user, limit)]
 
     async def fetch_read_items(self, user: User, offset: int, limit: int) -> List[NewsItem]:
-        result = (
-            self.news_item_collection.find(
-                {"user_id": user.user_id, "is_read": True}, sort=[("published", DESCENDING), ("_id", DESCENDING)]
-            )
-            .skip(offset)
-            .limit(limit)
-        )
-        return [NewsItem.parse_obj(item) async for item in result]
+        return [NewsItem.from_document(item) async for item in self.read_items_cursor(user, offset, limit)]
+
+    async def fetch_read_page(self, user: User, token: Optional[str], limit: int) -> QueryResult:
+        items = [NewsItem.from_document(item) async for item in self.read_page_cursor(user, token, limit)]
+        next_token = None
+        if len(items) == limit:
+            next_token = encode_token(items[-1].published, items[-1].news_item_id)
+        return QueryResult(items=items, token=next_token)
 
     async def fetch_by_id(self, news_item_id: str) -> Optional[NewsItem]:
-        result = await self.news_item_collection.find_one({"_id": ObjectId(news_item_id)})
-        if result is None:
+        result = [item async for item in self._find({"_id": ObjectId(news_item_id)}, limit=1)]
+        if len(result) == 0:
             return None
-        return NewsItem.parse_obj(result)
-
-    async def fetch_all_non_read_for_feed(self, feed: Feed, user: User) -> List[NewsItem]:
-        result = self.news_item_collection.find({"feed_id": feed.feed_id, "is_read": False, "user_id": user.user_id})
-        return [NewsItem.parse_obj(item) async for item in result]
-
-    async def mark_items_as_read(self, user: User, news_item_ids: List[str]) -> None:
-        await self.news_item_collection.update_many(
-            {"_id": {"$in": [PyObjectId(news_item_id) for news_item_id in news_item_ids]}, "user_id": user.user_id},
+        return NewsItem.from_document(result[0])
+
+    async def fetch_non_read_alternates_for_feed(
+        self, feed: Feed, user: Union[User, UserReference]
+    ) -> List[NewsItemAlternates]:
+        result = self._find(
+            {"feed_id": feed.feed_id, "is_read": False, "user_id": user.user_id},
+            projection=projection_of(NewsItemAlternates),
+        )
+        return [NewsItemAlternates.from_document(item) async for item in result]
+
+    async def fetch_non_read_alternates_for_feed_items(
+        self, user: Union[User, UserReference], feed_item_ids: List[ObjectId]
+    ) -> List[NewsItemAlternates]:
+        result = self._find(
+            {"feed_item_id": {"$in": feed_item_ids}, "is_read": False, "user_id": user.user_id},
+            projection=projection_of(NewsItemAlternates),
+        )
+        return [NewsItemAlternates.from_document(item) async for item in result]
+
+    async def mark_items_as_read(self, user: User, news_item_ids: List[str]) -> int:
+        """Marks the unread news items as read, returns the number of news items that were unread."""
+        result = await self.news_item_collection.update_many(
+            {
+                "_id": {"$in": [PyObjectId(news_item_id) for news_item_id in news_item_ids]},
+                "user_id": user.user_id,
+                "is_read": False,
+            },
             {"$set": {"is_read": True, "is_read_on": datetime.now(tz=pytz.utc)}},
         )
+        return result.modified_count
 
     async def delete_read_items_older_than(self, before: datetime) -> int:
         result = await self.news_item_collection.delete_many({"is_read": True, "is_read_on": {"$lt": before}})
         return result.deleted_count
 
 
+@dataclass
+class _CachedUser:
+    user: User
+    expires_on: float
+
+
+class UserCache:
+    """
+    Users by user id and token, kept for at most ttl_seconds and at most max_entries at once. The users are copied in
+    and out of the cache, so the callers can change the user they got without changing the cache. The entries are
+    kept in the order they expire, expired entries are dropped when a user is put and the entry that expires first
+    makes room when the cache is full.
+
+    Another process, like the refresh of the feeds, changes number_of_unread_items without invalidating this cache.
+    Read the counter with fetch_number_of_unread_items instead of from a cached user.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._users: "OrderedDict[Tuple[str, str], _CachedUser]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, user_id: Union[str, ObjectId], token: str) -> Optional[User]:
+        key = (str(user_id), token)
+        cached_user = self._users.get(key)
+        if cached_user is None:
+            return None
+        if cached_user.expires_on < time.monotonic():
+            del self._users[key]
+            return None
+        return cached_user.user.copy(deep=True)
+
+    def _drop_expired(self, now: float) -> None:
+        while self._users:
+            key, cached_user = next(iter(self._users.items()))
+            if cached_user.expires_on >= now:
+                return
+            del self._users[key]
+
+    def put(self, user_id: Union[str, ObjectId], token: str, user: User) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        self._drop_expired(now)
+        key = (str(user_id), token)
+        self._users.pop(key, None)
+        while len(self._users) >= self.max_entries:
+            self._users.popitem(last=False)
+        self._users[key] = _CachedUser(user=user.copy(deep=True), expires_on=now + self.ttl_seconds)
+
+    def invalidate(self, user_id: Union[str, ObjectId]) -> None:
+        """Forget the user for all its tokens."""
+        user_id = str(user_id)
+        for key in [key for key in self._users if key[0] == user_id]:
+            del self._users[key]
+
+    def clear(self) -> None:
+        self._users.clear()
+
+
 class UserRepository:
-    def __init__(self, database: AsyncIOMotorDatabase):
+    indexes = [IndexModel([("email_address", ASCENDING)]), IndexModel([("subscribed_to", ASCENDING)])]
+    counters = frozenset({"number_of_unread_items"})
+
+    def __init__(self, database: AsyncIOMotorDatabase, user_cache: Optional[UserCache] = None):
+        self.user_cache = user_cache or UserCache(ttl_seconds=0)
         self.users_collection = database["users"]
         self.avatars = database["avatars"]
         self.feeds = database["feeds"]
@@ -338,26 +968,82 @@ class UserRepository:
         result = await self.users_collection.find_one({"email_address": email_address})
         if result is None:
             return None
-        return User.parse_obj(result)
+        return User.from_document(result)
+
+    async def fetch_number_of_unread_items(self, user_id: ObjectId) -> int:
+        """The current number of unread items of the user, never from the user cache."""
+        result = await self.users_collection.find_one({"_id": user_id}, {"number_of_unread_items": 1})
+        if result is None:
+            return 0
+        return result.get("number_of_unread_items", 0)
+
+    @classmethod
+    def _update_for(cls, user: User) -> Dict[str, Any]:
+        return _update_keeping_counters(user, cls.counters)
 
     async def upsert(self, user: User) -> User:
-        await self.users_collection.replace_one({"_id": user.user_id}, user.dict(by_alias=True), True)
+        """
+        Upsert the user. number_of_unread_items is only written for a new user, it is changed with
+        add_new_items_count and add_subscription. Assigning it on the user raises CounterAssignedException.
+        """
+        self.user_cache.invalidate(user.user_id)
+        await self.users_collection.update_one({"_id": user.user_id}, self._update_for(user), upsert=True)
         return user
 
     async def upsert_many(self, users: List[User]) -> List[User]:
+        """Upsert users, like upsert."""
         if len(users) > 0:
-            replace_requests = [ReplaceOne({"_id": user.user_id}, user.dict(by_alias=True), True) for user in users]
-            await self.users_collection.bulk_write(replace_requests)
+            for user in users:
+                self.user_cache.invalidate(user.user_id)
+            update_requests = [UpdateOne({"_id": user.user_id}, self._update_for(user), upsert=True) for user in users]
+            await self.users_collection.bulk_write(update_requests)
         return users
 
     async def add_new_items_count(self, user_id: str, new_items_count: int) -> User:
-        await self.users_collection.update_one({"_id": user_id}, {"$inc": {"number_of_unread_items": new_items_count}})
-        return User.parse_obj(await self.users_collection.find_one({"_id": user_id}))
+        """Adds new_items_count, which may be negative, to the unread items of the user. The count stays >= 0."""
+        self.user_cache.invalidate(user_id)
+        result = await self.users_collection.find_one_and_update(
+            {"_id": user_id},
+            [{"$set": {"number_of_unread_items": _add_at_least_zero("$number_of_unread_items", new_items_count)}}],
+            return_document=ReturnDocument.AFTER,
+        )
+        return User.from_document(result)
+
+    async def add_subscription(self, user_id: ObjectId, feed_id: ObjectId, new_items_count: int) -> Optional[User]:
+        """Subscribes the user to the feed with its new items, None if the user was subscribed already."""
+        self.user_cache.invalidate(user_id)
+        result = await self.users_collection.find_one_and_update(
+            {"_id": user_id, "subscribed_to": {"$ne": feed_id}},
+            {"$addToSet": {"subscribed_to": feed_id}, "$inc": {"number_of_unread_items": new_items_count}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if result is None:
+            return None
+        return User.from_document(result)
 
-    async def fetch_subscribed_to(self, feed: Feed) -> List[User]:
-        result = self.users_collection.find()
-        users = [User.parse_obj(user) async for user in result]
-        return [user for user in users if feed.feed_id in user.subscribed_to]
+    async def remove_subscription(self, user_id: ObjectId, feed_id: ObjectId) -> bool:
+        """Unsubscribes the user from the feed, False if the user was not subscribed."""
+        self.user_cache.invalidate(user_id)
+        result = await self.users_collection.update_one(
+            {"_id": user_id, "subscribed_to": feed_id}, {"$pull": {"subscribed_to": feed_id}}
+        )
+        return result.modified_count == 1
+
+    async def fetch_subscribed_to(self, feed: Feed) -> List[UserReference]:
+        result = self.users_collection.find({"subscribed_to": feed.feed_id}, {"_id": 1})
+        return [UserReference.from_document(user) async for user in result]
+
+    async def fetch_subscribed_to_feeds(self, feeds: List[Feed]) -> Dict[ObjectId, List[UserReference]]:
+        """The subscribed users per feed, for all feeds in one query."""
+        feed_ids = [feed.feed_id for feed in feeds]
+        subscribed_users: Dict[ObjectId, List[UserReference]] = {feed_id: [] for feed_id in feed_ids}
+        result = self.users_collection.find({"subscribed_to": {"$in": feed_ids}}, {"_id": 1, "subscribed_to": 1})
+        async for user in result:
+            user_reference = UserReference.from_document(user)
+            for feed_id in user["subscribed_to"]:
+                if feed_id in subscribed_users:
+                    subscribed_users[feed_id].append(user_reference)
+        return subscribed_users
 
     async def update_avatar(self, user: User, avatar_image: Optional[str]) -> Optional[Avatar]:
         if avatar_image is None:
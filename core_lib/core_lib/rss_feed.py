@@ -4,29 +4,32 @@ import threading
 from typing import List, Optional
 
 from aiohttp import ClientError, ClientSession
-from bs4 import BeautifulSoup
-import dateparser
-from lxml.etree import ElementBase, fromstring
-import pytz
+from lxml.etree import ElementBase
 
 from core_lib.application_data import repositories
-from core_lib.feed_utils import UpdateResult, upsert_new_items_for_feed
+from core_lib.date_parsing import parse_optional_datetime
+from core_lib.feed_utils import (
+    UpdateResult,
+    mark_feed_as_not_modified,
+    parse_feed_document,
+    upsert_new_items_for_feed,
+)
+from core_lib.incremental_parser import FeedFormat
 from core_lib.repositories import Feed, FeedItem, FeedSourceType
+from core_lib.scraper import Scraper, ScraperRules
 from core_lib.utils import now_in_utc, parse_description, sanitize_link
 
 log = logging.getLogger(__file__)
 
 
-def is_rss_document(text: bytes) -> bool:
-    return b"<rss" in text
+_rss_link_scraper = Scraper(ScraperRules(items="//link[@type='application/rss+xml']", fields={"href": "@href"}))
 
 
-def is_html_with_rss_ref(text: bytes) -> Optional[str]:
-    if b"<!DOCTYPE html>" in text or b"<html" in text:
-        soup = BeautifulSoup(text, "html.parser")
-        rss_links = soup.find_all("link", type="application/rss+xml")
-        if len(rss_links) == 1:
-            return rss_links[0].get("href")
+def rss_ref_of_html_page(text: bytes) -> Optional[str]:
+    """The href of the rss link of an html page, None if the page has no or more than one rss link."""
+    rss_links = _rss_link_scraper.scrape(text)
+    if len(rss_links) == 1:
+        return rss_links[0]["href"]
     return None
 
 
@@ -57,46 +60,44 @@ def rss_document_to_feed(rss_url: str, tree: ElementBase) -> Feed:
 LOCALE_LOCK = threading.Lock()
 
 
-def _parse_optional_rss_datetime(freely_formatted_datetime: Optional[str]) -> Optional[datetime]:
+def _parse_optional_rss_datetime(
+    freely_formatted_datetime: Optional[str], feed_key: Optional[str] = None
+) -> Optional[datetime]:
     """Sun, 19 May 2002 15:21:36 GMT parsing to datetime."""
-    if freely_formatted_datetime is None:
-        return None
-    in_this_tz = dateparser.parse(freely_formatted_datetime, languages=["en"])
-    if in_this_tz is None:
-        return None
-    return in_this_tz.astimezone(tz=pytz.UTC)
+    return parse_optional_datetime(freely_formatted_datetime, feed_key)
+
+
+def rss_item_to_feed_item(feed: Feed, item_element: ElementBase) -> FeedItem:
+    return FeedItem(
+        feed_id=feed.feed_id,
+        title=item_element.findtext("title"),
+        link=sanitize_link(item_element.findtext("link")),
+        description=parse_description(item_element.findtext("description")),
+        last_seen=now_in_utc(),
+        published=_parse_optional_rss_datetime(item_element.findtext("pubDate"), feed.url),
+        created_on=now_in_utc(),
+    )
 
 
 def rss_document_to_feed_items(feed: Feed, tree: ElementBase) -> List[FeedItem]:
     """Creates a list of FeedItem objects from a xml tree for the feed."""
-    item_elements = tree.findall("channel/item")
-    return [
-        FeedItem(
-            feed_id=feed.feed_id,
-            title=item_element.findtext("title"),
-            link=sanitize_link(item_element.findtext("link")),
-            description=parse_description(item_element.findtext("description")),
-            last_seen=now_in_utc(),
-            published=_parse_optional_rss_datetime(item_element.findtext("pubDate")),
-            created_on=now_in_utc(),
-        )
-        for item_element in item_elements
-    ]
+    return [rss_item_to_feed_item(feed, item_element) for item_element in tree.findall("channel/item")]
+
+
+rss_format = FeedFormat("item", rss_item_to_feed_item, rss_document_to_feed)
 
 
 async def refresh_rss_feed(session: ClientSession, feed: Feed) -> UpdateResult:
     log.info("Refreshing rss feed %s", feed)
     try:
-        async with session.get(feed.url) as xml_response:
-            rss_document = fromstring(await xml_response.read())
-            feed_from_rss = rss_document_to_feed(feed.url, rss_document)
-            feed_items_from_rss = rss_document_to_feed_items(feed, rss_document)
-
-            async with await repositories().mongo_client.start_session() as mongo_session:
-                async with mongo_session.start_transaction():
-                    update_result = await upsert_new_items_for_feed(feed, feed_from_rss, feed_items_from_rss)
-
-            return update_result
+        parsed_feed = await parse_feed_document(session, feed, rss_format)
+        if parsed_feed is None:
+            return await mark_feed_as_not_modified(feed)
+        async with await repositories().mongo_client.start_session() as mongo_session:
+            async with mongo_session.start_transaction():
+                update_result = await upsert_new_items_for_feed(feed, parsed_feed.feed, parsed_feed.feed_items)
+
+        return update_result
     except (ClientError, TimeoutError):
         log.exception("Error while refreshing feed %s", feed)
         return UpdateResult()
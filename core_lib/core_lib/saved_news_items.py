@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Optional
 
 from core_lib.application_data import repositories
-from core_lib.repositories import SavedNewsItem, User
+from core_lib.repositories import QueryResult, SavedNewsItem, User
 
 
 async def save_news_item_from_news_item(news_item_id: str, user: User) -> SavedNewsItem:
@@ -14,7 +14,7 @@ async def save_news_item_from_news_item(news_item_id: str, user: User) -> SavedN
     news_item.is_saved = True
     news_item.saved_news_item_id = saved_news_item.saved_news_item_id
     saved_news_item = await repositories().saved_news_item_repository.upsert(saved_news_item)
-    await repositories().news_item_repository.upsert(news_item)
+    await repositories().news_item_repository.update_changed(news_item)
     return saved_news_item
 
 
@@ -22,6 +22,10 @@ async def fetch_saved_news_item_for_user(user: User, offset: int, limit: int) ->
     return await repositories().saved_news_item_repository.fetch_items(user=user, offset=offset, limit=limit)
 
 
+async def fetch_saved_news_item_page_for_user(user: User, token: Optional[str], limit: int) -> QueryResult:
+    return await repositories().saved_news_item_repository.fetch_page(user=user, token=token, limit=limit)
+
+
 async def delete_saved_news_item_with_id(saved_news_item_id: str, user: User) -> None:
     saved_news_item = await repositories().saved_news_item_repository.fetch_by_id(saved_news_item_id)
     if saved_news_item is None:
@@ -30,5 +34,5 @@ async def delete_saved_news_item_with_id(saved_news_item_id: str, user: User) ->
     if news_item is not None:
         news_item.is_saved = False
         news_item.saved_news_item_id = None
-        await repositories().news_item_repository.upsert(news_item)
+        await repositories().news_item_repository.update_changed(news_item)
     await repositories().saved_news_item_repository.delete_saved_news_item(saved_news_item_id, user)
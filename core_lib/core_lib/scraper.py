@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from lxml.etree import XPath
+from lxml.html import document_fromstring
+
+Scraped = Dict[str, Optional[str]]
+
+
+def has_class(class_name: str) -> str:
+    """An xpath predicate for elements with class_name in their class attribute, like the css selector .class_name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+@dataclass(frozen=True)
+class ScraperRules:
+    """
+    The rules to scrape a site with. The items xpath selects the elements of the items in the page, the xpath of
+    each field is evaluated on an item element and gives the text of the field.
+    """
+
+    items: str
+    fields: Dict[str, str]
+
+
+class Scraper:
+    """
+    Scrapes html pages with the rules of a site. The xpath expressions of the rules are compiled once, when the
+    scraper is made. A field that is not in an item, or is empty, is scraped as None.
+    """
+
+    def __init__(self, rules: ScraperRules) -> None:
+        self.rules = rules
+        self._items = XPath(rules.items)
+        self._fields = [
+            (name, XPath(f"string({expression})", smart_strings=False)) for name, expression in rules.fields.items()
+        ]
+
+    def scrape(self, html_source: Union[str, bytes]) -> List[Scraped]:
+        if not html_source.strip():
+            return []
+        document = document_fromstring(html_source)
+        return [
+            {name: field(item_element) or None for name, field in self._fields}
+            for item_element in self._items(document)
+        ]
@@ -0,0 +1,40 @@
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from core_lib.application_data import repositories
+from core_lib.repositories import Feed, UserReference
+
+
+class SubscriptionCache:
+    """
+    The subscribed users per feed during a refresh run. The subscriptions of all the refreshed feeds are fetched with
+    one query at the start of the run, feeds that are not prefetched are looked up one by one.
+    """
+
+    def __init__(self) -> None:
+        self._subscribed_users: Dict[ObjectId, List[UserReference]] = {}
+
+    async def prefetch(self, feeds: List[Feed]) -> None:
+        self._subscribed_users.update(await repositories().user_repository.fetch_subscribed_to_feeds(feeds))
+
+    async def subscribed_to(self, feed: Feed) -> List[UserReference]:
+        subscribed_users = self._subscribed_users.get(feed.feed_id)
+        if subscribed_users is None:
+            return await repositories().user_repository.fetch_subscribed_to(feed)
+        return subscribed_users
+
+    def invalidate(self, feed_id: Optional[ObjectId] = None) -> None:
+        """Forget the subscriptions of a feed, or of all feeds if no feed_id is given."""
+        if feed_id is None:
+            self._subscribed_users.clear()
+        else:
+            self._subscribed_users.pop(feed_id, None)
+
+
+_subscription_cache = SubscriptionCache()
+
+
+def subscription_cache() -> SubscriptionCache:
+    """The subscription cache shared by all the feed refreshes in this process."""
+    return _subscription_cache
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+import random
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+import zlib
+
+from bson import ObjectId
+
+from core_lib.repositories import FeedItem, FeedItemTitle
+from core_lib.utils import as_naive_utc
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+brackets_re = re.compile(r"\[.*?]")
+whitespace_re = re.compile(r"\s+")
+
+BandKey = Tuple[int, Tuple[int, ...]]
+
+
+@dataclass
+class _IndexEntry:
+    feed_id: ObjectId
+    band_keys: List[BandKey]
+    added_on: datetime
+
+
+class TitleIndex:
+    """
+    Locality sensitive hash index (MinHash over character shingles) of feed item titles.
+
+    Titles sharing a band of their MinHash signature end up in the same bucket, so finding the candidates for a
+    similar title costs a lookup per band instead of a comparison with every indexed title. Candidates are likely,
+    not certainly, similar; confirm them with an exact comparison.
+    """
+
+    def __init__(self, number_of_bands: int = 16, rows_per_band: int = 2, shingle_size: int = 3, seed: int = 1):
+        generator = random.Random(seed)
+        self.number_of_bands = number_of_bands
+        self.rows_per_band = rows_per_band
+        self.shingle_size = shingle_size
+        self._permutations = [
+            (generator.randint(1, MERSENNE_PRIME - 1), generator.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(number_of_bands * rows_per_band)
+        ]
+        self._buckets: Dict[BandKey, Set[ObjectId]] = defaultdict(set)
+        self._entries: Dict[ObjectId, _IndexEntry] = {}
+        self.is_seeded = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _shingles(self, title: str) -> Set[int]:
+        normalized = whitespace_re.sub(" ", brackets_re.sub("", title)).strip().lower()
+        if len(normalized) <= self.shingle_size:
+            return {zlib.crc32(normalized.encode("utf-8"))}
+        return {
+            zlib.crc32(normalized[index : index + self.shingle_size].encode("utf-8"))
+            for index in range(len(normalized) - self.shingle_size + 1)
+        }
+
+    def _band_keys(self, title: str) -> List[BandKey]:
+        shingles = self._shingles(title)
+        signature = [
+            min(((multiplier * shingle + increment) % MERSENNE_PRIME) & MAX_HASH for shingle in shingles)
+            for multiplier, increment in self._permutations
+        ]
+        return [
+            (band, tuple(signature[band * self.rows_per_band : (band + 1) * self.rows_per_band]))
+            for band in range(self.number_of_bands)
+        ]
+
+    def add(self, feed_item_id: ObjectId, feed_id: ObjectId, title: str, added_on: datetime) -> None:
+        if feed_item_id in self._entries:
+            return
+        band_keys = self._band_keys(title)
+        for band_key in band_keys:
+            self._buckets[band_key].add(feed_item_id)
+        self._entries[feed_item_id] = _IndexEntry(feed_id=feed_id, band_keys=band_keys, added_on=as_naive_utc(added_on))
+
+    def add_feed_items(self, feed_items: Sequence[Union[FeedItem, FeedItemTitle]]) -> None:
+        for feed_item in feed_items:
+            self.add(feed_item.feed_item_id, feed_item.feed_id, feed_item.title, feed_item.created_on)
+
+    def remove(self, feed_item_id: ObjectId) -> None:
+        entry = self._entries.pop(feed_item_id, None)
+        if entry is None:
+            return
+        for band_key in entry.band_keys:
+            bucket = self._buckets[band_key]
+            bucket.discard(feed_item_id)
+            if len(bucket) == 0:
+                del self._buckets[band_key]
+
+    def prune(self, before: datetime) -> int:
+        """Remove the entries added before, returns the number of removed entries."""
+        before = as_naive_utc(before)
+        expired = [feed_item_id for feed_item_id, entry in self._entries.items() if entry.added_on < before]
+        for feed_item_id in expired:
+            self.remove(feed_item_id)
+        return len(expired)
+
+    def candidates(self, title: str, exclude_feed_id: Optional[ObjectId] = None) -> Set[ObjectId]:
+        """Ids of the feed items with a title that is likely similar to title, excluding the items of a feed."""
+        found: Set[ObjectId] = set()
+        for band_key in self._band_keys(title):
+            found.update(self._buckets.get(band_key, ()))
+        return {feed_item_id for feed_item_id in found if self._entries[feed_item_id].feed_id != exclude_feed_id}
+
+
+_title_index = TitleIndex()
+
+
+def title_index() -> TitleIndex:
+    """The title index shared by all the feed refreshes in this process."""
+    return _title_index
@@ -0,0 +1,54 @@
+import enum
+from typing import Any, Callable, Dict, Generic, List, Mapping, Optional, Tuple, Type, TypeVar
+
+from pydantic.fields import ModelField, SHAPE_SINGLETON
+from pydantic.main import BaseModel
+
+Model = TypeVar("Model", bound=BaseModel)
+
+object_setattr = object.__setattr__
+
+
+def _coercion_for(field: ModelField) -> Optional[Callable[[Any], Any]]:
+    """Mongo returns enums as their values, these are converted back. Other values are stored as they are read."""
+    if isinstance(field.type_, type) and issubclass(field.type_, enum.Enum) and field.shape == SHAPE_SINGLETON:
+        return field.type_
+    return None
+
+
+class TrustedDecoder(Generic[Model]):
+    """
+    Builds models from documents that were written by this application, without validating them. The steps per field
+    (alias, default, coercion) are worked out once per model class. A document that misses a required field is
+    validated as usual.
+    """
+
+    def __init__(self, model_class: Type[Model]) -> None:
+        self.model_class = model_class
+        self._fields: List[Tuple[str, str, ModelField, Optional[Callable[[Any], Any]]]] = [
+            (name, field.alias, field, _coercion_for(field)) for name, field in model_class.__fields__.items()
+        ]
+
+    def __call__(self, document: Mapping[str, Any]) -> Model:
+        values: Dict[str, Any] = {}
+        fields_set = set()
+        for name, alias, field, coercion in self._fields:
+            if alias in document:
+                value = document[alias]
+            elif name in document:
+                value = document[name]
+            elif field.required:
+                return self.model_class.parse_obj(document)
+            else:
+                values[name] = field.get_default()
+                continue
+            if coercion is not None and value is not None:
+                value = coercion(value)
+            values[name] = value
+            fields_set.add(name)
+
+        model = self.model_class.__new__(self.model_class)
+        object_setattr(model, "__dict__", values)
+        object_setattr(model, "__fields_set__", fields_set)
+        model._init_private_attributes()  # pylint: disable=protected-access
+        return model
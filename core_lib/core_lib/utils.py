@@ -9,6 +9,13 @@ def now_in_utc() -> datetime:
     return datetime.now(tz=pytz.utc)
 
 
+def as_naive_utc(moment: datetime) -> datetime:
+    """Mongo hands out naive utc datetimes, freshly parsed items are tz aware."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(pytz.utc).replace(tzinfo=None)
+
+
 def bytes_to_str_base64(bytes_to_decode: bytes) -> str:
     return b64encode(bytes_to_decode).decode("utf-8")
 
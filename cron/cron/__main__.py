@@ -7,7 +7,9 @@ import sentry_sdk
 
 import core_lib
 from core_lib.app_config import AppConfig
-from core_lib.application_data import Repositories
+from core_lib.application_data import Repositories, repositories
+from core_lib.parse_executor import shutdown_parse_executor
+from core_lib.repositories import NewsItemStorage
 from cron.maintenance_api import maintenance_router
 
 logging.root.setLevel(logging.DEBUG)
@@ -26,5 +28,14 @@ async def startup_event() -> None:
     timeout = ClientTimeout(total=290)
     client_session = ClientSession(timeout=timeout)
     core_lib.application_data._repositories = Repositories(
-        AsyncIOMotorClient(AppConfig.mongodb_url()), AppConfig.mongo_db(), client_session
+        AsyncIOMotorClient(AppConfig.mongodb_url()),
+        AppConfig.mongo_db(),
+        client_session,
+        NewsItemStorage(AppConfig.news_item_storage()),
     )
+    await repositories().reconcile_indexes()
+
+
+@app.on_event("shutdown")
+def shutdown_event() -> None:
+    shutdown_parse_executor()
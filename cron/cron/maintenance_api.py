@@ -1,26 +1,58 @@
+from typing import Dict, List
+
 from fastapi import APIRouter
 from pydantic.main import BaseModel
 
+from core_lib import metrics
+from core_lib.application_data import repositories
 from core_lib.feed import delete_read_items, refresh_all_feeds
+from core_lib.indexes import explain_queries, IndexReconciliation, QueryPlan, repository_query_shapes
 
 maintenance_router = APIRouter()
 
 
 class RefreshAllFeedsResponse(BaseModel):
     number_of_feeds_refreshed: int
+    metrics: Dict[str, int]
 
 
 class DeleteReadResponse(BaseModel):
     number_of_items_deleted: int
 
 
+class ReconcileIndexesResponse(BaseModel):
+    reconciliations: List[IndexReconciliation]
+
+
+class ExplainQueriesResponse(BaseModel):
+    query_plans: List[QueryPlan]
+    queries_without_index: List[str]
+
+
 @maintenance_router.get("/maintenance/refresh-feeds", tags=["maintenance"])
-async def do_refresh_all_feeds() -> RefreshAllFeedsResponse:
-    number_of_refreshed_feeds = await refresh_all_feeds()
-    return RefreshAllFeedsResponse(number_of_feeds_refreshed=number_of_refreshed_feeds)
+async def do_refresh_all_feeds(force: bool = False) -> RefreshAllFeedsResponse:
+    number_of_refreshed_feeds = await refresh_all_feeds(force=force)
+    return RefreshAllFeedsResponse(number_of_feeds_refreshed=number_of_refreshed_feeds, metrics=metrics.counters())
 
 
 @maintenance_router.get("/maintenance/delete-read-items", tags=["maintenance"])
 async def delete_read_feed_items() -> DeleteReadResponse:
     number_of_deleted_items = await delete_read_items()
     return DeleteReadResponse(number_of_items_deleted=number_of_deleted_items)
+
+
+@maintenance_router.get("/maintenance/reconcile-indexes", tags=["maintenance"])
+async def reconcile_indexes(drop_undeclared: bool = False) -> ReconcileIndexesResponse:
+    reconciliations = await repositories().reconcile_indexes(drop_undeclared=drop_undeclared)
+    return ReconcileIndexesResponse(reconciliations=reconciliations)
+
+
+@maintenance_router.get("/maintenance/explain-queries", tags=["maintenance"])
+async def explain_repository_queries() -> ExplainQueriesResponse:
+    query_plans = await explain_queries(repositories().database, repository_query_shapes())
+    return ExplainQueriesResponse(
+        query_plans=query_plans,
+        queries_without_index=[
+            f"{query_plan.collection}: {query_plan.name}" for query_plan in query_plans if not query_plan.uses_index
+        ],
+    )
@@ -37,7 +37,7 @@ interface OldNewsState {
 
 class OldNews extends React.Component<OldNewsProps, OldNewsState> {
     api: Api
-    offset = 0
+    token: string | null = null
     limit = 30
     item_control: ItemControl | null = null
     scrollable_view_items: ScrollableItem[] = []
@@ -67,12 +67,13 @@ class OldNews extends React.Component<OldNewsProps, OldNewsState> {
         }
         this.setState({ error: null })
 
-        const endpoint = `/news-items/read?fetch_offset=${this.offset}&fetch_limit=${this.limit}`
+        const token = this.token === null ? "" : `&fetch_token=${encodeURIComponent(this.token)}`
+        const endpoint = `/news-items/read?fetch_limit=${this.limit}${token}`
         this.api
             .get<GetNewsItemsResponse>(endpoint)
             .then((newsItems) => {
-                this.offset += newsItems[1].news_items.length
-                this.no_more_items = newsItems[1].news_items.length < this.limit
+                this.token = newsItems[1].token || null
+                this.no_more_items = this.token === null
                 this.setState({
                     news_items: this.state.news_items.concat(newsItems[1].news_items),
                     number_of_unread_items: newsItems[1].number_of_unread_items,
@@ -87,7 +88,8 @@ class OldNews extends React.Component<OldNewsProps, OldNewsState> {
 
     refresh(): void {
         this.setState({ news_items: [], is_loading: true })
-        this.offset = 0
+        this.token = null
+        this.no_more_items = false
         this.fetch_news_items()
     }
 
@@ -38,7 +38,7 @@ interface SavedNewsState {
 
 class SavedNews extends React.Component<SavedNewsProps, SavedNewsState> {
     api: Api
-    offset = 0
+    token: string | null = null
     limit = 30
     item_control: ItemControl | null = null
     scrollable_view_items: ScrollableItem[] = []
@@ -68,15 +68,16 @@ class SavedNews extends React.Component<SavedNewsProps, SavedNewsState> {
 
         this.setState({ error: null })
 
-        const endpoint = `/saved-news?fetch_offset=${this.offset}&fetch_limit=${this.limit}`
+        const token = this.token === null ? "" : `&fetch_token=${encodeURIComponent(this.token)}`
+        const endpoint = `/saved-news?fetch_limit=${this.limit}${token}`
         this.api
             .get<ScrollableItemsResponse<SavedNewsItem>>(endpoint)
             .then((saved_items_response) => {
-                this.offset += saved_items_response[1].items.length
+                this.token = saved_items_response[1].token || null
                 saved_items_response[1].items.forEach((item) => (item.is_saved = true))
                 this.setState({
                     saved_news_items: this.state.saved_news_items.concat(saved_items_response[1].items),
-                    no_more_items: saved_items_response[1].items.length < this.limit,
+                    no_more_items: this.token === null,
                 })
             })
             .catch((reason: Error) => this.setState({ error: reason.message }))
@@ -96,8 +97,8 @@ class SavedNews extends React.Component<SavedNewsProps, SavedNewsState> {
     }
 
     refresh(): void {
-        this.setState({ saved_news_items: [], is_loading: true })
-        this.offset = 0
+        this.setState({ saved_news_items: [], is_loading: true, no_more_items: false })
+        this.token = null
         this.fetch_saved_news_items()
     }
 
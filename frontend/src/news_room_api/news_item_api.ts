@@ -22,6 +22,7 @@ export interface NewsItem {
 export interface GetNewsItemsResponse {
     news_items: NewsItem[]
     number_of_unread_items: number
+    token?: string | null
 }
 
 export interface GetReadNewsItemsResponse {
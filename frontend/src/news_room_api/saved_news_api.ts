@@ -25,4 +25,5 @@ export interface UpsertSavedNewsItemResponse {
 
 export interface ScrollableItemsResponse<T> {
     items: [T]
+    token?: string | null
 }
@@ -1,5 +1,6 @@
 import * as React from "react"
 import {
+    Button,
     createStyles,
     Paper,
     Table,
@@ -20,7 +21,7 @@ import { Api } from "../../Api"
 import { withSnackbar, WithSnackbarProps } from "notistack"
 import NewRssFeed from "./new_rss_feed"
 import ImageAndTitle from "./feed_image_and_title"
-import { GetFeedsResponse } from "../model"
+import { FeedCatalogueResponse, GetFeedsResponse } from "../model"
 import SubscribeUnsubscribeButton from "./subscribe_unsubscribe_button"
 import LinearProgress from "@material-ui/core/LinearProgress"
 import { withAuthHandling, WithAuthHandling } from "../../WithAuthHandling"
@@ -51,13 +52,17 @@ interface SubscribeResponse {
 interface MangeSubscriptionsState {
     feedsForUser: GetFeedsResponse[]
     isLoading: boolean
+    hasMoreFeeds: boolean
 }
 
 class ManageSubscriptions extends React.Component<ManageSubscriptionsProps, MangeSubscriptionsState> {
     api: Api
+    token: string | null = null
+    limit = 50
     state: MangeSubscriptionsState = {
         feedsForUser: [],
         isLoading: false,
+        hasMoreFeeds: false,
     }
 
     constructor(props: ManageSubscriptionsProps) {
@@ -70,12 +75,21 @@ class ManageSubscriptions extends React.Component<ManageSubscriptionsProps, Mang
         this.fetchAvailableFeeds()
     }
 
+    /* Fetches the next page of the catalogue, the pages after it are fetched on demand with "Show more feeds". */
     fetchAvailableFeeds(): void {
+        if (this.state.isLoading) {
+            return
+        }
         this.setState({ isLoading: true })
+        const tokenParameter = this.token === null ? "" : `&fetch_token=${encodeURIComponent(this.token)}`
         this.api
-            .get<[GetFeedsResponse]>("/feeds")
-            .then((feedsWithInfo) => {
-                this.setState({ feedsForUser: feedsWithInfo[1] })
+            .get<FeedCatalogueResponse>(`/feeds/catalogue?fetch_limit=${this.limit}${tokenParameter}`)
+            .then((page) => {
+                this.token = page[1].token || null
+                this.setState({
+                    feedsForUser: this.state.feedsForUser.concat(page[1].feeds),
+                    hasMoreFeeds: this.token !== null,
+                })
             })
             .catch((reason: Error) => console.error(reason))
             .finally(() => this.setState({ isLoading: false }))
@@ -185,6 +199,17 @@ class ManageSubscriptions extends React.Component<ManageSubscriptionsProps, Mang
                                     </Table>
                                 </TableContainer>
                             </Grid>
+                            {this.state.hasMoreFeeds && (
+                                <Grid item xs={12}>
+                                    <Button
+                                        variant="outlined"
+                                        disabled={this.state.isLoading}
+                                        onClick={(): void => this.fetchAvailableFeeds()}
+                                    >
+                                        Show more feeds
+                                    </Button>
+                                </Grid>
+                            )}
                         </Grid>
                     </div>
                 </div>
@@ -3,6 +3,11 @@ export interface GetFeedsResponse {
     feed: Feed
 }
 
+export interface FeedCatalogueResponse {
+    feeds: GetFeedsResponse[]
+    token?: string
+}
+
 export interface Feed {
     _id: string
     url: string
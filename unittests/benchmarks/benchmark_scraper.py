@@ -0,0 +1,72 @@
+"""
+Compares scraping the sample html pages with BeautifulSoup (html.parser), as the scrapers used to, and with the
+lxml scraper rules.
+
+Run from the unittests directory with: python -m benchmarks.benchmark_scraper
+"""
+
+import time
+from typing import Any, Callable, List, Optional
+
+from bs4 import BeautifulSoup
+
+from core_lib.gemeente_groningen import gemeente_groningen_parser
+from core_lib.repositories import Feed
+from core_lib.rss_feed import rss_ref_of_html_page
+
+NUMBER_OF_PAGES = 100
+
+feed = Feed(url="https://gemeente.groningen.nl/actueel/nieuws", title="Gemeente Groningen", link="")
+
+
+def _soup_gemeente_groningen(html_source: str) -> List[Any]:
+    soup = BeautifulSoup(html_source, features="html.parser")
+    return [
+        (
+            article.find("div").find("h2").find("a").text,
+            article.find("div").find("h2").find("a")["href"],
+            article.find("div", {"class": "teaser-body"}).find("div", {"class": "field-type-text-with-summary"}).text,
+            article.find("time")["datetime"] if article.find("time") else None,
+        )
+        for article in soup.find_all("article")
+    ]
+
+
+def _soup_rss_ref(text: bytes) -> Optional[str]:
+    rss_links = BeautifulSoup(text, "html.parser").find_all("link", type="application/rss+xml")
+    return rss_links[0].get("href") if len(rss_links) == 1 else None
+
+
+def _pages_per_second(scrape: Callable[[Any], Any], page: Any) -> float:
+    started_on = time.perf_counter()
+    for _ in range(NUMBER_OF_PAGES):
+        scrape(page)
+    return NUMBER_OF_PAGES / (time.perf_counter() - started_on)
+
+
+def _compare(name: str, soup: Callable[[Any], Any], scraper: Callable[[Any], Any], page: Any) -> None:
+    soup_pages = _pages_per_second(soup, page)
+    scraper_pages = _pages_per_second(scraper, page)
+    print(f"{name}")
+    print(f"  BeautifulSoup : {soup_pages:10.0f} pages/s")
+    print(f"  lxml scraper  : {scraper_pages:10.0f} pages/s")
+    print(f"  speed up      : {scraper_pages / soup_pages:10.1f}x")
+
+
+def main() -> None:
+    with open("sample-files/html_sources/gemeente_groningen.html") as file:
+        gemeente_groningen_page = file.read()
+    with open("sample-files/rss_feeds/pitchfork_best.html", "rb") as file:
+        pitchfork_page = file.read()
+
+    _compare(
+        "gemeente groningen articles",
+        _soup_gemeente_groningen,
+        lambda page: gemeente_groningen_parser(feed, page),
+        gemeente_groningen_page,
+    )
+    _compare("rss link of an html page", _soup_rss_ref, rss_ref_of_html_page, pitchfork_page)
+
+
+if __name__ == "__main__":
+    main()
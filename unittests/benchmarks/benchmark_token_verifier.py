@@ -0,0 +1,42 @@
+"""
+Compares TokenVerifier.verify with and without the verified token cache.
+
+Run from the unittests directory with: python -m benchmarks.benchmark_token_verifier
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import core_lib.app_config
+
+core_lib.app_config.AppConfig.token_secret_key = Mock(return_value="benchmark-token-secret-with-enough-bytes")
+
+from api.security import TokenVerifier  # noqa: E402
+from core_lib.repositories import User  # noqa: E402
+
+NUMBER_OF_REQUESTS = 20_000
+
+
+async def _time_verify(bearer_token: str, use_cache: bool) -> float:
+    started_on = time.perf_counter()
+    for _ in range(NUMBER_OF_REQUESTS):
+        if not use_cache:
+            TokenVerifier.verified_tokens.clear()
+        await TokenVerifier.verify(bearer_token)
+    return (time.perf_counter() - started_on) / NUMBER_OF_REQUESTS
+
+
+async def main() -> None:
+    user = User(email_address="benchmark@example.com", password_hash="hash", password_salt="salt", is_approved=True)
+    bearer_token = f"Bearer {TokenVerifier.create_token(user)}"
+
+    seconds_decoding = await _time_verify(bearer_token, use_cache=False)
+    seconds_cached = await _time_verify(bearer_token, use_cache=True)
+    print(f"verify, decoding every request : {seconds_decoding * 1_000_000:8.2f} us/request")
+    print(f"verify, verified token cache   : {seconds_cached * 1_000_000:8.2f} us/request")
+    print(f"saving                         : {(seconds_decoding - seconds_cached) * 1_000_000:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Compares reading news item documents with NewsItem.parse_obj and with NewsItem.from_document.
+
+Run from the unittests directory with: python -m benchmarks.benchmark_trusted_decoder
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+
+from core_lib.repositories import NewsItem
+from core_lib.utils import now_in_utc
+
+NUMBER_OF_DOCUMENTS = 50_000
+
+
+def _documents() -> List[Dict[str, Any]]:
+    now = now_in_utc()
+    feed_id = ObjectId()
+    user_id = ObjectId()
+    return [
+        {
+            "_id": ObjectId(),
+            "feed_id": feed_id,
+            "user_id": user_id,
+            "feed_item_id": ObjectId(),
+            "feed_title": "Benchmark feed",
+            "title": f"News item {index}",
+            "description": "A description of the news item. " * 10,
+            "link": f"https://example.com/news/{index}",
+            "published": now,
+            "alternate_links": [],
+            "alternate_title_links": [],
+            "alternate_favicons": [],
+            "favicon": "https://example.com/favicon.ico",
+            "created_on": now,
+            "is_read": False,
+            "is_saved": False,
+            "is_read_on": None,
+            "saved_news_item_id": None,
+        }
+        for index in range(NUMBER_OF_DOCUMENTS)
+    ]
+
+
+def _documents_per_second(decode: Callable[[Dict[str, Any]], NewsItem], documents: List[Dict[str, Any]]) -> float:
+    started_on = time.perf_counter()
+    for document in documents:
+        decode(document)
+    return len(documents) / (time.perf_counter() - started_on)
+
+
+def main() -> None:
+    documents = _documents()
+    parsed = _documents_per_second(NewsItem.parse_obj, documents)
+    decoded = _documents_per_second(NewsItem.from_document, documents)
+    print(f"NewsItem.parse_obj     : {parsed:10.0f} documents/s")
+    print(f"NewsItem.from_document : {decoded:10.0f} documents/s")
+    print(f"speed up               : {decoded / parsed:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import asyncio
 from os import getenv
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 from unittest.mock import Mock, MagicMock, AsyncMock
 
 import pytest
@@ -27,23 +27,41 @@ from core_lib.repositories import (
 from core_lib.user import _generate_salt, _generate_hash
 from core_lib.utils import bytes_to_str_base64
 
+NOT_MODIFIED = "304 Not Modified"
+
+
+async def _chunks_of(document: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    # Small chunks, so documents are parsed in more than one piece.
+    chunk_size = min(chunk_size, 4096)
+    for start in range(0, len(document), chunk_size):
+        yield document[start : start + chunk_size]
+
 
 class ClientSessionMocker:
     def __init__(self, repositories: Repositories):
         self.repositories = repositories
 
-    def setup_client_session_for(self, file_names: List[str]) -> None:
+    def setup_client_session_for(self, file_names: List[str], headers: Optional[Dict[str, str]] = None) -> None:
         def _response_for_file(file_name: str) -> AsyncMock:
-            with open(file_name) as file:
-                read_in_file = file.read()
-                text_response = AsyncMock(ClientResponse)
-                text_response.text.return_value = read_in_file
-                text_response.read.return_value = bytes(read_in_file, "utf-8")
-
-                response = Mock()
-                response.__aenter__ = AsyncMock(return_value=text_response)
-                response.__aexit__ = AsyncMock(return_value=None)
-                return response
+            if file_name == NOT_MODIFIED:
+                read_in_file = ""
+                status = 304
+            else:
+                with open(file_name) as file:
+                    read_in_file = file.read()
+                status = 200
+            text_response = AsyncMock(ClientResponse)
+            text_response.status = status
+            text_response.headers = headers or {}
+            text_response.text.return_value = read_in_file
+            text_response.read.return_value = bytes(read_in_file, "utf-8")
+            text_response.content = Mock()
+            text_response.content.iter_chunked = lambda chunk_size: _chunks_of(bytes(read_in_file, "utf-8"), chunk_size)
+
+            response = Mock()
+            response.__aenter__ = AsyncMock(return_value=text_response)
+            response.__aexit__ = AsyncMock(return_value=None)
+            return response
 
         client_session = AsyncMock(ClientSession)
         client_session.get.side_effect = [_response_for_file(file_name) for file_name in file_names]
@@ -131,6 +149,7 @@ async def repositories(
     api_application_data._security = Security(repository.user_repository)
 
     await clean_repositories(repository)
+    await repository.reconcile_indexes()
     return repository
 
 
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from faker import Faker
+
+from api.feed_api import subscribe_to_feed
+from core_lib.application_data import Repositories
+from core_lib.feed import fetch_feed_information_for, refresh_all_feeds
+from core_lib.feed_polling import MAXIMUM_REFRESH_INTERVAL, MINIMUM_REFRESH_INTERVAL, schedule_next_refresh
+from core_lib.repositories import User
+from tests.conftest import ClientSessionMocker, feed_factory
+
+
+def test_schedule_next_refresh(faker: Faker):
+    now = datetime.utcnow()
+    feed = feed_factory(faker)
+    feed.refresh_interval_seconds = 3600
+
+    schedule_next_refresh(feed, number_of_new_items=0, now=now)
+    assert feed.refresh_interval_seconds == 7200
+    assert feed.next_refresh_on == now + timedelta(hours=2)
+
+    schedule_next_refresh(feed, number_of_new_items=3, now=now)
+    assert feed.refresh_interval_seconds == 3600
+
+    # Busy feeds are bounded by the minimum interval.
+    feed.last_published = now
+    for _ in range(10):
+        schedule_next_refresh(feed, number_of_new_items=1, now=now)
+    assert feed.refresh_interval_seconds == MINIMUM_REFRESH_INTERVAL.total_seconds()
+
+    # Quiet feeds back off to at most the maximum interval.
+    feed.last_published = now - timedelta(days=30)
+    schedule_next_refresh(feed, number_of_new_items=0, now=now)
+    assert feed.refresh_interval_seconds == MAXIMUM_REFRESH_INTERVAL.total_seconds()
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_due_feeds(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    client_session_mocker.setup_client_session_for(["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml"])
+    feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+
+    # A new feed is due immediately.
+    assert await refresh_all_feeds() == 1
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    assert feed.last_published is not None
+    assert feed.next_refresh_on > datetime.utcnow()
+
+    # The next run finds nothing due.
+    assert await refresh_all_feeds() == 0
+    assert repositories.client_session.get.call_count == 2
@@ -0,0 +1,47 @@
+import pytest
+from faker import Faker
+
+from api.feed_api import subscribe_to_feed
+from core_lib.application_data import Repositories
+from core_lib.feed import fetch_feed_information_for, refresh_all_feeds
+from core_lib.repositories import User
+from tests.conftest import ClientSessionMocker, NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_refresh_not_modified_feed(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    test_url = faker.url()
+
+    client_session_mocker.setup_client_session_for(
+        ["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml", NOT_MODIFIED],
+        headers={"ETag": '"fetch-2"', "Last-Modified": "Sat, 02 Jan 2021 10:00:00 GMT"},
+    )
+    feed = await fetch_feed_information_for(repositories.client_session, test_url)
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+
+    # First refresh is unconditional and stores the validators.
+    await refresh_all_feeds()
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    assert feed.etag == '"fetch-2"'
+    assert feed.last_modified == "Sat, 02 Jan 2021 10:00:00 GMT"
+    assert await repositories.news_item_repository.count({}) == 2
+    last_fetched = feed.last_fetched
+
+    # Second refresh sends the validators along, the 304 leaves the items untouched.
+    await refresh_all_feeds(force=True)
+    request_headers = repositories.client_session.get.call_args.kwargs["headers"]
+    assert request_headers["If-None-Match"] == '"fetch-2"'
+    assert request_headers["If-Modified-Since"] == "Sat, 02 Jan 2021 10:00:00 GMT"
+
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    assert feed.last_fetched > last_fetched
+    assert await repositories.feed_item_repository.count({}) == 2
+    assert await repositories.news_item_repository.count({}) == 2
+    assert user.number_of_unread_items == 2
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from faker import Faker
+
+from core_lib.application_data import Repositories
+from core_lib.feed_utils import upsert_new_items_for_feed
+from core_lib.repositories import FeedItem, User, NewsItem
+from core_lib.title_index import TitleIndex
+from core_lib.utils import now_in_utc
+from tests.conftest import feed_factory
+
+
+def test_title_index_candidates():
+    index = TitleIndex()
+    feed_id, other_feed_id = ObjectId(), ObjectId()
+    similar_id, unrelated_id, same_feed_id = ObjectId(), ObjectId(), ObjectId()
+    index.add(similar_id, other_feed_id, "Brand verwoest boerderij aan de Stadsweg in Groningen", now_in_utc())
+    index.add(unrelated_id, other_feed_id, "Nieuwe fietsenstalling bij het hoofdstation geopend", now_in_utc())
+    index.add(same_feed_id, feed_id, "Brand verwoest boerderij aan de Stadsweg in Groningen", now_in_utc())
+
+    candidates = index.candidates("[Updated] Brand verwoest boerderij aan Stadsweg Groningen", exclude_feed_id=feed_id)
+    assert similar_id in candidates
+    assert unrelated_id not in candidates
+    assert same_feed_id not in candidates
+
+    assert index.prune(before=datetime.utcnow() + timedelta(seconds=1)) == 3
+    assert len(index) == 0
+    assert index.candidates("Brand verwoest boerderij aan de Stadsweg in Groningen") == set()
+
+
+@pytest.mark.asyncio
+async def test_story_in_other_feed_is_added_as_alternate(faker: Faker, repositories: Repositories, user: User):
+    feed, other_feed = feed_factory(faker), feed_factory(faker)
+    user.subscribed_to.extend([feed.feed_id, other_feed.feed_id])
+    await repositories.feed_repository.upsert_many([feed, other_feed])
+    await repositories.user_repository.upsert(user)
+
+    def _feed_item(feed_id: ObjectId, title: str) -> FeedItem:
+        return FeedItem(
+            feed_id=feed_id,
+            title=title,
+            link=faker.url(),
+            description=faker.paragraph(),
+            last_seen=now_in_utc(),
+            published=now_in_utc(),
+            created_on=now_in_utc(),
+        )
+
+    feed_item = _feed_item(feed.feed_id, "Uitslaande brand verwoest boerderij aan de Stadsweg in Groningen")
+    other_feed_item = _feed_item(other_feed.feed_id, "Brand verwoest boerderij aan de Stadsweg in Groningen")
+    await upsert_new_items_for_feed(feed, feed, [feed_item])
+    update_result = await upsert_new_items_for_feed(other_feed, other_feed, [other_feed_item])
+
+    assert update_result.user_to_number_new_items_map[user.user_id] == 0
+    assert await repositories.feed_item_repository.count({}) == 2
+    assert await repositories.news_item_repository.count({}) == 1
+    news_item = NewsItem.parse_obj(await repositories.news_item_repository.news_item_collection.find_one({}))
+    assert news_item.feed_id == feed.feed_id
+    assert news_item.alternate_links == [other_feed_item.link]
@@ -60,6 +60,6 @@ async def test_subscribe_to_gemeente_groningen(
     assert item.last_seen is not None
 
     # 3. Refresh again
-    response = await do_refresh_all_feeds()
+    response = await do_refresh_all_feeds(force=True)
     assert response.number_of_feeds_refreshed == 1
     assert await repositories.news_item_repository.count({}) == 20
@@ -0,0 +1,109 @@
+from typing import Callable, List
+
+from lxml.etree import ElementBase, fromstring
+import pytest
+
+from core_lib.atom_feed import atom_document_to_feed, atom_document_to_feed_items, atom_entry_to_feed_item
+from core_lib.incremental_parser import IncrementalFeedParser
+from core_lib.rdf_feed import rdf_document_to_feed, rdf_document_to_feed_items, rdf_item_to_feed_item
+from core_lib.repositories import Feed, FeedItem
+from core_lib.rss_feed import rss_document_to_feed, rss_document_to_feed_items, rss_item_to_feed_item
+
+feed = Feed(url="https://example.com/feed", title="Example", link="https://example.com")
+
+
+def _parse_in_chunks(document: bytes, feed_parser: IncrementalFeedParser, chunk_size: int = 1000) -> ElementBase:
+    for start in range(0, len(document), chunk_size):
+        if not feed_parser.feed(document[start : start + chunk_size]):
+            break
+    return feed_parser.close()
+
+
+def _without_moments(feed_items: List[FeedItem]) -> List[dict]:
+    return [feed_item.dict(exclude={"feed_item_id", "last_seen", "created_on"}) for feed_item in feed_items]
+
+
+@pytest.mark.parametrize(
+    "file_name, item_tag, to_feed_item, document_to_feed, document_to_feed_items",
+    [
+        (
+            "sample-files/rss_feeds/pitchfork_best.xml",
+            "item",
+            rss_item_to_feed_item,
+            rss_document_to_feed,
+            rss_document_to_feed_items,
+        ),
+        (
+            "sample-files/atom/thequietus.xml",
+            "{http://www.w3.org/2005/Atom}entry",
+            atom_entry_to_feed_item,
+            atom_document_to_feed,
+            atom_document_to_feed_items,
+        ),
+        (
+            "sample-files/rdf_sources/slashdot.xml",
+            "{*}item",
+            rdf_item_to_feed_item,
+            rdf_document_to_feed,
+            rdf_document_to_feed_items,
+        ),
+    ],
+)
+def test_incremental_parse_equals_whole_document_parse(
+    file_name: str,
+    item_tag: str,
+    to_feed_item: Callable[[Feed, ElementBase], FeedItem],
+    document_to_feed: Callable[[str, ElementBase], Feed],
+    document_to_feed_items: Callable[[Feed, ElementBase], List[FeedItem]],
+):
+    with open(file_name, "rb") as file:
+        document = file.read()
+    feed_parser = IncrementalFeedParser(item_tag, lambda item_element: to_feed_item(feed, item_element))
+    root = _parse_in_chunks(document, feed_parser)
+
+    whole_document = fromstring(document)
+    assert len(feed_parser.feed_items) > 0
+    assert _without_moments(feed_parser.feed_items) == _without_moments(document_to_feed_items(feed, whole_document))
+    assert document_to_feed(feed.url, root).dict(exclude={"feed_id"}) == document_to_feed(
+        feed.url, whole_document
+    ).dict(exclude={"feed_id"})
+    # The items are not kept in the tree.
+    assert document_to_feed_items(feed, root) == []
+
+
+def test_incremental_parse_is_capped():
+    with open("sample-files/rss_feeds/pitchfork_best.xml", "rb") as file:
+        document = file.read()
+
+    feed_parser = IncrementalFeedParser(
+        "item", lambda item_element: rss_item_to_feed_item(feed, item_element), max_items=5
+    )
+    root = _parse_in_chunks(document, feed_parser)
+    assert feed_parser.is_capped
+    assert len(feed_parser.feed_items) == 5
+    assert rss_document_to_feed(feed.url, root).title == rss_document_to_feed(feed.url, fromstring(document)).title
+
+    feed_parser = IncrementalFeedParser(
+        "item", lambda item_element: rss_item_to_feed_item(feed, item_element), max_bytes=len(document) // 2
+    )
+    _parse_in_chunks(document, feed_parser)
+    assert feed_parser.is_capped
+    assert feed_parser.number_of_bytes == len(document) // 2
+    assert 0 < len(feed_parser.feed_items) < len(rss_document_to_feed_items(feed, fromstring(document)))
+
+
+def test_incremental_parse_resolves_entities_as_fromstring():
+    document = (
+        b'<?xml version="1.0"?><!DOCTYPE rss [<!ENTITY band "The Band">]>'
+        b"<rss><channel><title>Reviews of &band;</title><link>https://example.com</link>"
+        b"<item><title>&band; &amp; friends &#233;</title><link>https://example.com/1</link></item>"
+        b"</channel></rss>"
+    )
+    feed_parser = IncrementalFeedParser("item", lambda item_element: rss_item_to_feed_item(feed, item_element))
+    root = _parse_in_chunks(document, feed_parser, chunk_size=16)
+
+    assert feed_parser.feed_items[0].title == "The Band & friends é"
+    assert _without_moments(feed_parser.feed_items) == _without_moments(
+        rss_document_to_feed_items(feed, fromstring(document))
+    )
+    assert rss_document_to_feed(feed.url, root).title == "Reviews of The Band"
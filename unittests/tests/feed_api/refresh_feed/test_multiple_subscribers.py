@@ -0,0 +1,63 @@
+import pytest
+from faker import Faker
+
+from api.feed_api import subscribe_to_feed
+from api.security import TokenVerifier
+from core_lib.application_data import Repositories
+from core_lib.feed import fetch_feed_information_for, refresh_all_feeds
+from core_lib.repositories import Feed, User
+from tests.conftest import ClientSessionMocker
+
+
+@pytest.mark.asyncio
+async def test_refresh_feed_with_multiple_subscribers(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    other_user = User(email_address=faker.email(), password_hash="hash", password_salt="salt", is_approved=True)
+    await repositories.user_repository.upsert(other_user)
+    other_user_bearer_token = f"Bearer {TokenVerifier.create_token(other_user)}"
+
+    client_session_mocker.setup_client_session_for(
+        [
+            "sample-files/rss_feeds/pitchfork_best_subscribe_fetch.xml",
+            "sample-files/rss_feeds/pitchfork_best_second_fetch.xml",
+        ]
+    )
+    feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=other_user_bearer_token)
+    assert await repositories.news_item_repository.count({}) == 2
+
+    # Both subscribers get the new items, the feed items are stored once.
+    await refresh_all_feeds()
+    assert await repositories.feed_item_repository.count({}) == 4
+    assert await repositories.news_item_repository.count({"user_id": user.user_id}) == 4
+    assert await repositories.news_item_repository.count({"user_id": other_user.user_id}) == 4
+    user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    other_user = await repositories.user_repository.fetch_user_by_email(other_user.email_address)
+    assert user.number_of_unread_items == 4
+    assert other_user.number_of_unread_items == 4
+
+
+@pytest.mark.asyncio
+async def test_fetch_subscribed_to(faker: Faker, repositories: Repositories, user: User):
+    feed = Feed(url=faker.url(), title="feed", link=faker.url())
+    other_feed = Feed(url=faker.url(), title="other feed", link=faker.url())
+    other_user = User(email_address=faker.email(), password_hash="hash", password_salt="salt", is_approved=True)
+    user.subscribed_to = [feed.feed_id, other_feed.feed_id]
+    other_user.subscribed_to = [other_feed.feed_id]
+    await repositories.user_repository.upsert_many([user, other_user])
+
+    subscribed_users = await repositories.user_repository.fetch_subscribed_to(feed)
+    assert [subscribed_user.user_id for subscribed_user in subscribed_users] == [user.user_id]
+
+    subscribed_users_per_feed = await repositories.user_repository.fetch_subscribed_to_feeds([feed, other_feed])
+    assert [subscribed_user.user_id for subscribed_user in subscribed_users_per_feed[feed.feed_id]] == [user.user_id]
+    assert {subscribed_user.user_id for subscribed_user in subscribed_users_per_feed[other_feed.feed_id]} == {
+        user.user_id,
+        other_user.user_id,
+    }
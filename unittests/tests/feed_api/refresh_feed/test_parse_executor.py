@@ -0,0 +1,73 @@
+from typing import List
+
+from faker import Faker
+import pytest
+
+from api.feed_api import subscribe_to_feed
+from core_lib import parse_executor
+from core_lib.application_data import Repositories
+from core_lib.atom_feed import atom_format
+from core_lib.feed import fetch_feed_information_for, refresh_all_feeds
+from core_lib.incremental_parser import parse_document
+from core_lib.parse_executor import ParseExecutor, ParseExecutorKind
+from core_lib.rdf_feed import rdf_format
+from core_lib.repositories import Feed, FeedItem, User
+from core_lib.rss_feed import rss_format
+from tests.conftest import ClientSessionMocker
+
+feed = Feed(url="https://example.com/feed", title="Example", link="https://example.com")
+
+
+def _without_moments(feed_items: List[FeedItem]) -> List[dict]:
+    return [feed_item.dict(exclude={"feed_item_id", "last_seen", "created_on"}) for feed_item in feed_items]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", [ParseExecutorKind.THREAD, ParseExecutorKind.PROCESS])
+async def test_parse_in_executor_equals_inline_parse(kind: ParseExecutorKind):
+    executor = ParseExecutor(kind, max_workers=2)
+    try:
+        for file_name, feed_format in [
+            ("sample-files/rss_feeds/pitchfork_best.xml", rss_format),
+            ("sample-files/atom/thequietus.xml", atom_format),
+            ("sample-files/rdf_sources/slashdot.xml", rdf_format),
+        ]:
+            with open(file_name, "rb") as file:
+                chunks = [file.read()]
+            inline = parse_document(feed_format, feed, chunks, 1000, 1024 * 1024)
+            offloaded = await executor.run(parse_document, feed_format, feed, chunks, 1000, 1024 * 1024)
+
+            assert len(offloaded.feed_items) > 0
+            assert _without_moments(offloaded.feed_items) == _without_moments(inline.feed_items)
+            assert offloaded.feed.dict(exclude={"feed_id"}) == inline.feed.dict(exclude={"feed_id"})
+            assert offloaded.is_capped == inline.is_capped
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_refresh_with_thread_executor(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+    monkeypatch,
+):
+    executor = ParseExecutor(ParseExecutorKind.THREAD, max_workers=2)
+    monkeypatch.setattr(parse_executor, "_parse_executor", executor)
+    client_session_mocker.setup_client_session_for(
+        ["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml", "sample-files/atom/fetch_2.xml"]
+    )
+    try:
+        subscribed_feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+        await subscribe_to_feed(feed_id=subscribed_feed.feed_id.__str__(), authorization=user_bearer_token)
+        await refresh_all_feeds()
+        assert await repositories.news_item_repository.count({}) == 2
+
+        # The unchanged document is not handed to the executor.
+        await refresh_all_feeds(force=True)
+        assert await repositories.feed_item_repository.count({}) == 2
+        assert await repositories.news_item_repository.count({}) == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,59 @@
+from typing import List
+
+from faker import Faker
+import pytest
+
+from core_lib.application_data import Repositories
+from core_lib.feed_utils import news_items_from_feed_items
+from core_lib.repositories import (
+    Feed,
+    FeedItem,
+    FeedItemCount,
+    FeedItemLink,
+    FeedItemTitle,
+    NewsItem,
+    NewsItemAlternates,
+    User,
+    UserReference,
+)
+
+
+@pytest.mark.asyncio
+async def test_projected_reads(
+    faker: Faker, repositories: Repositories, feed: Feed, feed_items: List[FeedItem], user: User
+):
+    feed_item_links = await repositories.feed_item_repository.fetch_links_for_feed(feed)
+    assert all(type(feed_item_link) is FeedItemLink for feed_item_link in feed_item_links)
+    assert {feed_item_link.link for feed_item_link in feed_item_links} == {feed_item.link for feed_item in feed_items}
+
+    feed_item_counts = await repositories.feed_repository.all_feed_item_counts()
+    assert [type(feed_item_count) for feed_item_count in feed_item_counts] == [FeedItemCount]
+    assert feed_item_counts[0].feed_id == feed.feed_id
+
+    news_items = news_items_from_feed_items(feed_items, feed, user)
+    await repositories.news_item_repository.upsert_many(news_items)
+    alternates = await repositories.news_item_repository.fetch_non_read_alternates_for_feed(feed, user)
+    assert len(alternates) == len(news_items)
+    assert all(type(news_item) is NewsItemAlternates for news_item in alternates)
+
+    # Only the changed fields of the projection are written, the other fields stay as they are.
+    alternates[0].append_alternate("https://example.com/alternate", "Alternate", "/favicon.ico")
+    await repositories.news_item_repository.update_changed_many(alternates)
+    news_item = await repositories.news_item_repository.fetch_by_id(str(alternates[0].news_item_id))
+    assert news_item is not None
+    assert news_item.alternate_links == ["https://example.com/alternate"]
+    assert news_item.description == next(
+        item.description for item in news_items if item.news_item_id == news_item.news_item_id
+    )
+
+
+def test_full_models_are_not_projections():
+    feed = Feed(url="https://example.com/feed", title="Example", link="https://example.com")
+    assert not isinstance(feed, FeedItemCount)
+    assert not issubclass(FeedItem, FeedItemTitle)
+    assert not issubclass(NewsItem, NewsItemAlternates)
+    assert not issubclass(User, UserReference)
+    assert FeedItemCount.__fields__.keys() <= Feed.__fields__.keys()
+    assert FeedItemTitle.__fields__.keys() <= FeedItem.__fields__.keys()
+    assert NewsItemAlternates.__fields__.keys() <= NewsItem.__fields__.keys()
+    assert UserReference.__fields__.keys() <= User.__fields__.keys()
@@ -48,12 +48,12 @@ async def test_refresh_rss_feed(
     assert user.number_of_unread_items == 2
 
     # refresh the feed, with the next one, three new items.
-    await refresh_all_feeds()
+    await refresh_all_feeds(force=True)
     assert await repositories.news_item_repository.count({}) == 5
     assert await repositories.feed_item_repository.count({}) == 5
 
     # refresh the feed, with the next one, all new items except the ones already present.
-    await refresh_all_feeds()
+    await refresh_all_feeds(force=True)
     assert await repositories.news_item_repository.count({}) == 25
     assert await repositories.feed_item_repository.count({}) == 25
 
@@ -114,14 +114,14 @@ async def test_refresh_with_duplicate_titles(
     assert news_item.title.startswith("[Updated]")
 
     # ----- Next run. The last item is added with an identical link and identical title. Nothing happens.
-    await refresh_all_feeds()
+    await refresh_all_feeds(force=True)
     user = await repositories.user_repository.fetch_user_by_email(user.email_address)
     assert await repositories.feed_item_repository.count({}) == 9
     assert await repositories.news_item_repository.count({}) == 8
     assert user.number_of_unread_items == 8
 
     # ----- Next run. The item is added with similar title but with different link.
-    await refresh_all_feeds()
+    await refresh_all_feeds(force=True)
     user = await repositories.user_repository.fetch_user_by_email(user.email_address)
     assert await repositories.feed_item_repository.count({}) == 10
     assert await repositories.news_item_repository.count({}) == 8
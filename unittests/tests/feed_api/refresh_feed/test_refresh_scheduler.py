@@ -0,0 +1,68 @@
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+from core_lib import metrics
+from core_lib.feed_utils import UpdateResult
+from core_lib.refresh_scheduler import RefreshScheduler
+from core_lib.repositories import Feed
+
+
+def _feed_for(url: str) -> Feed:
+    return Feed(url=url, title="title", link=url)
+
+
+@pytest.mark.asyncio
+async def test_refresh_scheduler_respects_limits():
+    feeds = [_feed_for(f"https://host-{index % 3}.nl/feed/{index}") for index in range(12)]
+    active = {"total": 0, "max_total": 0}
+    active_per_host = defaultdict(int)
+    max_per_host = defaultdict(int)
+
+    async def refresh(feed: Feed) -> UpdateResult:
+        host = feed.url.split("/")[2]
+        active["total"] += 1
+        active_per_host[host] += 1
+        active["max_total"] = max(active["max_total"], active["total"])
+        max_per_host[host] = max(max_per_host[host], active_per_host[host])
+        await asyncio.sleep(0.01)
+        active["total"] -= 1
+        active_per_host[host] -= 1
+        return UpdateResult()
+
+    scheduler = RefreshScheduler(refresh=refresh, max_concurrent=4, max_concurrent_per_host=1)
+    results = await scheduler.run(feeds)
+
+    assert len(results) == 12
+    assert len(scheduler.timings) == 12
+    assert active["max_total"] == 3  # Only 3 hosts, with one slot each.
+    assert max(max_per_host.values()) == 1
+    assert all(timing.seconds_refreshing > 0 for timing in scheduler.timings)
+
+
+@pytest.mark.asyncio
+async def test_refresh_scheduler_without_feeds():
+    scheduler = RefreshScheduler(refresh=lambda feed: asyncio.sleep(0), max_concurrent=4, max_concurrent_per_host=1)
+    assert await scheduler.run([]) == []
+
+
+@pytest.mark.asyncio
+async def test_refresh_scheduler_isolates_failing_feeds():
+    feeds = [_feed_for(f"https://host-{index}.nl/feed") for index in range(4)]
+
+    async def refresh(feed: Feed) -> UpdateResult:
+        if feed.url == "https://host-1.nl/feed":
+            raise ValueError("Broken feed")
+        result = UpdateResult()
+        result.add(feed.url, 1)
+        return result
+
+    metrics.reset()
+    scheduler = RefreshScheduler(refresh=refresh, max_concurrent=2, max_concurrent_per_host=1)
+    results = await scheduler.run(feeds)
+
+    assert len(results) == 4
+    assert sum(sum(result.user_to_number_new_items_map.values()) for result in results) == 3
+    assert len(scheduler.timings) == 3
+    assert metrics.counters()["feed_refresh_failed"] == 1
@@ -0,0 +1,31 @@
+import difflib
+import re
+
+from faker import Faker
+
+from core_lib.feed_utils import TitleMatcher, are_titles_similar
+
+
+def _reference_are_titles_similar(title_1: str, title_2: str) -> bool:
+    title_1 = re.sub(r"\[.*?]", "", title_1)
+    title_2 = re.sub(r"\[.*?]", "", title_2)
+    return len(title_1) > 10 and difflib.SequenceMatcher(None, title_1, title_2).ratio() > 0.516
+
+
+def test_are_titles_similar():
+    assert are_titles_similar(
+        "[Updated] Brand verwoest boerderij aan Stadsweg in Groningen",
+        "Uitslaande brand verwoest boerderij aan de Stadsweg",
+    )
+    assert not are_titles_similar("Short", "Short")
+    assert not are_titles_similar("Brand verwoest boerderij aan Stadsweg", "Nieuwe fietsenstalling bij station")
+
+
+def test_title_matcher_agrees_with_exact_ratio(faker: Faker):
+    titles = [faker.sentence() for _ in range(50)]
+    titles.extend(f"[Updated] {title}" for title in titles[:10])
+    titles.extend(title[: len(title) // 2] for title in titles[10:20])
+    for title in titles:
+        title_matcher = TitleMatcher(title)
+        for candidate in titles:
+            assert title_matcher.is_similar_to(candidate) == _reference_are_titles_similar(candidate, title)
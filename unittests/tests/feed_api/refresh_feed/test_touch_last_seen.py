@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from faker import Faker
+import pytest
+
+from core_lib.application_data import Repositories
+from core_lib.feed_utils import upsert_new_items_for_feed
+from core_lib.repositories import Feed, FeedItem
+
+
+@pytest.mark.asyncio
+async def test_seen_feed_items_are_touched_once(
+    faker: Faker, repositories: Repositories, feed: Feed, feed_items: List[FeedItem]
+):
+    before_refresh = datetime.utcnow() - timedelta(seconds=1)
+    await repositories.feed_item_repository.feed_items_collection.update_many(
+        {}, {"$set": {"last_seen": before_refresh - timedelta(days=1)}}
+    )
+
+    # The feed lists some items twice, each is touched once and nothing is added.
+    seen_feed_items = feed_items[:3] + feed_items[:2]
+    await upsert_new_items_for_feed(feed, feed, seen_feed_items)
+
+    stored_feed_items = {
+        feed_item.feed_item_id: feed_item
+        for feed_item in await repositories.feed_item_repository.fetch_all_for_feed(feed)
+    }
+    assert len(stored_feed_items) == len(feed_items)
+    for feed_item in feed_items[:3]:
+        assert stored_feed_items[feed_item.feed_item_id].last_seen > before_refresh
+    for feed_item in feed_items[3:]:
+        assert stored_feed_items[feed_item.feed_item_id].last_seen < before_refresh
+
+    assert await repositories.feed_item_repository.touch_last_seen([], datetime.utcnow()) == 0
@@ -0,0 +1,118 @@
+import pytest
+from faker import Faker
+
+from api.feed_api import subscribe_to_feed
+from core_lib import feed_utils, metrics, parse_executor
+from core_lib.application_data import Repositories
+from core_lib.feed import fetch_feed_information_for, refresh_all_feeds
+from core_lib.incremental_parser import IncrementalFeedParser
+from core_lib.parse_executor import ParseExecutor, ParseExecutorKind
+from core_lib.repositories import User
+from tests.conftest import ClientSessionMocker
+
+
+@pytest.mark.asyncio
+async def test_refresh_unchanged_content(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    test_url = faker.url()
+
+    client_session_mocker.setup_client_session_for(
+        ["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml", "sample-files/atom/fetch_2.xml"]
+    )
+    feed = await fetch_feed_information_for(repositories.client_session, test_url)
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+
+    await refresh_all_feeds()
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    assert feed.content_digest is not None
+    assert await repositories.news_item_repository.count({}) == 2
+    last_fetched = feed.last_fetched
+
+    # The identical document is not processed, only last_fetched is ticked.
+    unchanged_before = metrics.counters().get("feed_content_unchanged", 0)
+    await refresh_all_feeds(force=True)
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    assert metrics.counters()["feed_content_unchanged"] == unchanged_before + 1
+    assert feed.last_fetched > last_fetched
+    assert await repositories.feed_item_repository.count({}) == 2
+    assert await repositories.news_item_repository.count({}) == 2
+    assert user.number_of_unread_items == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_is_not_parsed(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+    monkeypatch,
+):
+    # A downloaded document is only handed to the parse executor when its digest changed.
+    executor = ParseExecutor(ParseExecutorKind.THREAD)
+    monkeypatch.setattr(parse_executor, "_parse_executor", executor)
+    client_session_mocker.setup_client_session_for(
+        ["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml", "sample-files/atom/fetch_2.xml"]
+    )
+    try:
+        feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+        await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+        await refresh_all_feeds()
+
+        parser_calls = []
+        feed_chunk = IncrementalFeedParser.feed
+
+        def _counted_feed_chunk(feed_parser: IncrementalFeedParser, chunk: bytes) -> bool:
+            parser_calls.append(chunk)
+            return feed_chunk(feed_parser, chunk)
+
+        monkeypatch.setattr(IncrementalFeedParser, "feed", _counted_feed_chunk)
+        await refresh_all_feeds(force=True)
+        assert parser_calls == []
+        assert await repositories.feed_item_repository.count({}) == 2
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_changed_content_is_parsed_chunk_by_chunk(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+    monkeypatch,
+):
+    # Not only the first fetch, a refresh of a feed with a digest is parsed inline while it is downloaded too.
+    monkeypatch.setattr(parse_executor, "_parse_executor", ParseExecutor(ParseExecutorKind.INLINE))
+    monkeypatch.setattr(feed_utils, "FEED_CHUNK_SIZE", 256)
+    client_session_mocker.setup_client_session_for(
+        ["sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_1.xml", "sample-files/atom/fetch_2.xml"]
+    )
+    feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+    await refresh_all_feeds()
+    feed = await repositories.feed_repository.get(feed.feed_id.__str__())
+    assert feed.content_digest is not None
+
+    parser_calls = []
+    feed_chunk = IncrementalFeedParser.feed
+
+    def _counted_feed_chunk(feed_parser: IncrementalFeedParser, chunk: bytes) -> bool:
+        parser_calls.append(chunk)
+        return feed_chunk(feed_parser, chunk)
+
+    monkeypatch.setattr(IncrementalFeedParser, "feed", _counted_feed_chunk)
+    await refresh_all_feeds(force=True)
+    with open("sample-files/atom/fetch_2.xml", "rb") as file:
+        document = file.read()
+    assert len(parser_calls) > 1
+    assert all(len(chunk) <= 256 for chunk in parser_calls)
+    assert b"".join(parser_calls) == document
+    assert await repositories.feed_item_repository.count({}) == 2
@@ -5,7 +5,7 @@ from faker import Faker
 
 from api.feed_api import subscribe_to_feed
 from core_lib.application_data import Repositories
-from core_lib.repositories import User, Feed, FeedItem
+from core_lib.repositories import CounterAssignedException, User, Feed, FeedItem
 
 
 @pytest.mark.asyncio
@@ -23,3 +23,39 @@ async def test_subscribe(
     assert await repositories.news_item_repository.count({}) == await repositories.feed_item_repository.count({})
 
     assert stored_feed.number_of_subscriptions == number_of_subscriptions + 1
+
+
+@pytest.mark.asyncio
+async def test_subscribe_twice(
+    user: User, feed: Feed, feed_items: List[FeedItem], repositories: Repositories, user_bearer_token
+):
+    number_of_subscriptions = feed.number_of_subscriptions
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+
+    stored_feed = await repositories.feed_repository.get(feed.feed_id)
+    stored_user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    assert stored_user.subscribed_to.count(feed.feed_id) == 1
+    assert stored_user.number_of_unread_items == len(feed_items)
+    assert stored_feed.number_of_subscriptions == number_of_subscriptions + 1
+    assert await repositories.news_item_repository.count({}) == len(feed_items)
+
+
+@pytest.mark.asyncio
+async def test_assigned_counters_are_not_written(user: User, feed: Feed, repositories: Repositories):
+    stored_feed = await repositories.feed_repository.get(feed.feed_id)
+    stored_feed.number_of_subscriptions += 1
+    with pytest.raises(CounterAssignedException):
+        await repositories.feed_repository.upsert(stored_feed)
+    with pytest.raises(CounterAssignedException):
+        await repositories.feed_repository.update_changed(stored_feed)
+
+    stored_user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    stored_user.number_of_unread_items = 10
+    with pytest.raises(CounterAssignedException):
+        await repositories.user_repository.upsert(stored_user)
+
+    assert (
+        await repositories.feed_repository.get(feed.feed_id)
+    ).number_of_subscriptions == feed.number_of_subscriptions
+    assert (await repositories.user_repository.fetch_user_by_email(user.email_address)).number_of_unread_items == 0
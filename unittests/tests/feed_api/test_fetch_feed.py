@@ -1,9 +1,13 @@
+from datetime import datetime
+import json
+
+from bson import ObjectId
 import pytest
 from faker import Faker
 
-from api.feed_api import get_all_feeds, subscribe_to_feed
+from api.feed_api import catalogue_etag, get_all_feeds, get_feed_catalogue, subscribe_to_feed
 from core_lib.application_data import Repositories
-from core_lib.repositories import User, Feed
+from core_lib.repositories import CataloguePageVersion, FeedSourceType, User, Feed
 from tests.conftest import feed_factory
 
 
@@ -19,3 +23,94 @@ async def test_fetch_user(repositories: Repositories, faker: Faker, feed: Feed,
     assert subscribed_feed.user_is_subscribed
     not_subscribed_feed = [response_feed for response_feed in response if response_feed.feed.feed_id != feed.feed_id][0]
     assert not not_subscribed_feed.user_is_subscribed
+
+
+@pytest.mark.asyncio
+async def test_feed_catalogue(
+    repositories: Repositories, faker: Faker, feed: Feed, user: User, user_bearer_token, monkeypatch
+):
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+    other_feeds = [feed_factory(faker) for _ in range(4)]
+    for other_feed in other_feeds:
+        other_feed.category = "music"
+        other_feed.feed_source_type = FeedSourceType.ATOM
+    await repositories.feed_repository.upsert_many(other_feeds)
+
+    # Page through the catalogue, the pages together hold every feed once.
+    token = None
+    feeds = []
+    while True:
+        response = await get_feed_catalogue(
+            fetch_limit=2, fetch_token=token, if_none_match=None, authorization=user_bearer_token
+        )
+        page = json.loads(response.body)
+        feeds.extend(page["feeds"])
+        token = page["token"]
+        if token is None:
+            break
+    assert sorted(catalogue_feed["feed"]["_id"] for catalogue_feed in feeds) == sorted(
+        str(any_feed.feed_id) for any_feed in [feed, *other_feeds]
+    )
+    assert [catalogue_feed["feed"]["_id"] for catalogue_feed in feeds if catalogue_feed["user_is_subscribed"]] == [
+        str(feed.feed_id)
+    ]
+
+    response = await get_feed_catalogue(subscribed_only=True, if_none_match=None, authorization=user_bearer_token)
+    assert [catalogue_feed["feed"]["_id"] for catalogue_feed in json.loads(response.body)["feeds"]] == [
+        str(feed.feed_id)
+    ]
+    response = await get_feed_catalogue(category="music", if_none_match=None, authorization=user_bearer_token)
+    assert len(json.loads(response.body)["feeds"]) == 4
+    response = await get_feed_catalogue(
+        source_type=FeedSourceType.RSS, if_none_match=None, authorization=user_bearer_token
+    )
+    assert len(json.loads(response.body)["feeds"]) == 1
+
+    # The same page is not sent again, a changed page is.
+    etag = response.headers["ETag"]
+    response = await get_feed_catalogue(
+        source_type=FeedSourceType.RSS, if_none_match=etag, authorization=user_bearer_token
+    )
+    assert response.status_code == 304
+    # Only the version of the page is read for that, and fields that the catalogue does not show leave it the same.
+    feed.last_fetched = datetime.utcnow()
+    await repositories.feed_repository.update_changed(feed)
+    fetch_catalogue_page = repositories.feed_repository.fetch_catalogue_page
+    monkeypatch.setattr(repositories.feed_repository, "fetch_catalogue_page", None)
+    response = await get_feed_catalogue(
+        source_type=FeedSourceType.RSS, if_none_match=etag, authorization=user_bearer_token
+    )
+    assert response.status_code == 304
+    monkeypatch.setattr(repositories.feed_repository, "fetch_catalogue_page", fetch_catalogue_page)
+    feed.title = "Changed"
+    await repositories.feed_repository.update_changed(feed)
+    response = await get_feed_catalogue(
+        source_type=FeedSourceType.RSS, if_none_match=etag, authorization=user_bearer_token
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_feed_catalogue_limit_is_clamped(
+    repositories: Repositories, faker: Faker, feed: Feed, user: User, user_bearer_token
+):
+    await repositories.feed_repository.upsert(feed_factory(faker))
+    for fetch_limit in [0, -5]:
+        response = await get_feed_catalogue(
+            fetch_limit=fetch_limit, if_none_match=None, authorization=user_bearer_token
+        )
+        page = json.loads(response.body)
+        assert response.status_code == 200
+        assert len(page["feeds"]) == 1
+        assert page["token"] is not None
+
+
+def test_catalogue_etag():
+    feed_ids = [ObjectId(), ObjectId()]
+    updated_on = datetime(2021, 3, 1, 12, 0, 0)
+    etag = catalogue_etag(CataloguePageVersion(feed_ids, updated_on), set())
+    assert etag == catalogue_etag(CataloguePageVersion(list(feed_ids), updated_on), set())
+    assert etag != catalogue_etag(CataloguePageVersion(feed_ids, updated_on), {feed_ids[0]})
+    assert etag != catalogue_etag(CataloguePageVersion(feed_ids[:1], updated_on), set())
+    assert etag != catalogue_etag(CataloguePageVersion(feed_ids, datetime(2021, 3, 1, 12, 0, 1)), set())
+    assert etag != catalogue_etag(CataloguePageVersion(feed_ids, None), set())
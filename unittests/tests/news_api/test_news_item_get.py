@@ -1,5 +1,7 @@
 from random import choice
 
+from bson import ObjectId
+from fastapi import HTTPException
 import pytest
 from faker import Faker
 
@@ -35,3 +37,59 @@ async def test_get_news_items(
     unread_response = await news_items(authorization=user_bearer_token)
     assert unread_response.number_of_unread_items == 24
     assert len(unread_response.news_items) == 24
+
+
+@pytest.mark.asyncio
+async def test_get_read_news_items_by_token(
+    repositories: Repositories, user_with_subscription_to_feed: User, user_bearer_token: str
+):
+    unread_response = await news_items(authorization=user_bearer_token)
+    await mark_as_read(
+        mark_as_read_request=MarkAsReadRequest(
+            news_item_ids=[news_item.news_item_id.__str__() for news_item in unread_response.news_items]
+        ),
+        authorization=user_bearer_token,
+    )
+
+    # Page through the read items with the tokens, the pages match the pages by offset.
+    token = None
+    pages = []
+    while True:
+        read_items_response = await read_news_items(fetch_limit=10, fetch_token=token, authorization=user_bearer_token)
+        pages.append(read_items_response.news_items)
+        token = read_items_response.token
+        if token is None:
+            break
+    assert [len(page) for page in pages] == [10, 10, 5]
+    for page_number, page in enumerate(pages[1:], start=1):
+        offset_response = await read_news_items(
+            fetch_offset=page_number * 10, fetch_limit=10, authorization=user_bearer_token
+        )
+        assert [news_item.news_item_id for news_item in page] == [
+            news_item.news_item_id for news_item in offset_response.news_items
+        ]
+
+    with pytest.raises(HTTPException):
+        await read_news_items(fetch_limit=10, fetch_token="not-a-token", authorization=user_bearer_token)
+
+
+@pytest.mark.asyncio
+async def test_mark_as_read_counts_only_unread_items(
+    repositories: Repositories, user_with_subscription_to_feed: User, user_bearer_token: str
+):
+    unread_response = await news_items(authorization=user_bearer_token)
+    news_item_id = unread_response.news_items[0].news_item_id.__str__()
+
+    # Marking an item twice, or marking an unknown item, only counts once.
+    for _ in range(2):
+        await mark_as_read(
+            mark_as_read_request=MarkAsReadRequest(news_item_ids=[news_item_id, ObjectId().__str__()]),
+            authorization=user_bearer_token,
+        )
+    user = await repositories.user_repository.fetch_user_by_email(user_with_subscription_to_feed.email_address)
+    assert user.number_of_unread_items == 24
+
+    # An upsert of an older copy of the user does not undo the counter.
+    await repositories.user_repository.upsert(user_with_subscription_to_feed)
+    user = await repositories.user_repository.fetch_user_by_email(user_with_subscription_to_feed.email_address)
+    assert user.number_of_unread_items == 24
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+import pytest
+from faker import Faker
+
+from api.feed_api import subscribe_to_feed
+from api.news_item_api import mark_as_read, MarkAsReadRequest, news_items, read_news_items
+from core_lib.application_data import Repositories
+from core_lib.feed import delete_read_items, fetch_feed_information_for
+from core_lib.repositories import FeedItemCount, NewsItemStorage, User
+from tests.conftest import ClientSessionMocker
+
+
+@pytest.mark.asyncio
+async def test_news_items_with_reference_storage(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    repositories.news_item_repository.storage = NewsItemStorage.REFERENCE
+    client_session_mocker.setup_client_session_for(["sample-files/rss_feeds/pitchfork_best.xml"])
+    feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+
+    # Only the per user state is stored.
+    stored = await repositories.news_item_repository.news_item_collection.find_one({})
+    assert "description" not in stored
+    assert "link" not in stored
+    assert "feed_title" not in stored
+
+    # The shared fields are joined in when reading.
+    unread_response = await news_items(authorization=user_bearer_token)
+    assert len(unread_response.news_items) == 25
+    feed_items = {
+        feed_item.feed_item_id: feed_item
+        for feed_item in await repositories.feed_item_repository.fetch_all_for_feed(feed)
+    }
+    for news_item in unread_response.news_items:
+        feed_item = feed_items[news_item.feed_item_id]
+        assert news_item.description == feed_item.description
+        assert news_item.link == feed_item.link
+        assert news_item.feed_title == feed.title
+
+    read_item = unread_response.news_items[0]
+    await mark_as_read(
+        mark_as_read_request=MarkAsReadRequest(news_item_ids=[read_item.news_item_id.__str__()]),
+        authorization=user_bearer_token,
+    )
+    read_items_response = await read_news_items(fetch_offset=0, authorization=user_bearer_token)
+    assert len(read_items_response.news_items) == 1
+    assert read_items_response.news_items[0].link == read_item.link
+    assert (await repositories.news_item_repository.fetch_by_id(read_item.news_item_id.__str__())).is_read
+
+    # Referenced feed items survive the clean up.
+    await delete_read_items()
+    assert await repositories.feed_item_repository.count({}) == 25
+
+
+@pytest.mark.asyncio
+async def test_delete_keeps_referenced_feed_items(
+    faker: Faker,
+    repositories: Repositories,
+    client_session_mocker: ClientSessionMocker,
+    user: User,
+    user_bearer_token: str,
+):
+    repositories.news_item_repository.storage = NewsItemStorage.REFERENCE
+    client_session_mocker.setup_client_session_for(["sample-files/rss_feeds/pitchfork_best.xml"])
+    feed = await fetch_feed_information_for(repositories.client_session, faker.url())
+    await subscribe_to_feed(feed_id=feed.feed_id.__str__(), authorization=user_bearer_token)
+    feed_items = await repositories.feed_item_repository.fetch_all_for_feed(feed)
+    unreferenced_ids = [feed_item.feed_item_id for feed_item in feed_items[:5]]
+    await repositories.news_item_repository.news_item_collection.delete_many(
+        {"feed_item_id": {"$in": unreferenced_ids}}
+    )
+    await repositories.feed_item_repository.touch_last_seen(
+        [feed_item.feed_item_id for feed_item in feed_items], datetime.utcnow() - timedelta(days=4)
+    )
+
+    # Only the items of the feed are deleted.
+    other_feed = FeedItemCount(feed_id=ObjectId())
+    before = datetime.utcnow() - timedelta(days=3)
+    assert await repositories.feed_item_repository.delete_older_than(other_feed, before, keep_referenced=True) == 0
+    assert await repositories.feed_item_repository.delete_older_than(feed, before, keep_referenced=True) == 5
+    remaining_ids = {
+        feed_item.feed_item_id for feed_item in await repositories.feed_item_repository.fetch_all_for_feed(feed)
+    }
+    assert len(remaining_ids) == 20
+    assert remaining_ids.isdisjoint(unreferenced_ids)
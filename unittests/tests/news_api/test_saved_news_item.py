@@ -5,7 +5,7 @@ import pytest
 from api.news_item_api import news_items
 from api.saved_items_api import save_news_item, SaveNewsItemRequest, get_saved_news_items, delete_saved_news_item
 from core_lib.application_data import Repositories
-from core_lib.repositories import User, SavedNewsItem
+from core_lib.repositories import NewsItem, User, SavedNewsItem
 
 
 @pytest.mark.asyncio
@@ -69,3 +69,58 @@ async def test_save_fetch_and_remove_from_saved(
     assert await repositories.saved_news_item_repository.count({}) == 0
     assert not (await repositories.news_item_repository.fetch_by_id(news_item_id)).is_saved
     assert (await repositories.news_item_repository.fetch_by_id(news_item_id)).saved_news_item_id is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_saved_news_items_by_token(
+    repositories: Repositories, user_with_subscription_to_feed: User, user_bearer_token: str
+):
+    unread_response = await news_items(authorization=user_bearer_token)
+    for news_item in unread_response.news_items[:5]:
+        await save_news_item(
+            save_news_request=SaveNewsItemRequest(news_item_id=news_item.news_item_id.__str__()),
+            authorization=user_bearer_token,
+        )
+
+    saved_news_item_ids = []
+    get_response = await get_saved_news_items(fetch_limit=2, authorization=user_bearer_token)
+    saved_news_item_ids.extend(item.saved_news_item_id for item in get_response.items)
+    while get_response.token is not None:
+        get_response = await get_saved_news_items(
+            fetch_limit=2, fetch_token=get_response.token, authorization=user_bearer_token
+        )
+        saved_news_item_ids.extend(item.saved_news_item_id for item in get_response.items)
+
+    all_response = await get_saved_news_items(fetch_limit=30, authorization=user_bearer_token)
+    assert len(saved_news_item_ids) == 5
+    assert saved_news_item_ids == [item.saved_news_item_id for item in all_response.items]
+
+
+@pytest.mark.asyncio
+async def test_update_changed_writes_only_changed_fields(
+    repositories: Repositories, user_with_subscription_to_feed: User
+):
+    news_item_repository = repositories.news_item_repository
+    news_item = NewsItem.parse_obj(await news_item_repository.news_item_collection.find_one({}))
+    assert news_item.changed_fields() == {}
+
+    # Changed behind the back of the model, an update of other fields does not overwrite it.
+    await news_item_repository.news_item_collection.update_one(
+        {"_id": news_item.news_item_id}, {"$set": {"description": "changed"}}
+    )
+    news_item.is_saved = True
+    news_item.append_alternate("https://example.com/alternate", "Alternate", "/favicon.ico")
+    assert set(news_item.changed_fields()) == {
+        "is_saved",
+        "title",
+        "alternate_links",
+        "alternate_title_links",
+        "alternate_favicons",
+    }
+    await news_item_repository.update_changed(news_item)
+    assert news_item.changed_fields() == {}
+
+    stored = await news_item_repository.fetch_by_id(news_item.news_item_id.__str__())
+    assert stored.is_saved
+    assert stored.alternate_links == ["https://example.com/alternate"]
+    assert stored.description == "changed"
@@ -0,0 +1,48 @@
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+import pytest
+from starlette.responses import StreamingResponse
+
+from api.feed_api import get_all_feeds
+from api.news_item_api import mark_as_read, MarkAsReadRequest, news_items, read_news_items
+from core_lib.application_data import Repositories
+from core_lib.repositories import User
+
+
+async def streamed_json(response: Any) -> Any:
+    assert isinstance(response, StreamingResponse)
+    return json.loads(b"".join([chunk async for chunk in response.body_iterator]))
+
+
+@pytest.mark.asyncio
+async def test_streamed_responses_equal_the_models(
+    repositories: Repositories, user_with_subscription_to_feed: User, user_bearer_token: str
+):
+    unread_response = await news_items(authorization=user_bearer_token)
+    streamed = await streamed_json(await news_items(stream=True, authorization=user_bearer_token))
+    assert streamed == jsonable_encoder(unread_response)
+
+    feeds = await get_all_feeds(authorization=user_bearer_token)
+    streamed = await streamed_json(await get_all_feeds(stream=True, authorization=user_bearer_token))
+    assert streamed == jsonable_encoder(feeds)
+
+    await mark_as_read(
+        mark_as_read_request=MarkAsReadRequest(
+            news_item_ids=[news_item.news_item_id.__str__() for news_item in unread_response.news_items]
+        ),
+        authorization=user_bearer_token,
+    )
+    read_page = await read_news_items(fetch_limit=10, authorization=user_bearer_token)
+    streamed = await streamed_json(await read_news_items(fetch_limit=10, stream=True, authorization=user_bearer_token))
+    assert streamed == jsonable_encoder(read_page)
+    assert streamed["token"] is not None
+
+    next_page = await read_news_items(fetch_limit=10, fetch_token=streamed["token"], authorization=user_bearer_token)
+    streamed = await streamed_json(
+        await read_news_items(
+            fetch_limit=10, fetch_token=streamed["token"], stream=True, authorization=user_bearer_token
+        )
+    )
+    assert streamed == jsonable_encoder(next_page)
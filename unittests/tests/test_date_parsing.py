@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import dateparser
+import pytest
+import pytz
+
+from core_lib import metrics
+from core_lib.date_parsing import DateParsing, parse_optional_datetime
+
+
+@pytest.mark.parametrize(
+    "freely_formatted_datetime",
+    [
+        "Thu, 18 Jun 2020 05:00:00 GMT",
+        "Wed, 19 Aug 2020 13:00:16 +0000",
+        "Tue, 5 Jan 2021 10:00:00 -0500",
+        "Thu, 24 Jun 2021 18:15:01",
+        "2020-09-24T16:10:40Z",
+        "2021-03-12T07:00:00+00:00",
+        "2020-09-24T16:10:40.123+02:00",
+        "24 June 2021",
+    ],
+)
+def test_parses_as_dateparser(freely_formatted_datetime: str):
+    expected = dateparser.parse(freely_formatted_datetime, languages=["en"]).astimezone(tz=pytz.UTC)
+    assert parse_optional_datetime(freely_formatted_datetime) == expected
+
+
+@pytest.mark.parametrize(
+    "freely_formatted_datetime",
+    [
+        "Tue, 10 Aug 2021 10:00:00 CEST",
+        "Tue, 10 Aug 2021 10:00:00 CET",
+        "Tue, 10 Aug 2021 10:00:00 EST",
+        "Tue, 10 Aug 2021 10:00:00 UT",
+        "Tue, 10 Aug 2021 10:00:00 Z",
+        "Tue, 10 Aug 2021 10:00:00 +0200",
+        "05-06-2021 10:00:00",
+        "05-06-2021 10:00",
+        "2021/06/05 10:00:00",
+    ],
+)
+def test_named_zones_and_ambiguous_dates_as_dateparser(freely_formatted_datetime: str):
+    expected = dateparser.parse(freely_formatted_datetime, languages=["en"]).astimezone(tz=pytz.UTC)
+    assert parse_optional_datetime(freely_formatted_datetime) == expected
+    assert parse_optional_datetime(freely_formatted_datetime, "https://example.com/rss") == expected
+
+
+def test_named_zones_are_not_read_as_utc():
+    assert parse_optional_datetime("Tue, 10 Aug 2021 10:00:00 CEST") == datetime(2021, 8, 10, 8, tzinfo=pytz.UTC)
+    assert parse_optional_datetime("Tue, 10 Aug 2021 10:00:00 CET") == datetime(2021, 8, 10, 9, tzinfo=pytz.UTC)
+    assert parse_optional_datetime("05-06-2021 10:00:00").month == 5
+
+
+def test_learns_the_format_of_a_feed():
+    metrics.reset()
+    date_parsing = DateParsing()
+    assert date_parsing.parse("2020-09-24T16:10:40Z", "https://example.com/atom") == datetime(
+        2020, 9, 24, 16, 10, 40, tzinfo=pytz.UTC
+    )
+    assert date_parsing.learned_format("https://example.com/atom") == "iso8601"
+    date_parsing.parse("2020-09-25T16:10:40Z", "https://example.com/atom")
+    assert date_parsing.parse("not a date at all", "https://example.com/atom") is None
+    assert parse_optional_datetime(None) is None
+    assert metrics.counters() == {
+        "date_parsing_fast_path": 1,
+        "date_parsing_learned_format": 1,
+        "date_parsing_slow_path": 1,
+    }
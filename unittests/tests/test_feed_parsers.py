@@ -0,0 +1,66 @@
+from typing import List
+
+from lxml.etree import fromstring
+import pytest
+
+from core_lib.atom_feed import atom_document_to_feed_items
+from core_lib.feed_parsers import HTML_PAGE, FeedParserRegistry, feed_parsers
+from core_lib.rdf_feed import rdf_document_to_feed_items
+from core_lib.repositories import FeedItem, FeedSourceType
+from core_lib.rss_feed import rss_document_to_feed_items
+
+
+def _without_moments(feed_items: List[FeedItem]) -> List[dict]:
+    return [feed_item.dict(exclude={"feed_item_id", "last_seen", "created_on"}) for feed_item in feed_items]
+
+
+@pytest.mark.parametrize(
+    "file_name, source_type",
+    [
+        ("sample-files/rss_feeds/pitchfork_best.xml", FeedSourceType.RSS),
+        ("sample-files/rss_feeds/venues.xml", FeedSourceType.RSS),
+        # The atom namespace follows the rss element.
+        ("sample-files/rss_feeds/ars_technica.xml", FeedSourceType.RSS),
+        ("sample-files/atom/thequietus.xml", FeedSourceType.ATOM),
+        ("sample-files/rdf_sources/slashdot.xml", FeedSourceType.RDF),
+    ],
+)
+def test_sniff_feed_documents(file_name: str, source_type: FeedSourceType):
+    with open(file_name, "rb") as file:
+        document = file.read()
+    assert feed_parsers().sniff(document) is feed_parsers().for_source_type(source_type)
+
+
+def test_sniff_html_pages_and_unknown_documents():
+    for file_name in ["sample-files/rss_feeds/pitchfork_best.html", "sample-files/rdf_sources/slashdot.html"]:
+        with open(file_name, "rb") as file:
+            assert feed_parsers().sniff(file.read()) is HTML_PAGE
+    assert feed_parsers().sniff(b'{"title": "not a feed"}') is None
+
+    # Only the start of the document is sniffed.
+    registry = FeedParserRegistry(sniff_size=16)
+    registry.register(feed_parsers().for_source_type(FeedSourceType.RSS))
+    assert registry.sniff(b'<?xml version="1.0"?><rss version="2.0"/>') is None
+    assert registry.sniff(b'<rss version="2.0"/>') is not None
+
+
+def test_every_source_type_is_registered():
+    for source_type in FeedSourceType:
+        assert feed_parsers().for_source_type(source_type).source_type == source_type
+
+
+@pytest.mark.parametrize(
+    "file_name, document_to_feed_items",
+    [
+        ("sample-files/rss_feeds/pitchfork_best.xml", rss_document_to_feed_items),
+        ("sample-files/atom/thequietus.xml", atom_document_to_feed_items),
+        ("sample-files/rdf_sources/slashdot.xml", rdf_document_to_feed_items),
+    ],
+)
+def test_parse_whole_document(file_name: str, document_to_feed_items):
+    with open(file_name, "rb") as file:
+        document = file.read()
+    feed_format = feed_parsers().sniff(document).feed_format
+    feed, feed_items = feed_format.parse_whole_document("https://example.com/feed", document)
+    assert len(feed_items) > 0
+    assert _without_moments(feed_items) == _without_moments(document_to_feed_items(feed, fromstring(document)))
@@ -0,0 +1,43 @@
+import pytest
+from pymongo import ASCENDING
+
+from core_lib.application_data import Repositories
+from core_lib.indexes import explain_queries, repository_query_shapes
+
+
+@pytest.mark.asyncio
+async def test_reconcile_indexes(repositories: Repositories):
+    # The repositories fixture reconciled the indexes already, a second run changes nothing.
+    reconciliations = await repositories.reconcile_indexes()
+    assert all(len(reconciliation.created) == 0 for reconciliation in reconciliations)
+    assert all(len(reconciliation.recreated) == 0 for reconciliation in reconciliations)
+
+    feeds_collection = repositories.feed_repository.feeds_collection
+    await feeds_collection.create_index([("title", ASCENDING)])
+    await feeds_collection.drop_index("url_1")
+    await feeds_collection.create_index([("url", ASCENDING)], unique=True)
+
+    reconciliations = {
+        reconciliation.collection: reconciliation for reconciliation in await repositories.reconcile_indexes()
+    }
+    assert reconciliations["feeds"].recreated == ["url_1"]
+    assert reconciliations["feeds"].undeclared == ["title_1"]
+
+    reconciliations = {
+        reconciliation.collection: reconciliation
+        for reconciliation in await repositories.reconcile_indexes(drop_undeclared=True)
+    }
+    assert reconciliations["feeds"].dropped == ["title_1"]
+    assert "unique" not in (await feeds_collection.index_information())["url_1"]
+
+
+@pytest.mark.asyncio
+async def test_repository_queries_use_indexes(repositories: Repositories):
+    query_plans = await explain_queries(repositories.database, repository_query_shapes())
+    assert [query_plan.name for query_plan in query_plans if not query_plan.uses_index] == []
+
+
+def test_repository_query_shapes_are_named_once():
+    names = [(query_shape.collection, query_shape.name) for query_shape in repository_query_shapes()]
+    assert len(names) == len(set(names))
+    assert ("feeds", "due feeds") in names
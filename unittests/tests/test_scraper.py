@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from core_lib.gemeente_groningen import gemeente_groningen_parser
+from core_lib.repositories import Feed
+from core_lib.rss_feed import rss_ref_of_html_page
+from core_lib.scraper import Scraper, ScraperRules, has_class
+
+feed = Feed(url="https://gemeente.groningen.nl/actueel/nieuws", title="Gemeente Groningen", link="")
+
+
+def test_scrape_items_with_rules():
+    scraper = Scraper(
+        ScraperRules(
+            items=f"//li[{has_class('news')}]",
+            fields={"title": "a", "link": "a/@href", "published": "time/@datetime"},
+        )
+    )
+    scraped = scraper.scrape("""<html><body><ul>
+            <li class="item news"><a href="/one">One</a><time datetime="2021-01-01">1 jan</time></li>
+            <li class="newsletter"><a href="/letter">Letter</a></li>
+            <li class="news"><a href="/two">Two</a></li>
+        </ul></body></html>""")
+    assert scraped == [
+        {"title": "One", "link": "/one", "published": "2021-01-01"},
+        {"title": "Two", "link": "/two", "published": None},
+    ]
+    assert scraper.scrape("  ") == []
+
+
+def test_gemeente_groningen_parser():
+    with open("sample-files/html_sources/gemeente_groningen.html") as file:
+        feed_items = gemeente_groningen_parser(feed, file.read())
+
+    assert len(feed_items) == 10
+    assert feed_items[0].title == "Glasvezel in gebied Ten Boer"
+    assert feed_items[0].link == "https://gemeente.groningen.nl/actueel/nieuws/glasvezel-in-gebied-ten-boer"
+    assert feed_items[0].description == "Buitengebied Ten Boer wordt voorzien van snel internet."
+    assert feed_items[0].published == datetime(2020, 9, 25, 11, 57, 55, tzinfo=timezone(timedelta(hours=2)))
+
+
+def test_rss_ref_of_html_page():
+    with open("sample-files/rss_feeds/pitchfork_best.html", "rb") as file:
+        assert rss_ref_of_html_page(file.read()) == "https://pitchfork.com/rss/reviews/best/albums/"
+    with open("sample-files/html_sources/gemeente_groningen.html", "rb") as file:
+        assert rss_ref_of_html_page(file.read()) is None
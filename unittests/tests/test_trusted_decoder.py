@@ -0,0 +1,48 @@
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from core_lib.repositories import Feed, FeedSourceType, NewsItem
+from core_lib.utils import now_in_utc
+
+
+def test_from_document_equals_parse_obj():
+    document = {
+        "_id": ObjectId(),
+        "url": "https://example.com/rss",
+        "title": "Example",
+        "link": "https://example.com",
+        "feed_source_type": FeedSourceType.ATOM.value,
+        "number_of_subscriptions": 2,
+        "last_fetched": now_in_utc(),
+    }
+    feed = Feed.from_document(document)
+
+    assert feed == Feed.parse_obj(document)
+    assert feed.feed_source_type is FeedSourceType.ATOM
+    assert feed.refresh_interval_seconds == 900
+    assert feed.__fields_set__ == Feed.parse_obj(document).__fields_set__
+    assert feed.changed_fields() == {}
+    feed.title = "Changed"
+    assert feed.changed_fields() == {"title": "Changed"}
+
+
+def test_from_document_falls_back_to_validation():
+    now = now_in_utc()
+    document = {
+        "_id": ObjectId(),
+        "feed_id": ObjectId(),
+        "user_id": ObjectId(),
+        "feed_item_id": ObjectId(),
+        "title": "No feed title",
+        "description": "description",
+        "link": "https://example.com",
+        "published": now,
+    }
+    first = NewsItem.from_document({**document, "feed_title": "Feed"})
+    second = NewsItem.from_document({**document, "feed_title": "Feed"})
+    first.alternate_links.append("https://example.com/other")
+    assert second.alternate_links == []
+
+    with pytest.raises(ValidationError):
+        NewsItem.from_document(document)
@@ -0,0 +1,35 @@
+import time
+
+from fastapi import HTTPException
+import pytest
+
+from api.security import TokenVerifier, VerifiedTokenCache
+from core_lib.repositories import User
+
+
+@pytest.mark.asyncio
+async def test_verify_uses_verified_tokens(user: User, user_bearer_token: str):
+    TokenVerifier.verified_tokens.clear()
+    claims = await TokenVerifier.verify(user_bearer_token)
+    assert TokenVerifier.verified_tokens.get(user_bearer_token[7:]) == claims
+
+    # Changes to the returned claims do not end up in the cache.
+    claims["name"] = "someone else"
+    assert (await TokenVerifier.verify(user_bearer_token))["name"] == user.email_address
+
+    with pytest.raises(HTTPException):
+        await TokenVerifier.verify(user_bearer_token[:-2])
+
+
+def test_verified_token_cache_respects_exp_and_size():
+    verified_tokens = VerifiedTokenCache(maxsize=2)
+    verified_tokens.put("expired", {"name": "expired", "exp": time.time() - 1})
+    assert verified_tokens.get("expired") is None
+
+    verified_tokens.put("first", {"name": "first", "exp": time.time() + 60})
+    verified_tokens.put("second", {"name": "second", "exp": time.time() + 60})
+    assert verified_tokens.get("first") is not None
+    verified_tokens.put("third", {"name": "third", "exp": time.time() + 60})
+    assert verified_tokens.get("second") is None
+    assert verified_tokens.get("first") is not None
+    assert verified_tokens.get("third") is not None
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from api.api_application_data import security
+from api.news_item_api import news_items
+from core_lib.application_data import Repositories
+from core_lib.repositories import User, UserCache
+
+
+@pytest.mark.asyncio
+async def test_approved_user_is_cached_until_upsert(repositories: Repositories, user: User, user_bearer_token: str):
+    approved_user = await security().get_approved_user(user_bearer_token)
+    assert approved_user.is_approved
+
+    # Changed behind the back of the repository, the cached user is used.
+    await repositories.user_repository.users_collection.update_one(
+        {"_id": user.user_id}, {"$set": {"is_approved": False}}
+    )
+    assert (await security().get_approved_user(user_bearer_token)).is_approved
+
+    # Changes to the returned user do not end up in the cache.
+    approved_user.display_name = "changed"
+    assert (await security().get_approved_user(user_bearer_token)).display_name != "changed"
+
+    # Changed through the repository, the cache is invalidated.
+    user = await repositories.user_repository.fetch_user_by_email(user.email_address)
+    await repositories.user_repository.upsert(user)
+    with pytest.raises(HTTPException) as http_exception:
+        await security().get_approved_user(user_bearer_token)
+    assert http_exception.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_cached_user_expires(repositories: Repositories, user: User, user_bearer_token: str):
+    repositories.user_repository.user_cache.ttl_seconds = -1
+    await security().get_approved_user(user_bearer_token)
+    await repositories.user_repository.users_collection.update_one(
+        {"_id": user.user_id}, {"$set": {"is_approved": False}}
+    )
+    with pytest.raises(HTTPException):
+        await security().get_approved_user(user_bearer_token)
+
+
+@pytest.mark.asyncio
+async def test_unread_count_is_not_cached(repositories: Repositories, user: User, user_bearer_token: str):
+    assert (await news_items(authorization=user_bearer_token)).number_of_unread_items == 0
+
+    # The refresh of the feeds, in another process, changes the counter without invalidating the cache.
+    await repositories.user_repository.users_collection.update_one(
+        {"_id": user.user_id}, {"$inc": {"number_of_unread_items": 3}}
+    )
+    assert (await news_items(authorization=user_bearer_token)).number_of_unread_items == 3
+
+
+def test_user_cache_is_bounded():
+    user = User(email_address="someone@example.com", password_hash="hash", password_salt="salt", is_approved=True)
+    user_cache = UserCache(ttl_seconds=60, max_entries=3)
+    for token in ["token-1", "token-2", "token-3", "token-4"]:
+        user_cache.put(user.user_id, token, user)
+    assert len(user_cache) == 3
+    assert user_cache.get(user.user_id, "token-1") is None
+    assert user_cache.get(user.user_id, "token-4") is not None
+
+    user_cache.invalidate(user.user_id)
+    assert len(user_cache) == 0
+
+
+def test_user_cache_drops_expired_users_on_put(monkeypatch):
+    user = User(email_address="someone@example.com", password_hash="hash", password_salt="salt", is_approved=True)
+    user_cache = UserCache(ttl_seconds=60)
+    user_cache.put(user.user_id, "token-1", user)
+    user_cache.put(user.user_id, "token-2", user)
+    later = time.monotonic() + 61
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    user_cache.put(user.user_id, "token-3", user)
+    assert len(user_cache) == 1